@@ -6,7 +6,7 @@ from django.utils.html import format_html
 from .models import (
     Warehouse, Location, ItemCategory, InventoryItem,
     StockTransaction, StockAlert, InventoryCount, InventoryCountItem,
-    ExcelMasterDocument, ExcelUpdateLog
+    ExcelMasterDocument, ExcelUpdateLog, ExcelSyncOutbox, NotificationOutbox, LabelPrintJob
 )
 
 
@@ -139,10 +139,16 @@ class InventoryCountAdmin(admin.ModelAdmin):
 
 @admin.register(ExcelMasterDocument)
 class ExcelMasterDocumentAdmin(admin.ModelAdmin):
-    list_display = ['title', 'doc_type', 'total_items', 'last_updated']
+    list_display = ['title', 'doc_type', 'total_items', 'index_rows', 'index_build_ms', 'last_updated']
     list_filter = ['doc_type']
     search_fields = ['title', 'file_path']
-    readonly_fields = ['total_items', 'last_updated', 'created_at']
+    readonly_fields = [
+        'total_items', 'last_updated', 'created_at',
+        'index_version', 'index_rows', 'index_built_at', 'index_build_ms',
+        'lock_stats'
+    ]
+    
+    actions = ['rebuild_index']
     
     fieldsets = (
         ('기본 정보', {
@@ -154,7 +160,27 @@ class ExcelMasterDocumentAdmin(admin.ModelAdmin):
         ('통계', {
             'fields': ('total_items', 'last_updated', 'created_at')
         }),
+        ('바코드 인덱스', {
+            'fields': ('index_rows', 'index_build_ms', 'index_built_at', 'index_version')
+        }),
+        ('쓰기 잠금', {
+            'fields': ('lock_stats',)
+        }),
     )
+    
+    def lock_stats(self, obj):
+        from .excel_lock import lock_metrics
+        stats = lock_metrics(obj.id)
+        return (
+            f"획득 {stats['acquired']}회 / 시간초과 {stats['timeouts']}회 / "
+            f"평균 대기 {stats['wait_ms_avg']}ms / 최대 대기 {stats['wait_ms_max']}ms"
+        )
+    lock_stats.short_description = '잠금 대기 통계'
+    
+    def rebuild_index(self, request, queryset):
+        for document in queryset:
+            document.rebuild_row_index()
+    rebuild_index.short_description = '선택된 문서 바코드 인덱스 재생성'
 
 
 @admin.register(ExcelUpdateLog)
@@ -169,3 +195,74 @@ class ExcelUpdateLogAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False  # 로그는 수정 불가
+
+
+@admin.register(ExcelSyncOutbox)
+class ExcelSyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ['barcode', 'document', 'operation', 'quantity', 'status', 'attempts', 'created_at', 'processed_at']
+    list_filter = ['status', 'operation', 'document']
+    search_fields = ['barcode']
+    readonly_fields = [
+        'document', 'stock_transaction', 'barcode', 'operation', 'quantity',
+        'attempts', 'last_error', 'created_at', 'processed_at', 'created_by'
+    ]
+    
+    actions = ['retry_failed']
+    
+    def has_add_permission(self, request):
+        return False  # 대기열은 재고 거래로만 생성
+    
+    def retry_failed(self, request, queryset):
+        from .excel_sync import schedule_document_sync
+        document_ids = set(
+            queryset.filter(status=ExcelSyncOutbox.Status.FAILED).values_list('document_id', flat=True)
+        )
+        queryset.filter(status=ExcelSyncOutbox.Status.FAILED).update(
+            status=ExcelSyncOutbox.Status.PENDING, attempts=0
+        )
+        for document_id in document_ids:
+            schedule_document_sync(document_id)
+    retry_failed.short_description = '실패한 항목 재시도'
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ['email', 'alert', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['email', 'alert__item__name', 'alert__item__item_code']
+    readonly_fields = [
+        'alert', 'recipient', 'email', 'attempts', 'next_attempt_at',
+        'last_error', 'created_at', 'sent_at'
+    ]
+    
+    actions = ['retry_failed']
+    
+    def has_add_permission(self, request):
+        return False  # 대기열은 재고 알림으로만 생성
+    
+    def retry_failed(self, request, queryset):
+        queryset.filter(status=NotificationOutbox.Status.FAILED).update(
+            status=NotificationOutbox.Status.PENDING, attempts=0, next_attempt_at=None
+        )
+    retry_failed.short_description = '실패한 항목 재시도'
+
+
+@admin.register(LabelPrintJob)
+class LabelPrintJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'printer', 'label_count', 'status', 'attempts', 'next_attempt_at', 'created_by', 'created_at', 'sent_at']
+    list_filter = ['status', 'printer']
+    readonly_fields = [
+        'printer', 'payload', 'label_count', 'attempts', 'next_attempt_at',
+        'last_error', 'created_by', 'created_at', 'sent_at'
+    ]
+    
+    actions = ['retry_failed']
+    
+    def has_add_permission(self, request):
+        return False  # 대기열은 라벨 출력 요청으로만 생성
+    
+    def retry_failed(self, request, queryset):
+        queryset.filter(status=LabelPrintJob.Status.FAILED).update(
+            status=LabelPrintJob.Status.PENDING, attempts=0, next_attempt_at=None
+        )
+    retry_failed.short_description = '실패한 작업 재시도'
@@ -0,0 +1,221 @@
+"""
+바코드/QR 이미지 렌더 캐시 (내용 주소 방식)
+같은 (값, 심볼로지, 출력 옵션, QR 데이터)는 한 번만 PIL로 렌더링해 디스크에 PNG로 보관하고,
+응답에는 data URI 대신 변경되지 않는 URL(renders/<키>.png)을 돌려줌
+
+- 키: 렌더 사양(spec) JSON의 SHA-256 → 같은 키의 이미지는 절대 바뀌지 않음 (immutable 캐시 헤더)
+- 저장: MEDIA_ROOT/barcode_renders/<키 앞 2자리>/<키>.png + 사양 파일(<키>.json)
+- LRU 정리: 조회 시 mtime 갱신, BARCODE_RENDER_MAX_FILES 초과 시 오래된 PNG부터 삭제
+  (사양 파일은 남겨 두므로 정리된 URL도 다시 요청하면 재렌더링)
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger('hpe')
+
+RENDER_VERSION = 2  # 렌더링 코드/기본 옵션이 바뀌면 올림 (키가 바뀌어 이전 캐시는 자연 만료)
+
+BARCODE_OPTIONS = {
+    'module_width': 0.4,
+    'module_height': 15.0,
+    'font_size': 10,
+    'text_distance': 5.0,
+    'quiet_zone': 6.5,
+}
+
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+def barcode_spec(code, barcode_type='code128', options=None):
+    """1D 바코드 렌더 사양"""
+    return {
+        'v': RENDER_VERSION,
+        'kind': 'barcode',
+        'value': str(code),
+        'symbology': barcode_type,
+        'options': {**BARCODE_OPTIONS, **(options or {})},
+    }
+
+
+def qr_spec(data, size=10, border=4):
+    """QR 코드 렌더 사양 (최소 버전 + 그 버전에 들어가는 가장 높은 오류정정)"""
+    from .qr_payload import qr_options
+
+    version, error_correction = qr_options(data)
+    return {
+        'v': RENDER_VERSION,
+        'kind': 'qr',
+        'value': data,
+        'options': {
+            'box_size': size, 'border': border,
+            'version': version, 'error_correction': error_correction,
+        },
+    }
+
+
+def render_key(spec):
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_png(spec):
+    """사양대로 PNG 렌더링 (bytes)"""
+    buffer = io.BytesIO()
+    if spec['kind'] == 'barcode':
+        import barcode
+        from barcode.writer import ImageWriter
+
+        barcode_class = barcode.get_barcode_class(spec['symbology'])
+        barcode_class(spec['value'], writer=ImageWriter()).write(buffer, options=spec['options'])
+    elif spec['kind'] == 'qr':
+        import qrcode
+
+        options = spec['options']
+        qr = qrcode.QRCode(
+            version=options.get('version') or 1,
+            error_correction=getattr(qrcode.constants, f"ERROR_CORRECT_{options['error_correction']}"),
+            box_size=options['box_size'],
+            border=options['border'],
+        )
+        qr.add_data(spec['value'])
+        qr.make(fit=not options.get('version'))  # 이전 사양 파일에는 버전이 없음
+        qr.make_image(fill_color='black', back_color='white').save(buffer, format='PNG')
+    else:
+        raise ValueError(f"지원하지 않는 렌더 종류: {spec['kind']}")
+    return buffer.getvalue()
+
+
+class RenderCache:
+    """PNG 렌더 결과 디스크 캐시"""
+
+    PRUNE_EVERY = 500  # 새로 렌더링한 파일 수가 이만큼 쌓이면 정리
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._written = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def root(self):
+        return Path(settings.MEDIA_ROOT) / 'barcode_renders'
+
+    @property
+    def max_files(self):
+        return getattr(settings, 'BARCODE_RENDER_MAX_FILES', 50000)
+
+    def path(self, key):
+        return self.root / key[:2] / f'{key}.png'
+
+    def _spec_path(self, key):
+        return self.root / key[:2] / f'{key}.json'
+
+    def ensure(self, spec):
+        """
+        사양의 PNG가 캐시에 있도록 보장하고 키 반환
+
+        Raises:
+            렌더링 오류 (잘못된 바코드 값 등)
+        """
+        key = render_key(spec)
+        path = self.path(key)
+        if path.exists():
+            self._touch(path)
+            with self._lock:
+                self.hits += 1
+            return key
+
+        self._store(key, spec, render_png(spec))
+        return key
+
+    def read(self, key):
+        """키의 PNG bytes (정리된 파일은 사양 파일로 재렌더링, 없으면 None)"""
+        if not KEY_PATTERN.match(key or ''):
+            return None
+
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            try:
+                spec = json.loads(self._spec_path(key).read_text(encoding='utf-8'))
+            except (FileNotFoundError, ValueError):
+                return None
+            data = render_png(spec)
+            self._store(key, spec, data)
+            return data
+
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def _store(self, key, spec, data):
+        from .excel_lock import atomic_write
+
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        spec_path = self._spec_path(key)
+        if not spec_path.exists():
+            spec_path.write_text(json.dumps(spec, ensure_ascii=False), encoding='utf-8')
+        atomic_write(path, lambda f: f.write(data))
+
+        with self._lock:
+            self.misses += 1
+            self._written += 1
+            prune = self._written >= self.PRUNE_EVERY
+            if prune:
+                self._written = 0
+        if prune:
+            self.prune()
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)  # LRU 순서 (mtime = 마지막 사용 시각)
+        except OSError:
+            pass
+
+    def prune(self, max_files=None):
+        """오래 사용하지 않은 PNG부터 삭제 (사양 파일은 유지)"""
+        max_files = self.max_files if max_files is None else max_files
+        if not self.root.exists():
+            return 0
+
+        files = []
+        for directory in os.scandir(self.root):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                if entry.name.endswith('.png'):
+                    files.append((entry.stat().st_mtime, entry.path))
+        if len(files) <= max_files:
+            return 0
+
+        files.sort()
+        removed = 0
+        for _, file_path in files[:len(files) - max_files]:
+            try:
+                os.unlink(file_path)
+                removed += 1
+            except OSError:
+                pass
+        logger.info(f'바코드 렌더 캐시 정리: {removed}개 삭제')
+        return removed
+
+
+render_cache = RenderCache()
+
+
+def render_url(key):
+    """렌더 이미지 URL (변경되지 않음)"""
+    from django.urls import reverse
+    return reverse('inventory:barcode-render', args=[key])
@@ -0,0 +1,264 @@
+"""
+바코드 해석 (바코드 → 품목/위치/원장 문서)
+- 접두어 라우팅 표(HP-KSTC-, HP-P10-/P20-, HP-PRT-, HP-SUP-, LOC-, ITM-)를 정규식 하나로 컴파일
+- 해석 결과 캐시: 1차 프로세스 내 LRU (짧은 TTL), 2차 Django cache(Redis) 공유 계층
+- 품목/위치 저장·삭제, 원장 행 추가/인덱스 재생성 시 해당 바코드 무효화
+- 캐시된 ID는 조회 시 바코드가 여전히 같은지 확인 (바코드가 바뀐 품목 대비)
+- 시그널 없는 bulk_create/bulk_update 경로는 직접 invalidate() 호출 (대사 반영 등)
+- 공유 계층 키는 바코드 해시 (공백/한글이 들어간 값도 키 검사 경고 없음)
+- ledger_row는 참고용 (원장 쓰기는 find_item_row로 최신 인덱스 사용)
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger('hpe')
+
+ITEM = 'item'
+LOCATION = 'location'
+LEDGER = 'ledger'  # 원장에만 있는 바코드 (품목 미등록)
+
+
+class PrefixRouter:
+    """접두어 라우팅 표 (긴 접두어 우선, 정규식 한 번으로 판별)"""
+
+    def __init__(self, routes):
+        self.routes = {prefix: (kind, doc_type) for prefix, kind, doc_type in routes}
+        prefixes = sorted(self.routes, key=len, reverse=True)
+        self.pattern = re.compile('|'.join(re.escape(prefix) for prefix in prefixes))
+
+    def route(self, barcode):
+        """
+        Returns:
+            tuple: (우선 조회할 종류, 원장 문서 유형) - 알 수 없는 접두어는 (None, None)
+        """
+        match = self.pattern.match(barcode or '')
+        if not match:
+            return None, None
+        return self.routes[match.group(0)]
+
+
+_router = None
+
+
+def router():
+    """바코드 접두어 라우터 (ExcelMasterDocument.BARCODE_PREFIXES + 위치/품목 기본 접두어)"""
+    global _router
+    if _router is None:
+        from .models import ExcelMasterDocument
+
+        _router = PrefixRouter((
+            *((prefix, ITEM, str(doc_type)) for prefix, doc_type in ExcelMasterDocument.BARCODE_PREFIXES),
+            ('LOC-', LOCATION, None),
+            ('ITM-', ITEM, None),
+        ))
+    return _router
+
+
+def _not_found(barcode, doc_type=None):
+    return {
+        'barcode': barcode, 'found': False, 'kind': None, 'id': None,
+        'doc_type': doc_type, 'document_id': None, 'ledger_row': None,
+    }
+
+
+class BarcodeResolver:
+    """바코드 해석 결과 캐시 (프로세스 내 LRU + 공유 계층)"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'BARCODE_CACHE_SIZE', 10000)
+
+    @property
+    def local_ttl(self):
+        return getattr(settings, 'BARCODE_CACHE_LOCAL_TTL', 30)
+
+    def _shared_cache(self):
+        return caches[getattr(settings, 'BARCODE_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def _shared_key(barcode):
+        return 'barcode:' + hashlib.sha256(barcode.encode('utf-8')).hexdigest()[:32]
+
+    def resolve(self, barcode, use_cache=True):
+        """바코드 1개 해석"""
+        return self.resolve_many([barcode], use_cache=use_cache)[barcode]
+
+    def resolve_many(self, barcodes, use_cache=True):
+        """
+        여러 바코드 해석 (캐시에 없는 것만 종류별 barcode__in 조회)
+
+        Returns:
+            dict: barcode → {barcode, found, kind, id, doc_type, document_id, ledger_row}
+        """
+        barcodes = list(dict.fromkeys(barcodes))
+        results = {}
+
+        if use_cache:
+            now = time.monotonic()
+            with self._lock:
+                for barcode in barcodes:
+                    cached = self._entries.get(barcode)
+                    if cached and cached[0] > now:
+                        self._entries.move_to_end(barcode)
+                        results[barcode] = cached[1]
+
+            missing = [barcode for barcode in barcodes if barcode not in results]
+            if missing:
+                try:
+                    shared = self._shared_cache().get_many([self._shared_key(b) for b in missing])
+                except Exception as e:
+                    logger.warning(f'바코드 공유 캐시 조회 실패: {str(e)}')
+                    shared = {}
+                for barcode in missing:
+                    entry = shared.get(self._shared_key(barcode))
+                    if entry is not None:
+                        results[barcode] = entry
+                        self._store_local(entry)
+
+        missing = [barcode for barcode in barcodes if barcode not in results]
+        with self._lock:
+            self.hits += len(barcodes) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return results
+
+        looked_up = self._lookup(missing)
+        try:
+            self._shared_cache().set_many(
+                {self._shared_key(b): entry for b, entry in looked_up.items()},
+                getattr(settings, 'BARCODE_CACHE_TIMEOUT', 3600)
+            )
+        except Exception as e:
+            logger.warning(f'바코드 공유 캐시 저장 실패: {str(e)}')
+        for entry in looked_up.values():
+            if entry['found']:
+                self._store_local(entry)  # 미등록 바코드는 공유 계층에만 (등록 즉시 무효화되도록)
+        results.update(looked_up)
+        return results
+
+    def _lookup(self, barcodes):
+        """DB 조회 (종류별 최대 1회씩 + 원장 행 인덱스 1회)"""
+        from .models import ExcelMasterDocument, ExcelRowIndex, InventoryItem, Location
+
+        routes = {barcode: router().route(barcode) for barcode in barcodes}
+        results = {barcode: _not_found(barcode, routes[barcode][1]) for barcode in barcodes}
+
+        def found(barcode, kind, pk):
+            results[barcode].update(found=True, kind=kind, id=str(pk))
+
+        # 접두어가 가리키는 종류부터 조회 (LOC-는 위치 먼저, 그 외는 품목 먼저)
+        item_first = [b for b in barcodes if routes[b][0] != LOCATION]
+        location_first = [b for b in barcodes if routes[b][0] == LOCATION]
+
+        if item_first:
+            for barcode, pk in InventoryItem.objects.filter(barcode__in=item_first).values_list('barcode', 'id'):
+                found(barcode, ITEM, pk)
+        remaining = location_first + [b for b in item_first if not results[b]['found']]
+        if remaining:
+            for barcode, pk in Location.objects.filter(barcode__in=remaining).values_list('barcode', 'id'):
+                found(barcode, LOCATION, pk)
+        fallback = [b for b in location_first if not results[b]['found']]
+        if fallback:
+            for barcode, pk in InventoryItem.objects.filter(barcode__in=fallback).values_list('barcode', 'id'):
+                found(barcode, ITEM, pk)
+
+        # 원장 문서/행 (문서 유형 접두어 바코드만)
+        ledger = [b for b in barcodes if routes[b][1]]
+        if ledger:
+            documents = {}
+            for doc_type, document_id in ExcelMasterDocument.objects.filter(
+                doc_type__in={routes[b][1] for b in ledger}
+            ).values_list('doc_type', 'id'):
+                documents.setdefault(doc_type, document_id)  # for_barcode()와 같은 첫 번째 문서
+            rows = {
+                (document_id, barcode): row
+                for document_id, barcode, row in ExcelRowIndex.objects.filter(
+                    document_id__in=documents.values(), barcode__in=ledger
+                ).values_list('document_id', 'barcode', 'row')
+            }
+            for barcode in ledger:
+                document_id = documents.get(routes[barcode][1])
+                if document_id is None:
+                    continue
+                entry = results[barcode]
+                entry.update(document_id=str(document_id), ledger_row=rows.get((document_id, barcode)))
+                if not entry['found'] and entry['ledger_row'] is not None:
+                    entry.update(found=True, kind=LEDGER)
+
+        return results
+
+    def get_item(self, barcode, queryset=None):
+        """
+        바코드로 품목 조회 (캐시된 ID로 pk 조회, 바코드가 바뀌었으면 다시 해석)
+
+        Returns:
+            InventoryItem 또는 None
+        """
+        from .models import InventoryItem
+
+        queryset = queryset if queryset is not None else InventoryItem.objects.all()
+        for use_cache in (True, False):
+            entry = self.resolve(barcode, use_cache=use_cache)
+            if entry['kind'] != ITEM:
+                return None
+            item = queryset.filter(pk=entry['id'], barcode=barcode).first()
+            if item is not None:
+                return item
+            # 캐시된 ID가 더 이상 이 바코드가 아님 - 캐시 없이 한 번 더 해석
+            self.invalidate([barcode])
+        return None
+
+    def get_location(self, barcode, queryset=None):
+        """바코드로 위치 조회 (get_item과 같은 방식)"""
+        from .models import Location
+
+        queryset = queryset if queryset is not None else Location.objects.all()
+        for use_cache in (True, False):
+            entry = self.resolve(barcode, use_cache=use_cache)
+            if entry['kind'] != LOCATION:
+                return None
+            location = queryset.filter(pk=entry['id'], barcode=barcode).first()
+            if location is not None:
+                return location
+            self.invalidate([barcode])
+        return None
+
+    def _store_local(self, entry):
+        with self._lock:
+            self._entries[entry['barcode']] = (time.monotonic() + self.local_ttl, entry)
+            self._entries.move_to_end(entry['barcode'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, barcodes):
+        """바코드 캐시 제거 (프로세스 내 + 공유 계층)"""
+        barcodes = [barcode for barcode in barcodes if barcode]
+        if not barcodes:
+            return
+        with self._lock:
+            for barcode in barcodes:
+                self._entries.pop(barcode, None)
+        try:
+            self._shared_cache().delete_many([self._shared_key(barcode) for barcode in barcodes])
+        except Exception as e:
+            logger.warning(f'바코드 공유 캐시 삭제 실패: {str(e)}')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+barcode_resolver = BarcodeResolver()
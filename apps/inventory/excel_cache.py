@@ -0,0 +1,142 @@
+"""
+엑셀 원장 파싱 결과 캐시
+- 1차: 프로세스 내 LRU (문서 ID + 파일 mtime/size)
+- 2차: Django cache (Redis) 공유 계층 (문서 ID + 파일 내용 해시)
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger('hpe')
+
+
+def file_signature(file_path):
+    """파일 서명 (mtime_ns, size) 반환, 파일이 없으면 None"""
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+_hash_lock = threading.Lock()
+_hash_memo = {}
+
+
+def file_content_hash(file_path, signature=None):
+    """파일 내용 SHA-256 해시 (같은 서명이면 재계산하지 않음)"""
+    signature = signature or file_signature(file_path)
+    if signature is None:
+        return None
+
+    memo_key = str(file_path)
+    with _hash_lock:
+        cached = _hash_memo.get(memo_key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+
+    with _hash_lock:
+        _hash_memo[memo_key] = (signature, content_hash)
+    return content_hash
+
+
+class LedgerCache:
+    """파싱된 원장 항목 캐시 (프로세스 내 LRU + 선택적 공유 계층)"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'EXCEL_LEDGER_CACHE_SIZE', 16)
+
+    @property
+    def shared_enabled(self):
+        return getattr(settings, 'EXCEL_LEDGER_CACHE_SHARED', False)
+
+    def _shared_cache(self):
+        return caches[getattr(settings, 'EXCEL_LEDGER_CACHE_ALIAS', 'default')]
+
+    @staticmethod
+    def _shared_key(document_id, content_hash, layout):
+        return f'excel-ledger:{document_id}:{content_hash}:{layout}'
+
+    def get(self, document_id, signature, layout, file_path):
+        """캐시된 항목 목록 반환 (없으면 None)"""
+        local_key = (str(document_id), signature, layout)
+        with self._lock:
+            items = self._entries.get(local_key)
+            if items is not None:
+                self._entries.move_to_end(local_key)
+                self.hits += 1
+                return items
+
+        if self.shared_enabled:
+            content_hash = file_content_hash(file_path, signature)
+            try:
+                items = self._shared_cache().get(
+                    self._shared_key(document_id, content_hash, layout)
+                )
+            except Exception as e:
+                logger.warning(f'엑셀 공유 캐시 조회 실패: {str(e)}')
+                items = None
+            if items is not None:
+                self._store_local(local_key, items)
+                with self._lock:
+                    self.hits += 1
+                return items
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, document_id, signature, layout, file_path, items):
+        """파싱 결과 저장"""
+        self._store_local((str(document_id), signature, layout), items)
+
+        if self.shared_enabled:
+            content_hash = file_content_hash(file_path, signature)
+            try:
+                self._shared_cache().set(
+                    self._shared_key(document_id, content_hash, layout),
+                    items,
+                    getattr(settings, 'EXCEL_LEDGER_CACHE_TIMEOUT', 3600)
+                )
+            except Exception as e:
+                logger.warning(f'엑셀 공유 캐시 저장 실패: {str(e)}')
+
+    def _store_local(self, local_key, items):
+        with self._lock:
+            # 같은 문서의 이전 버전은 제거
+            for key in [k for k in self._entries if k[0] == local_key[0]]:
+                del self._entries[key]
+            self._entries[local_key] = items
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, document_id):
+        """문서의 프로세스 내 캐시 제거 (공유 계층은 내용 해시로 자연 무효화)"""
+        document_id = str(document_id)
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == document_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+ledger_cache = LedgerCache()
@@ -0,0 +1,315 @@
+"""
+원장 계산 열용 수식 평가기
+openpyxl은 수식을 재계산하지 않으므로 data_only 값은 마지막으로 Excel에서 저장한 시점의 값
+(셀 패치/openpyxl 저장 후에는 현재고 등 수식 열이 갱신되지 않음)
+
+- 지원: 숫자, 셀 참조(A1, $A$1), + - * / ^, 괄호, SUM/MIN/MAX/ABS/ROUND/TODAY
+- 같은 상대 수식(=H15-I15, =H16-I16 ...)은 한 번만 컴파일해 모든 행에 재사용
+- 지원하지 않는 수식/다른 시트 참조는 UnsupportedFormula, 계산 오류(#VALUE!, #DIV/0!)는 FormulaError
+"""
+import operator
+import re
+from datetime import date
+from functools import lru_cache
+
+from openpyxl.utils import column_index_from_string
+
+
+class UnsupportedFormula(Exception):
+    """평가기가 지원하지 않는 수식"""
+
+
+class FormulaError(Exception):
+    """수식 계산 오류 (Excel의 #VALUE!, #DIV/0! 등)"""
+
+
+_TOKEN = re.compile(r'''
+    \s*(?:
+        (?P<range>\$?[A-Z]{1,3}\$?\d+:\$?[A-Z]{1,3}\$?\d+)
+      | (?P<ref>\$?[A-Z]{1,3}\$?\d+)(?![\w(!])
+      | (?P<func>[A-Z][A-Z0-9.]*)\s*\(
+      | (?P<number>\d+(?:\.\d*)?(?:[Ee][+-]?\d+)?|\.\d+(?:[Ee][+-]?\d+)?)
+      | (?P<op>[-+*/^(),])
+    )
+''', re.X)
+
+_REF = re.compile(r'^(\$?)([A-Z]{1,3})(\$?)(\d+)$')
+
+_BINARY = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '^': operator.pow,
+}
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise UnsupportedFormula(f'해석할 수 없는 수식: ={text}')
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def _relative_ref(ref, origin_row):
+    """셀 참조 → (열, 행, 행 고정 여부) - 고정되지 않은 행은 수식 위치 기준 오프셋"""
+    match = _REF.match(ref)
+    col = column_index_from_string(match.group(2))
+    row = int(match.group(4))
+    if match.group(3):
+        return col, row, True
+    return col, row - origin_row, False
+
+
+def _template(formula, origin_row):
+    """행 번호를 오프셋으로 바꾼 수식 (같은 상대 수식이면 같은 키)"""
+    def replace(match):
+        col_abs, col, row_abs, row = match.groups()
+        if row_abs:
+            return f'{col_abs}{col}${row}'
+        return f'{col_abs}{col}R[{int(row) - origin_row}]'
+    return re.sub(r'(?<![\w$])(\$?)([A-Z]{1,3})(\$?)(\d+)(?![\w(!])', replace, formula)
+
+
+def _number(value):
+    """산술 연산 피연산자 (빈 셀은 0, 숫자 문자열은 숫자)"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            raise FormulaError('#VALUE!')
+    raise FormulaError('#VALUE!')
+
+
+def _values(arg):
+    """SUM 등의 인수 값 (범위 안의 문자/빈 셀은 무시)"""
+    if isinstance(arg, list):
+        return [value for value in arg if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    return [_number(arg)]
+
+
+def _round(value, digits=0):
+    from decimal import Decimal, ROUND_HALF_UP
+    quantum = Decimal(1).scaleb(-int(digits))
+    result = float(Decimal(str(value)).quantize(quantum, rounding=ROUND_HALF_UP))
+    return int(result) if result.is_integer() else result
+
+
+_FUNCTIONS = {
+    'SUM': lambda *args: sum(v for arg in args for v in _values(arg)),
+    'MIN': lambda *args: min([v for arg in args for v in _values(arg)] or [0]),
+    'MAX': lambda *args: max([v for arg in args for v in _values(arg)] or [0]),
+    'ABS': lambda value: abs(_number(value)),
+    'ROUND': lambda value, digits=0: _round(_number(value), _number(digits)),
+    'TODAY': lambda: date.today(),
+}
+
+
+class _Compiler:
+    """토큰 → 클로저 (resolve(col, row), origin_row를 받아 값 반환)"""
+
+    def __init__(self, tokens, origin_row):
+        self.tokens = tokens
+        self.pos = 0
+        self.origin_row = origin_row
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, text = self.peek()
+        if kind is None or (value is not None and text != value):
+            raise UnsupportedFormula(f"'{value}' 필요")
+        self.pos += 1
+        return kind, text
+
+    def compile(self):
+        node = self.expression()
+        if self.pos != len(self.tokens):
+            raise UnsupportedFormula('수식 끝에 해석할 수 없는 부분이 있습니다.')
+        return node
+
+    def binary(self, operand, operators):
+        left = operand()
+        while self.peek() in [('op', op) for op in operators]:
+            func = _BINARY[self.take()[1]]
+            right = operand()
+            left = self._apply(func, left, right)
+        return left
+
+    @staticmethod
+    def _apply(func, left, right):
+        def evaluate(resolve, origin):
+            try:
+                return func(_number(left(resolve, origin)), _number(right(resolve, origin)))
+            except ZeroDivisionError:
+                raise FormulaError('#DIV/0!')
+        return evaluate
+
+    def expression(self):
+        return self.binary(self.term, '+-')
+
+    def term(self):
+        return self.binary(self.unary, '*/')
+
+    def unary(self):
+        if self.peek() in (('op', '-'), ('op', '+')):
+            sign = self.take()[1]
+            operand = self.unary()
+            if sign == '+':
+                return operand
+            return lambda resolve, origin: -_number(operand(resolve, origin))
+        return self.binary(self.atom, '^')
+
+    def atom(self):
+        kind, text = self.take()
+        if kind == 'number':
+            value = float(text)
+            value = int(value) if value.is_integer() else value
+            return lambda resolve, origin: value
+        if kind == 'ref':
+            col, row, fixed = _relative_ref(text, self.origin_row)
+            if fixed:
+                return lambda resolve, origin: resolve(col, row)
+            return lambda resolve, origin: resolve(col, origin + row)
+        if kind == 'func':
+            return self.function(text)
+        if (kind, text) == ('op', '('):
+            node = self.expression()
+            self.take(')')
+            return node
+        raise UnsupportedFormula(f'지원하지 않는 수식 요소: {text}')
+
+    def argument(self):
+        kind, text = self.peek()
+        if kind != 'range':
+            return self.expression()
+        self.take()
+        start, end = (_relative_ref(ref, self.origin_row) for ref in text.split(':'))
+
+        def evaluate(resolve, origin):
+            rows = [row if fixed else origin + row for _, row, fixed in (start, end)]
+            return [
+                resolve(col, row)
+                for row in range(min(rows), max(rows) + 1)
+                for col in range(min(start[0], end[0]), max(start[0], end[0]) + 1)
+            ]
+        return evaluate
+
+    def function(self, name):
+        func = _FUNCTIONS.get(name.upper())
+        if func is None:
+            raise UnsupportedFormula(f'지원하지 않는 함수: {name}')
+
+        args = []
+        if self.peek() != ('op', ')'):
+            args.append(self.argument())
+            while self.peek() == ('op', ','):
+                self.take()
+                args.append(self.argument())
+        self.take(')')
+
+        def evaluate(resolve, origin):
+            try:
+                return func(*(arg(resolve, origin) for arg in args))
+            except TypeError:
+                raise FormulaError('#VALUE!')  # 인수 개수 오류
+        return evaluate
+
+
+@lru_cache(maxsize=1024)
+def _compile_template(template):
+    # 템플릿의 R[n] 오프셋을 가상의 기준 행(100000) 기준 절대 행 번호로 되돌려 컴파일
+    text = re.sub(r'R\[(-?\d+)\]', lambda m: str(int(m.group(1)) + 100000), template)
+    return _Compiler(_tokenize(text), 100000).compile()
+
+
+class CompiledFormula:
+    """행 위치에 묶인 컴파일된 수식"""
+
+    __slots__ = ('formula', 'row', 'node')
+
+    def __init__(self, formula, row, node):
+        self.formula = formula
+        self.row = row
+        self.node = node
+
+    def evaluate(self, resolve):
+        """
+        Args:
+            resolve: (col, row) → 셀 값 (수식 셀이면 계산된 값)
+        """
+        return self.node(resolve, self.row)
+
+
+def compile_formula(formula, row):
+    """
+    수식 컴파일 (같은 상대 수식은 캐시된 클로저 재사용)
+
+    Raises:
+        UnsupportedFormula
+    """
+    text = formula[1:] if formula.startswith('=') else formula
+    if '!' in text or '"' in text or '[' in text:
+        raise UnsupportedFormula(f'다른 시트 참조/문자열은 지원하지 않습니다: {formula}')
+    return CompiledFormula(formula, row, _compile_template(_template(text.upper(), row)))
+
+
+def is_formula(value):
+    return isinstance(value, str) and value.startswith('=') and len(value) > 1
+
+
+class RowEvaluator:
+    """
+    한 행의 값(tuple, 1열부터)으로 그 행의 수식 셀 계산
+    다른 행을 참조하는 수식은 UnsupportedFormula (스트리밍 파싱에서는 현재 행만 메모리에 있음)
+    """
+
+    def __init__(self, row, values):
+        self.row = row
+        self.values = values
+        self._results = {}
+        self._evaluating = set()
+
+    def raw(self, col):
+        return self.values[col - 1] if 0 < col <= len(self.values) else None
+
+    def resolve(self, col, row):
+        if row != self.row:
+            raise UnsupportedFormula('다른 행을 참조하는 수식')
+        return self.value(col)
+
+    def value(self, col):
+        """열 값 (수식이면 계산 결과)"""
+        raw = self.raw(col)
+        if not is_formula(raw):
+            return raw
+        if col in self._results:
+            return self._results[col]
+        if col in self._evaluating:
+            raise FormulaError('순환 참조')
+
+        self._evaluating.add(col)
+        try:
+            result = compile_formula(raw, self.row).evaluate(self.resolve)
+        finally:
+            self._evaluating.discard(col)
+        if isinstance(result, float) and result.is_integer():
+            result = int(result)
+        elif isinstance(result, float):
+            result = round(result, 10)  # 부동소수점 오차 (0.1+0.2) 정리
+        self._results[col] = result
+        return result
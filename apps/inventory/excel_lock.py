@@ -0,0 +1,185 @@
+"""
+엑셀 원장 쓰기 잠금 및 원자적 저장
+- 문서별 파일 잠금 (프로세스 간 공유, 대기 시간 제한)
+- 임시 파일에 저장 후 os.replace로 교체
+- 저장 전 스냅샷 N개 보관
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger('hpe')
+
+
+class WorkbookLockTimeout(Exception):
+    """엑셀 파일 잠금 대기 시간 초과"""
+
+
+_held = threading.local()
+
+
+def _lock_dir():
+    lock_dir = Path(getattr(settings, 'EXCEL_LOCK_DIR', None) or Path(settings.MEDIA_ROOT) / '.locks')
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    return lock_dir
+
+
+def _try_lock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _record_metrics(document_id, wait_ms, timed_out=False):
+    """잠금 대기 통계 기록 (Django cache - 운영에서는 프로세스 간 공유)"""
+    prefix = f'excel-lock:{document_id}'
+    try:
+        if timed_out:
+            cache.get_or_set(f'{prefix}:timeouts', 0, None)
+            cache.incr(f'{prefix}:timeouts')
+            return
+        cache.get_or_set(f'{prefix}:acquired', 0, None)
+        cache.incr(f'{prefix}:acquired')
+        cache.get_or_set(f'{prefix}:wait_ms_total', 0, None)
+        cache.incr(f'{prefix}:wait_ms_total', int(wait_ms))
+        if wait_ms > (cache.get(f'{prefix}:wait_ms_max') or 0):
+            cache.set(f'{prefix}:wait_ms_max', int(wait_ms), None)
+    except Exception as e:
+        logger.debug(f'엑셀 잠금 통계 기록 실패: {str(e)}')
+
+
+def lock_metrics(document_id):
+    """문서별 잠금 대기 통계"""
+    prefix = f'excel-lock:{document_id}'
+    values = cache.get_many([
+        f'{prefix}:acquired', f'{prefix}:timeouts',
+        f'{prefix}:wait_ms_total', f'{prefix}:wait_ms_max'
+    ])
+    acquired = values.get(f'{prefix}:acquired', 0)
+    wait_total = values.get(f'{prefix}:wait_ms_total', 0)
+    return {
+        'acquired': acquired,
+        'timeouts': values.get(f'{prefix}:timeouts', 0),
+        'wait_ms_avg': round(wait_total / acquired, 1) if acquired else 0,
+        'wait_ms_max': values.get(f'{prefix}:wait_ms_max', 0),
+    }
+
+
+@contextmanager
+def workbook_lock(document_id, timeout=None):
+    """
+    문서별 쓰기 잠금
+    같은 스레드에서 중첩 호출하면 재진입으로 처리
+    """
+    document_id = str(document_id)
+    held = getattr(_held, 'documents', None)
+    if held is None:
+        held = _held.documents = set()
+    if document_id in held:
+        yield
+        return
+
+    if timeout is None:
+        timeout = getattr(settings, 'EXCEL_LOCK_TIMEOUT', 10)
+
+    fd = os.open(_lock_dir() / f'{document_id}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+    started = time.monotonic()
+    try:
+        delay = 0.01
+        while not _try_lock(fd):
+            if time.monotonic() - started >= timeout:
+                _record_metrics(document_id, 0, timed_out=True)
+                raise WorkbookLockTimeout(
+                    f'엑셀 파일이 다른 작업에서 사용 중입니다. ({timeout}초 대기 초과)'
+                )
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+        wait_ms = (time.monotonic() - started) * 1000
+        _record_metrics(document_id, wait_ms)
+        if wait_ms > 1000:
+            logger.warning(f'엑셀 잠금 대기 {wait_ms:.0f}ms ({document_id})')
+
+        held.add(document_id)
+        try:
+            yield
+        finally:
+            held.discard(document_id)
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def _snapshot(document_id, file_path):
+    """저장 전 현재 파일 스냅샷 (최근 N개 보관)"""
+    versions = getattr(settings, 'EXCEL_SNAPSHOT_VERSIONS', 5)
+    if versions <= 0 or not file_path.exists():
+        return
+
+    snapshot_dir = Path(settings.MEDIA_ROOT) / 'excel_snapshots' / str(document_id)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = timezone.now().strftime('%Y%m%d%H%M%S%f')
+    shutil.copy2(file_path, snapshot_dir / f'{timestamp}{file_path.suffix}')
+
+    snapshots = sorted(snapshot_dir.iterdir())
+    for old in snapshots[:-versions]:
+        old.unlink(missing_ok=True)
+
+
+def atomic_write(file_path, write, document_id=None):
+    """
+    임시 파일에 기록한 뒤 원본과 교체 (저장 중 장애 시 원본 보존)
+    write: 파일 객체를 받아 내용을 기록하는 함수
+    """
+    file_path = Path(file_path)
+    if document_id is not None:
+        _snapshot(document_id, file_path)
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=file_path.parent, prefix='.tmp-', suffix=file_path.suffix
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if file_path.exists():
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def atomic_save(workbook, file_path, document_id=None):
+    """openpyxl 워크북 원자적 저장"""
+    atomic_write(file_path, workbook.save, document_id)
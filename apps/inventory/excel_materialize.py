@@ -0,0 +1,191 @@
+"""
+DB 기준 원장 생성 (EXCEL_LEDGER_SOURCE = 'db')
+InventoryItem/StockTransaction이 원본이고, 엑셀 원장은 조회/다운로드 시에만 생성
+
+- 원래 엑셀 파일은 양식(template)으로만 사용: 헤더 행, 열 너비, 데이터 행 서식
+- openpyxl write_only 모드로 한 번에 스트리밍 기록
+- 생성 파일은 DB 버전(품목 수/최종 수정/최종 거래) 단위로 캐시 → 다음 거래 전까지 재사용
+"""
+import hashlib
+import logging
+from copy import copy
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+logger = logging.getLogger('hpe')
+
+STYLE_ATTRS = ('font', 'border', 'fill', 'number_format', 'alignment', 'protection')
+
+
+def db_source_enabled():
+    """DB 기준 모드 여부"""
+    return getattr(settings, 'EXCEL_LEDGER_SOURCE', 'excel') == 'db'
+
+
+def ledger_queryset(document):
+    """원장에 들어갈 품목 (문서 유형의 바코드 접두어, 바코드 순)"""
+    from django.db.models import Q
+    from .models import ExcelMasterDocument, InventoryItem
+
+    condition = Q()
+    for prefix, doc_type in ExcelMasterDocument.BARCODE_PREFIXES:
+        if doc_type == document.doc_type:
+            condition |= Q(barcode__startswith=prefix)
+    if not condition:
+        return InventoryItem.objects.none()
+    return InventoryItem.objects.filter(condition, is_active=True).order_by('barcode')
+
+
+def ledger_version(document):
+    """DB 원장 버전 (품목/거래가 바뀌면 달라짐)"""
+    from .models import StockTransaction
+    from .excel_cache import file_signature
+
+    items = ledger_queryset(document)
+    stats = items.aggregate(count=Count('id'), updated=Max('updated_at'))
+    last_transaction = StockTransaction.objects.filter(
+        item__in=items.values('id')
+    ).aggregate(last=Max('created_at'))['last']
+
+    key = '|'.join(str(part) for part in (
+        stats['count'], stats['updated'], last_transaction,
+        file_signature(document.get_file_path()), document.layout_key(),
+    ))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def iter_db_items(document):
+    """DB 품목을 원장 파싱 결과와 같은 형태로 (생성 파일의 행 번호 기준)"""
+    fields = ('barcode', 'name', 'received_quantity', 'issued_quantity', 'current_quantity')
+    for offset, row in enumerate(ledger_queryset(document).values_list(*fields).iterator(chunk_size=2000)):
+        barcode, name, received, issued, current = row
+        row_idx = document.data_start_row + offset
+        item = {'row': row_idx, 'last_row': row_idx, 'barcode': barcode, 'name': name}
+        values = {'received': received, 'issued': issued, 'current': current}
+        for key in document.extra_columns:
+            if key in values:
+                number = float(values[key] or 0)
+                item[key] = int(number) if number.is_integer() else number
+        yield item
+
+
+def _generated_dir(document):
+    return Path(settings.MEDIA_ROOT) / 'excel_generated' / str(document.id)
+
+
+def materialize_ledger(document):
+    """
+    DB 기준 원장 파일 경로 (현재 버전이 없으면 생성)
+
+    Returns:
+        Path
+    """
+    version = ledger_version(document)
+    target = _generated_dir(document) / f'{version}.xlsx'
+    if target.exists():
+        return target
+
+    with document.lock():
+        if target.exists():
+            return target  # 대기 중 다른 요청이 생성
+
+        from .excel_lock import atomic_write
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        workbook = _build_workbook(document)
+        atomic_write(target, workbook.save)
+
+        for old in target.parent.iterdir():
+            if old != target and old.suffix == '.xlsx':
+                old.unlink(missing_ok=True)
+
+    logger.info(f'DB 기준 원장 생성: {document.title} ({version})')
+    return target
+
+
+def _copy_style(source, target):
+    for attr in STYLE_ATTRS:
+        setattr(target, attr, copy(getattr(source, attr)))
+
+
+def _build_workbook(document):
+    """양식의 헤더/서식에 DB 품목을 write_only로 기록"""
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.worksheet.cell_range import CellRange
+
+    template_wb = openpyxl.load_workbook(document.get_file_path())
+    try:
+        template = template_wb[document.sheet_name]
+        first_col, last_col = document._table_columns(template)
+        header_last_col = template.max_column
+        data_row = document.data_start_row
+
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(title=template.title)
+
+        # 열/행 서식은 행 기록 전에 설정해야 함 (write_only)
+        for key, dimension in template.column_dimensions.items():
+            ws.column_dimensions[key].width = dimension.width
+            ws.column_dimensions[key].hidden = dimension.hidden
+        for row_idx in range(1, data_row):
+            height = template.row_dimensions[row_idx].height
+            if height:
+                ws.row_dimensions[row_idx].height = height
+
+        for merged in template.merged_cells.ranges:
+            if merged.max_row < data_row:
+                ws.merged_cells.add(CellRange(merged.coord))
+
+        # 데이터 행 양식 (첫 데이터 행의 서식/병합)
+        prototypes = []
+        for col in range(1, last_col + 1):
+            source = template.cell(row=data_row, column=col)
+            prototype = WriteOnlyCell(ws)
+            if source.has_style:
+                _copy_style(source, prototype)
+            prototypes.append(prototype)
+        row_merges = [
+            (merged.min_col, merged.max_col) for merged in template.merged_cells.ranges
+            if merged.min_row == merged.max_row == data_row
+            and first_col <= merged.min_col and merged.max_col <= last_col
+        ]
+        data_height = template.row_dimensions[data_row].height
+
+        # 헤더 행
+        for row in template.iter_rows(min_row=1, max_row=data_row - 1, max_col=header_last_col):
+            cells = []
+            for source in row:
+                cell = WriteOnlyCell(ws, value=source.value)
+                if source.has_style:
+                    _copy_style(source, cell)
+                cells.append(cell)
+            ws.append(cells)
+    finally:
+        template_wb.close()
+
+    columns = {
+        document.barcode_column: 'barcode',
+        document.name_column: 'name',
+        **{col_idx: key for key, col_idx in document.extra_columns.items()},
+    }
+
+    # 데이터 행 (DB 커서 한 번 순회, 행 높이는 기록 직전에 설정)
+    for item in iter_db_items(document):
+        if data_height:
+            ws.row_dimensions[item['row']].height = data_height
+        for min_col, max_col in row_merges:
+            ws.merged_cells.add(CellRange(
+                min_col=min_col, min_row=item['row'], max_col=max_col, max_row=item['row']
+            ))
+
+        cells = []
+        for col, prototype in enumerate(prototypes, start=1):
+            cell = WriteOnlyCell(ws, value=item.get(columns[col]) if col in columns else None)
+            cell._style = copy(prototype._style)
+            cells.append(cell)
+        ws.append(cells)
+
+    return wb
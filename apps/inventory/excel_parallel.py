@@ -0,0 +1,101 @@
+"""
+여러 엑셀 원장 병렬 로딩
+openpyxl 파싱은 CPU 작업이므로 제한된 크기의 프로세스 풀에서 실행
+
+- 워커는 forkserver(Windows는 spawn)로 시작 - 스레드가 있는 웹 워커 프로세스를 fork하지 않음
+- 풀 크기는 EXCEL_PARSE_WORKERS (웹 워커 프로세스마다 풀이 하나씩 생기므로 작게 유지)
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+logger = logging.getLogger('hpe')
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """forkserver/spawn 방식 워커에서는 Django 설정 필요"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _parse_in_worker(config):
+    """워커 프로세스: 구조 정보로 문서 객체를 만들어 스트리밍 파싱"""
+    from .models import ExcelMasterDocument
+
+    document = ExcelMasterDocument(**config)
+    return list(document.iter_items(config['file_path']))
+
+
+def _start_method():
+    method = getattr(settings, 'EXCEL_PARSE_START_METHOD', 'forkserver')
+    if method not in multiprocessing.get_all_start_methods():
+        method = 'spawn'
+    return method
+
+
+def get_pool():
+    """프로세스 풀 (지연 생성, 프로세스당 하나)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            max_workers = min(getattr(settings, 'EXCEL_PARSE_WORKERS', 2) or 1, os.cpu_count() or 1)
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context(_start_method()),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def warm_ledgers(documents):
+    """
+    캐시에 없는 문서를 병렬 파싱해 파싱 캐시에 저장 (항목 목록은 반환하지 않음)
+    이후 document.stream_items()가 캐시에서 하나씩 반환
+
+    Returns:
+        int: 파싱한 문서 수
+    """
+    from .excel_cache import file_signature
+    from .excel_materialize import db_source_enabled
+
+    # DB 기준 모드: 파일 파싱 없음
+    if db_source_enabled():
+        return 0
+
+    pending = [document for document in documents if document.cached_items() is None]
+    # 하나뿐이면 프로세스 간 전송 비용이 더 큼 - stream_items()가 읽으면서 파싱
+    if len(pending) < 2:
+        return 0
+
+    signatures = {d.id: file_signature(d.get_file_path()) for d in pending}
+    try:
+        pool = get_pool()
+        futures = {d.id: pool.submit(_parse_in_worker, d.parser_config()) for d in pending}
+        parsed = {doc_id: future.result() for doc_id, future in futures.items()}
+    except Exception as e:
+        # 풀 장애 (BrokenProcessPool 등) 시 순차 처리
+        logger.warning(f'엑셀 병렬 로딩 실패, 순차 처리로 전환: {str(e)}')
+        _reset_pool()
+        parsed = {d.id: list(d.iter_items()) for d in pending}
+
+    for document in pending:
+        document.store_parsed_items(parsed.pop(document.id), signatures[document.id])
+    return len(pending)
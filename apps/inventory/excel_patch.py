@@ -0,0 +1,316 @@
+"""
+OOXML 셀 패치 엔진
+openpyxl 전체 파싱/재저장 없이 xl/worksheets/sheetN.xml 안의
+해당 <c> 요소만 다시 쓰고, 나머지 파트는 내용 그대로 복사
+
+- 수식 셀을 값으로 덮어쓰면 calcChain.xml 제거 (Excel이 다시 생성)
+- 수식이 있는 시트를 수정하면 workbook.xml의 calcPr에 fullCalcOnLoad="1" 설정
+- 행 추가 등 구조 변경이 필요한 경우 PatchNotSupported → 호출자가 openpyxl로 처리
+"""
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+NS_PKG_REL = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+CALC_CHAIN_TYPE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/calcChain'
+
+# XML 1.0에서 허용되지 않는 제어 문자
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class PatchNotSupported(Exception):
+    """셀 패치로 처리할 수 없는 변경 (구조 변경 등)"""
+
+
+def _cell_pattern(ref):
+    return re.compile(
+        r'<c\b[^>]*?\sr="' + ref + r'"[^>]*?(?:/>|>.*?</c>)',
+        re.S
+    )
+
+
+def _row_pattern(row):
+    return re.compile(
+        r'<row\b[^>]*?\sr="' + str(row) + r'"[^>]*?(?:/>|>(.*?)</row>)',
+        re.S
+    )
+
+
+_CELL_REF = re.compile(r'<c\b[^>]*?\sr="([A-Z]+)\d+"')
+_ATTR = re.compile(r'\s([\w:]+)="([^"]*)"')
+
+
+def _split_ref(ref):
+    match = re.match(r'^([A-Z]+)(\d+)$', ref)
+    return column_index_from_string(match.group(1)), int(match.group(2))
+
+
+class SheetPatcher:
+    """xlsx 패키지의 워크시트 셀 패치"""
+
+    def __init__(self, file_path, sheet_name=None):
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self._shared_strings = None
+
+        with zipfile.ZipFile(file_path) as zf:
+            self.sheet_path = self._resolve_sheet_path(zf)
+            self.sheet_xml = zf.read(self.sheet_path).decode('utf-8')
+            self.workbook_xml = zf.read('xl/workbook.xml').decode('utf-8')
+
+        # 접두어 네임스페이스 (<x:c> 등)를 사용하는 파일은 지원하지 않음
+        if '<sheetData' not in self.sheet_xml:
+            raise PatchNotSupported('지원하지 않는 워크시트 XML 형식입니다.')
+
+        self.formula_replaced = False
+
+    def _resolve_sheet_path(self, zf):
+        """시트명 → 워크시트 파트 경로"""
+        workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+        sheets = workbook.findall(f'{{{NS_MAIN}}}sheets/{{{NS_MAIN}}}sheet')
+        if not sheets:
+            raise PatchNotSupported('워크북에 시트가 없습니다.')
+
+        sheet = None
+        if self.sheet_name:
+            sheet = next((s for s in sheets if s.get('name') == self.sheet_name), None)
+        if sheet is None:
+            sheet = sheets[self._active_tab(workbook, len(sheets))]
+            self.sheet_name = sheet.get('name')
+
+        rel_id = sheet.get(f'{{{NS_REL}}}id')
+        rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        for rel in rels.findall(f'{{{NS_PKG_REL}}}Relationship'):
+            if rel.get('Id') == rel_id:
+                target = rel.get('Target')
+                if target.startswith('/'):
+                    return target.lstrip('/')
+                return posixpath.normpath(posixpath.join('xl', target))
+        raise PatchNotSupported(f'시트 파트를 찾을 수 없습니다: {self.sheet_name}')
+
+    @staticmethod
+    def _active_tab(workbook, sheet_count):
+        view = workbook.find(f'{{{NS_MAIN}}}bookViews/{{{NS_MAIN}}}workbookView')
+        try:
+            active = int(view.get('activeTab', 0)) if view is not None else 0
+        except ValueError:
+            active = 0
+        return active if 0 <= active < sheet_count else 0
+
+    # ------------------------------------------------------------------
+    # 셀 값 읽기 (이전 값 기록용)
+    # ------------------------------------------------------------------
+
+    def _load_shared_strings(self):
+        if self._shared_strings is None:
+            self._shared_strings = []
+            with zipfile.ZipFile(self.file_path) as zf:
+                if 'xl/sharedStrings.xml' in zf.namelist():
+                    root = ElementTree.fromstring(zf.read('xl/sharedStrings.xml'))
+                    for si in root.findall(f'{{{NS_MAIN}}}si'):
+                        self._shared_strings.append(
+                            ''.join(t.text or '' for t in si.iter(f'{{{NS_MAIN}}}t'))
+                        )
+        return self._shared_strings
+
+    def read_value(self, row, col):
+        """셀 값 읽기 (수식은 '=' 접두어 문자열)"""
+        ref = f'{get_column_letter(col)}{row}'
+        row_match = _row_pattern(row).search(self.sheet_xml)
+        if not row_match or not row_match.group(1):
+            return None
+        cell_match = _cell_pattern(ref).search(row_match.group(1))
+        if not cell_match:
+            return None
+
+        cell = ElementTree.fromstring(
+            cell_match.group(0).replace('<c ', f'<c xmlns="{NS_MAIN}" ', 1)
+        )
+        formula = cell.find(f'{{{NS_MAIN}}}f')
+        if formula is not None and formula.text:
+            return f'={formula.text}'
+
+        cell_type = cell.get('t', 'n')
+        if cell_type == 'inlineStr':
+            return ''.join(t.text or '' for t in cell.iter(f'{{{NS_MAIN}}}t'))
+        value = cell.find(f'{{{NS_MAIN}}}v')
+        if value is None or value.text is None:
+            return None
+        if cell_type == 's':
+            return self._load_shared_strings()[int(value.text)]
+        if cell_type == 'b':
+            return value.text == '1'
+        if cell_type in ('str', 'e'):
+            return value.text
+        number = float(value.text)
+        return int(number) if number.is_integer() else number
+
+    def has_formula(self, row, col):
+        """수식 셀 여부 (공유 수식의 참조 셀 포함)"""
+        ref = f'{get_column_letter(col)}{row}'
+        row_match = _row_pattern(row).search(self.sheet_xml)
+        if not row_match or not row_match.group(1):
+            return False
+        cell_match = _cell_pattern(ref).search(row_match.group(1))
+        return bool(cell_match) and '<f' in cell_match.group(0)
+
+    # ------------------------------------------------------------------
+    # 셀 쓰기
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cell_xml(ref, style, value):
+        """값으로 <c> 요소 생성 (스타일 유지)"""
+        attrs = f' r="{ref}"' + (f' s="{style}"' if style else '')
+
+        if value is None or value == '':
+            return f'<c{attrs}/>'
+        if isinstance(value, bool):
+            return f'<c{attrs} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, (int, Decimal)):
+            return f'<c{attrs}><v>{value}</v></c>'
+        if isinstance(value, float):
+            text = str(int(value)) if value.is_integer() else repr(value)
+            return f'<c{attrs}><v>{text}</v></c>'
+        if isinstance(value, (datetime, date, time)):
+            # 날짜는 표시 형식(numFmt) 처리가 필요하므로 openpyxl로 처리
+            raise PatchNotSupported('날짜 값은 셀 패치를 지원하지 않습니다.')
+
+        text = _ILLEGAL_XML_CHARS.sub('', str(value))
+        if text.startswith('='):
+            return f'<c{attrs}><f>{escape(text[1:])}</f></c>'
+        return f'<c{attrs} t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+    def set_value(self, row, col, value):
+        """셀 값 설정 (행이 없으면 PatchNotSupported)"""
+        ref = f'{get_column_letter(col)}{row}'
+
+        row_match = _row_pattern(row).search(self.sheet_xml)
+        if not row_match:
+            raise PatchNotSupported(f'{row}행이 없어 행 추가가 필요합니다.')
+
+        row_xml = row_match.group(0)
+        cell_match = _cell_pattern(ref).search(row_xml)
+
+        if cell_match:
+            old_cell = cell_match.group(0)
+            old_attrs = dict(_ATTR.findall(old_cell.split('>', 1)[0]))
+            if '<f' in old_cell:
+                if 'ref="' in old_cell and 't="shared"' in old_cell:
+                    # 공유 수식의 기준 셀은 다른 셀이 참조하므로 덮어쓸 수 없음
+                    raise PatchNotSupported(f'{ref}는 공유 수식의 기준 셀입니다.')
+                self.formula_replaced = True
+            new_cell = self._cell_xml(ref, old_attrs.get('s'), value)
+            new_row = row_xml[:cell_match.start()] + new_cell + row_xml[cell_match.end():]
+        else:
+            new_cell = self._cell_xml(ref, None, value)
+            new_row = self._insert_cell(row_xml, col, new_cell)
+
+        self.sheet_xml = (
+            self.sheet_xml[:row_match.start()] + new_row + self.sheet_xml[row_match.end():]
+        )
+
+    @staticmethod
+    def _insert_cell(row_xml, col, new_cell):
+        """행에 없는 셀을 열 순서에 맞춰 삽입"""
+        if row_xml.rstrip().endswith('/>') and '</row>' not in row_xml:
+            # <row r="5"/> → <row r="5">...</row>
+            open_tag = re.sub(r'\s*/>\s*$', '>', row_xml)
+            open_tag = re.sub(r'\sspans="[^"]*"', '', open_tag)
+            return f'{open_tag}{new_cell}</row>'
+
+        open_end = row_xml.index('>') + 1
+        open_tag = re.sub(r'\sspans="[^"]*"', '', row_xml[:open_end])
+        body = row_xml[open_end:-len('</row>')]
+
+        insert_at = len(body)
+        for match in _CELL_REF.finditer(body):
+            if column_index_from_string(match.group(1)) > col:
+                insert_at = match.start()
+                break
+        return open_tag + body[:insert_at] + new_cell + body[insert_at:] + '</row>'
+
+    def _patched_workbook_xml(self):
+        """수식 재계산 설정 (Excel에서 열 때 전체 재계산)"""
+        xml = self.workbook_xml
+        calc_pr = re.search(r'<calcPr\b[^>]*?/?>', xml)
+        if calc_pr:
+            tag = calc_pr.group(0)
+            if 'fullCalcOnLoad="1"' in tag:
+                return xml
+            tag = re.sub(r'\sfullCalcOnLoad="[^"]*"', '', tag)
+            tag = re.sub(r'\s*(/?>)$', r' fullCalcOnLoad="1"\1', tag)
+            return xml[:calc_pr.start()] + tag + xml[calc_pr.end():]
+
+        # calcPr은 definedNames 뒤, 없으면 sheets 뒤에 위치해야 함
+        for closing in ('</definedNames>', '</externalReferences>', '</functionGroups>', '</sheets>'):
+            idx = xml.rfind(closing)
+            if idx != -1:
+                idx += len(closing)
+                return xml[:idx] + '<calcPr fullCalcOnLoad="1"/>' + xml[idx:]
+        raise PatchNotSupported('workbook.xml 구조를 해석할 수 없습니다.')
+
+    def write(self, fileobj):
+        """패치된 패키지 기록 (변경되지 않은 파트는 내용 그대로 복사)"""
+        replacements = {self.sheet_path: self.sheet_xml.encode('utf-8')}
+        if '<f>' in self.sheet_xml or '<f ' in self.sheet_xml:
+            replacements['xl/workbook.xml'] = self._patched_workbook_xml().encode('utf-8')
+
+        drop = set()
+        with zipfile.ZipFile(self.file_path) as zin:
+            names = zin.namelist()
+            if self.formula_replaced and 'xl/calcChain.xml' in names:
+                drop.add('xl/calcChain.xml')
+                replacements['[Content_Types].xml'] = re.sub(
+                    r'<Override\b[^>]*PartName="/xl/calcChain.xml"[^>]*/>', '',
+                    zin.read('[Content_Types].xml').decode('utf-8')
+                ).encode('utf-8')
+                replacements['xl/_rels/workbook.xml.rels'] = re.sub(
+                    r'<Relationship\b[^>]*Type="' + re.escape(CALC_CHAIN_TYPE) + r'"[^>]*/>', '',
+                    zin.read('xl/_rels/workbook.xml.rels').decode('utf-8')
+                ).encode('utf-8')
+
+            with zipfile.ZipFile(fileobj, 'w') as zout:
+                for info in zin.infolist():
+                    if info.filename in drop:
+                        continue
+                    data = replacements.get(info.filename)
+                    if data is None:
+                        data = zin.read(info.filename)
+                    zout.writestr(info, data, compress_type=info.compress_type)
+
+
+def patch_cells(file_path, sheet_name, cells, document_id=None, keep_formulas=False):
+    """
+    셀 값 패치 후 원자적으로 저장
+
+    Args:
+        file_path: xlsx 경로
+        sheet_name: 시트명 (없으면 활성 시트)
+        cells: {(row, col): value}
+        keep_formulas: True면 수식 셀은 덮어쓰지 않음 (계산 열)
+
+    Returns:
+        dict: {(row, col): 이전 값}
+    """
+    from .excel_lock import atomic_write
+
+    patcher = SheetPatcher(file_path, sheet_name)
+    previous = {}
+    for (row, col), value in cells.items():
+        previous[(row, col)] = patcher.read_value(row, col)
+        if keep_formulas and patcher.has_formula(row, col):
+            continue
+        patcher.set_value(row, col, value)
+
+    atomic_write(file_path, patcher.write, document_id)
+    return previous
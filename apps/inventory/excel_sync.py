@@ -0,0 +1,252 @@
+"""
+엑셀 원장 동기화 (Write-behind)
+재고 거래와 같은 트랜잭션에서 대기열에 기록하고,
+Celery 워커가 문서별로 모아서 한 번의 로드/저장으로 반영
+"""
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExcelMasterDocument, ExcelSyncOutbox, ExcelUpdateLog, InventoryItem
+
+logger = logging.getLogger('hpe')
+
+
+def enqueue_stock_sync(item, operation_type, quantity, user, stock_transaction=None):
+    """
+    재고 거래에 대한 엑셀 동기화 대기열 등록
+    호출자의 DB 트랜잭션 안에서 호출해야 함
+    """
+    from .excel_materialize import db_source_enabled
+
+    barcode = item.barcode
+    if not barcode or operation_type not in ('in', 'out'):
+        return None  # 바코드 없거나 조정/이동은 스킵
+    if db_source_enabled():
+        return None  # DB 기준 모드: 원장은 조회 시 생성
+
+    document = ExcelMasterDocument.for_barcode(barcode)
+    if not document or document.doc_type not in ExcelMasterDocument.STOCK_DOC_TYPES:
+        return None  # PRT/SUP만 입고/출고 처리
+
+    entry = ExcelSyncOutbox.objects.create(
+        document=document,
+        stock_transaction=stock_transaction,
+        barcode=barcode,
+        operation=operation_type,
+        quantity=quantity,
+        created_by=user,
+    )
+
+    document_id = document.id
+    transaction.on_commit(lambda: schedule_document_sync(document_id))
+    return entry
+
+
+def enqueue_stock_sync_bulk(entries, user):
+    """
+    여러 재고 거래를 한 번에 대기열 등록 (bulk_create, 문서별 동기화 작업 1회 예약)
+    entries: [(item, operation_type, quantity, stock_transaction), ...]
+    호출자의 DB 트랜잭션 안에서 호출해야 함
+
+    Returns:
+        list: 등록된 ExcelSyncOutbox
+    """
+    from .excel_materialize import db_source_enabled
+
+    if db_source_enabled():
+        return []
+
+    documents = {}
+    outbox = []
+    for item, operation_type, quantity, stock_transaction in entries:
+        if not item.barcode or operation_type not in ('in', 'out'):
+            continue
+        doc_type = ExcelMasterDocument.doc_type_for_barcode(item.barcode)
+        if doc_type not in ExcelMasterDocument.STOCK_DOC_TYPES:
+            continue
+        if doc_type not in documents:
+            documents[doc_type] = ExcelMasterDocument.objects.filter(doc_type=doc_type).first()
+        document = documents[doc_type]
+        if not document:
+            continue
+        outbox.append(ExcelSyncOutbox(
+            document=document,
+            stock_transaction=stock_transaction,
+            barcode=item.barcode,
+            operation=operation_type,
+            quantity=quantity,
+            created_by=user,
+        ))
+
+    ExcelSyncOutbox.objects.bulk_create(outbox)
+    for document_id in {entry.document_id for entry in outbox}:
+        transaction.on_commit(lambda document_id=document_id: schedule_document_sync(document_id))
+    return outbox
+
+
+def schedule_document_sync(document_id):
+    """문서 동기화 작업 예약 (브로커 장애 시 주기 작업이 처리)"""
+    from .tasks import sync_excel_outbox
+
+    try:
+        sync_excel_outbox.delay(str(document_id))
+    except Exception as e:
+        logger.warning(f'엑셀 동기화 작업 예약 실패 ({document_id}): {str(e)}')
+
+
+def _coalesce(entries):
+    """바코드별로 대기 항목 묶기 (등록 순서 유지)"""
+    grouped = OrderedDict()
+    for entry in entries:
+        grouped.setdefault(entry.barcode, []).append(entry)
+    return grouped
+
+
+def drain_document_outbox(document):
+    """
+    문서의 대기 항목을 한 번의 로드/저장으로 엑셀에 반영
+
+    새 행 추가가 불가능한 항목(표 아래 행에 다른 내용 등)은 그 항목만 실패 처리하고
+    나머지 셀 패치는 그대로 반영 (한 항목 때문에 같은 원장의 다른 입출고가 재시도/실패되지 않도록)
+
+    Returns:
+        dict: 처리 결과 (applied, skipped, failed, barcodes)
+    """
+    applied, skipped, failed, logs = [], [], [], []
+
+    # 잠금 안에서 대기 항목을 읽어야 동시 워커가 같은 항목을 중복 반영하지 않음
+    with document.lock():
+        entries = list(
+            ExcelSyncOutbox.objects.filter(
+                document=document,
+                status=ExcelSyncOutbox.Status.PENDING
+            ).order_by('id')
+        )
+        if not entries:
+            return {'applied': 0, 'skipped': 0, 'failed': 0, 'barcodes': 0}
+
+        # 현재 엑셀 값 (캐시된 파싱 결과)
+        current_values = {item['barcode']: item for item in document.read_all_items()}
+        document.ensure_row_index()
+        now = timezone.now()
+        cells = {}
+        new_rows = []
+        grouped = _coalesce(entries)
+
+        # 엑셀에 없는 바코드는 품목이 등록되어 있으면 새 행으로 추가
+        missing = [barcode for barcode in grouped if barcode not in current_values]
+        names = dict(
+            InventoryItem.objects.filter(barcode__in=missing).values_list('barcode', 'name')
+        ) if missing else {}
+
+        for barcode, barcode_entries in grouped.items():
+            existing_item = current_values.get(barcode)
+            row_idx = document.find_item_row(barcode) if existing_item else None
+            if not existing_item and barcode not in names:
+                skipped.extend(barcode_entries)  # 엑셀/품목 모두 없으면 스킵
+                continue
+            if existing_item and row_idx is None:
+                skipped.extend(barcode_entries)
+                continue
+
+            received = float(existing_item.get('received', 0) or 0) if existing_item else 0.0
+            issued = float(existing_item.get('issued', 0) or 0) if existing_item else 0.0
+            # 현재고는 원장의 계산 값 기준 (=H-I-K 처럼 입고-출고가 아닐 수 있음)
+            current = float(existing_item.get('current', received - issued) or 0) if existing_item else 0.0
+
+            # 같은 바코드의 연속 스캔은 하나의 셀 쓰기로 합침
+            for entry in barcode_entries:
+                previous = {
+                    'received': received,
+                    'issued': issued,
+                    'current': current
+                }
+                if entry.operation == 'in':
+                    received += float(entry.quantity)
+                    current += float(entry.quantity)
+                else:
+                    issued += float(entry.quantity)
+                    current -= float(entry.quantity)
+
+                logs.append(ExcelUpdateLog(
+                    document=document,
+                    barcode=barcode,
+                    action=f'stock_{entry.operation}',
+                    updates={
+                        'received': received,
+                        'issued': issued,
+                        'current': current
+                    },
+                    previous_values=previous,
+                    created_by=entry.created_by,
+                ))
+
+            if not existing_item:
+                new_rows.append({
+                    'barcode': barcode, 'name': names[barcode],
+                    'received': received, 'issued': issued,
+                    'entries': barcode_entries,
+                })
+                continue
+            applied.extend(barcode_entries)
+
+            updates = {'received': received, 'issued': issued, 'current': current}
+            for key, value in updates.items():
+                if key in document.extra_columns:
+                    cells[(row_idx, document.extra_columns[key])] = value
+
+        # 새 항목은 한 번의 행 추가 저장, 기존 항목은 한 번의 셀 패치
+        append_error = None
+        if new_rows:
+            try:
+                document.append_items(new_rows)
+            except ValueError as e:
+                # 행 추가는 한 번에 저장되므로 새 항목 전체가 실패 (기존 항목 셀 패치는 계속)
+                append_error = str(e)
+                logger.warning(f'엑셀 동기화 새 행 추가 실패 ({document.title}): {append_error}')
+            for row in new_rows:
+                (failed if append_error else applied).extend(row['entries'])
+        if append_error:
+            failed_barcodes = {row['barcode'] for row in new_rows}
+            logs = [log for log in logs if log.barcode not in failed_barcodes]
+        if cells:
+            document.write_cells(cells, keep_formulas=True)
+            document._mark_index_current()
+
+        with transaction.atomic():
+            ExcelUpdateLog.objects.bulk_create(logs)
+            ExcelSyncOutbox.objects.filter(id__in=[e.id for e in applied]).update(
+                status=ExcelSyncOutbox.Status.DONE, processed_at=now
+            )
+            ExcelSyncOutbox.objects.filter(id__in=[e.id for e in skipped]).update(
+                status=ExcelSyncOutbox.Status.SKIPPED, processed_at=now
+            )
+            ExcelSyncOutbox.objects.filter(id__in=[e.id for e in failed]).update(
+                status=ExcelSyncOutbox.Status.FAILED, processed_at=now,
+                attempts=F('attempts') + 1, last_error=(append_error or '')[:2000]
+            )
+
+    return {
+        'applied': len(applied),
+        'skipped': len(skipped),
+        'failed': len(failed),
+        'barcodes': len({e.barcode for e in applied}),
+    }
+
+
+def record_outbox_failure(document, error):
+    """동기화 실패 기록 (최대 시도 횟수 초과 시 실패 처리)"""
+    max_attempts = getattr(settings, 'EXCEL_SYNC_MAX_ATTEMPTS', 5)
+    pending = ExcelSyncOutbox.objects.filter(
+        document=document,
+        status=ExcelSyncOutbox.Status.PENDING
+    )
+    pending.update(attempts=F('attempts') + 1, last_error=str(error)[:2000])
+    pending.filter(attempts__gte=max_attempts).update(
+        status=ExcelSyncOutbox.Status.FAILED, processed_at=timezone.now()
+    )
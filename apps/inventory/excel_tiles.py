@@ -0,0 +1,175 @@
+"""
+엑셀 시트 타일 렌더링 (서버 측)
+브라우저에서 xlsx 전체를 내려받아 파싱하지 않도록
+시트를 고정 크기 타일(행 x 열)의 JSON으로 잘라 제공
+
+- 타일/시트 정보는 파일 내용 해시 기준으로 캐시 (파일이 바뀌면 키가 바뀜)
+- 셀은 값이 있는 것만 [행, 열, 값] 형태 (1-based)
+"""
+import logging
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.core.cache import cache
+from openpyxl.utils import get_column_letter
+
+from .excel_cache import file_content_hash
+
+logger = logging.getLogger('hpe')
+
+DEFAULT_COLUMN_WIDTH = 8.43  # Excel 기본 열 너비 (문자 수)
+
+
+def tile_size():
+    return (
+        getattr(settings, 'EXCEL_TILE_ROWS', 100),
+        getattr(settings, 'EXCEL_TILE_COLS', 32),
+    )
+
+
+def _display_value(value):
+    """JSON으로 보낼 표시 값"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d') if value.time() == time.min else value.strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else round(value, 10)
+    if isinstance(value, (int, str, bool)):
+        return value
+    return str(value)
+
+
+class SheetTiles:
+    """문서 시트의 타일 조회 (내용 해시 단위 캐시)"""
+
+    def __init__(self, document, sheet_name=None):
+        self.document = document
+        self.file_path = document.ledger_path()
+        self.content_hash = file_content_hash(self.file_path)
+        self.sheet_name = sheet_name or document.sheet_name
+        self.tile_rows, self.tile_cols = tile_size()
+
+    @property
+    def version(self):
+        return self.content_hash[:16] if self.content_hash else ''
+
+    def _key(self, *parts):
+        return ':'.join(['excel-tile', str(self.document.id), self.version, self.sheet_name, *map(str, parts)])
+
+    def meta(self):
+        """시트 정보 (시트 목록, 범위, 열 너비, 병합 영역)"""
+        meta = cache.get(self._key('meta'))
+        if meta is None:
+            meta = self._build()
+        return meta
+
+    def tile(self, tile_row, tile_col):
+        """타일 하나 (캐시에 없으면 시트 전체 타일 생성)"""
+        tile = cache.get(self._key(tile_row, tile_col))
+        if tile is None:
+            meta = cache.get(self._key('meta'))
+            if meta is not None and [tile_row, tile_col] not in meta['tiles']:
+                return []  # 빈 타일은 저장하지 않음
+            self._build()
+            tile = cache.get(self._key(tile_row, tile_col)) or []
+        return tile
+
+    def window(self, row, rows, col, cols):
+        """
+        요청 영역을 덮는 타일 모음
+
+        Returns:
+            dict: meta, 영역의 열 너비/병합, tiles [{r, c, cells}]
+        """
+        meta = self.meta()
+        row_end = min(row + rows - 1, meta['max_row'])
+        col_end = min(col + cols - 1, meta['max_col'])
+
+        tile_keys = [
+            (tr, tc)
+            for tr in range((row - 1) // self.tile_rows, (row_end - 1) // self.tile_rows + 1)
+            for tc in range((col - 1) // self.tile_cols, (col_end - 1) // self.tile_cols + 1)
+        ] if row_end >= row and col_end >= col else []
+
+        cached = cache.get_many([self._key(tr, tc) for tr, tc in tile_keys])
+        tiles = []
+        for tr, tc in tile_keys:
+            cells = cached.get(self._key(tr, tc))
+            if cells is None:
+                cells = self.tile(tr, tc)
+            tiles.append({'r': tr, 'c': tc, 'cells': cells})
+
+        return {
+            'sheet': self.sheet_name,
+            'sheets': meta['sheets'],
+            'version': self.version,
+            'max_row': meta['max_row'],
+            'max_col': meta['max_col'],
+            'tile_rows': self.tile_rows,
+            'tile_cols': self.tile_cols,
+            'default_width': meta['default_width'],
+            'window': {'row': row, 'col': col, 'row_end': row_end, 'col_end': col_end},
+            'column_widths': {
+                col_idx: width for col_idx, width in meta['column_widths'].items()
+                if col <= int(col_idx) <= col_end
+            },
+            'merges': [
+                merge for merge in meta['merges']
+                if merge[0] <= row_end and merge[2] >= row and merge[1] <= col_end and merge[3] >= col
+            ],
+            'tiles': tiles,
+        }
+
+    def _build(self):
+        """시트 한 번 로드로 전체 타일과 시트 정보 생성 후 캐시"""
+        import openpyxl
+
+        wb = openpyxl.load_workbook(self.file_path, data_only=True)
+        try:
+            if self.sheet_name not in wb.sheetnames:
+                self.sheet_name = wb.active.title
+            ws = wb[self.sheet_name]
+
+            tiles = {}
+            for row in ws.iter_rows():
+                for cell in row:
+                    if cell.value is None or cell.value == '':
+                        continue
+                    key = ((cell.row - 1) // self.tile_rows, (cell.column - 1) // self.tile_cols)
+                    tiles.setdefault(key, []).append(
+                        [cell.row, cell.column, _display_value(cell.value)]
+                    )
+
+            column_widths = {}
+            for dimension in ws.column_dimensions.values():
+                if dimension.hidden:
+                    width = 0
+                elif dimension.customWidth or dimension.width:
+                    width = dimension.width
+                else:
+                    continue
+                for col_idx in range(dimension.min or 1, (dimension.max or dimension.min or 1) + 1):
+                    column_widths[str(col_idx)] = round(width, 2)
+
+            meta = {
+                'sheets': wb.sheetnames,
+                'max_row': ws.max_row,
+                'max_col': ws.max_column,
+                'default_width': DEFAULT_COLUMN_WIDTH,
+                'column_widths': column_widths,
+                'merges': [
+                    [r.min_row, r.min_col, r.max_row, r.max_col] for r in ws.merged_cells.ranges
+                ],
+                'dimension': f'A1:{get_column_letter(ws.max_column)}{ws.max_row}',
+                'tiles': sorted([tr, tc] for tr, tc in tiles),
+            }
+        finally:
+            wb.close()
+
+        timeout = getattr(settings, 'EXCEL_TILE_CACHE_TIMEOUT', 86400)
+        entries = {self._key(tr, tc): cells for (tr, tc), cells in tiles.items()}
+        entries[self._key('meta')] = meta
+        cache.set_many(entries, timeout)
+        logger.debug(f'엑셀 타일 생성: {self.document.title}/{self.sheet_name} ({len(tiles)}개)')
+        return meta
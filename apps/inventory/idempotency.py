@@ -0,0 +1,192 @@
+"""
+재고 요청 멱등성 (Idempotency-Key) / 중복 스캔 억제
+스캐너 재전송/네트워크 재시도로 같은 요청이 다시 와도 거래를 한 번만 처리하고
+처음 응답을 그대로 돌려줌
+
+- 키: Idempotency-Key 헤더 또는 본문의 idempotency_key (사용자/범위별)
+- 저장: Django 캐시 (운영은 Redis 공유), IDEMPOTENCY_KEY_TTL 동안 유지
+- 처리 중인 같은 키는 409, 같은 키에 다른 본문이면 422
+- 중복 스캔: 같은 장치(scan_device)가 같은 바코드+작업을 SCAN_DEBOUNCE_SECONDS 안에
+  다시 보내면 거래 없이 첫 스캔 응답 반환 (키 없이 보내는 스캐너용)
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+PENDING = 'pending'
+PENDING_TIMEOUT = 60  # 처리 중 표시 (요청이 비정상 종료되면 이후 재시도 허용)
+
+
+def idempotency_key(request):
+    """요청의 멱등성 키 (없으면 None)"""
+    key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    if not key:
+        return None
+    return str(key).strip()[:100] or None
+
+
+def _fingerprint(data):
+    payload = {k: v for k, v in dict(data).items() if k != 'idempotency_key'}
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:16]
+
+
+def _in_progress():
+    return Response(
+        {'error': '같은 요청을 처리 중입니다. 잠시 후 다시 시도해주세요.'},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def _cacheable(response):
+    """저장할 응답인지 (처리 중 409/5xx는 저장하지 않고 재시도 허용)"""
+    return response.status_code < 500 and response.status_code != status.HTTP_409_CONFLICT
+
+
+def run_guarded(handler, *guards):
+    """
+    guard들(IdempotentRequest, ScanDebounce)을 순서대로 시작하고 handler() 실행
+    앞선 guard가 응답을 돌려주면 handler는 실행하지 않음 (그 응답도 이전 guard에 저장)
+    """
+    started = []
+    try:
+        for guard in guards:
+            response = guard.begin()
+            if response is not None:
+                break
+            started.append(guard)
+        else:
+            response = handler()
+    except Exception:
+        for guard in started:
+            guard.abort()
+        raise
+
+    for guard in reversed(started):
+        response = guard.finish(response)
+    return response
+
+
+class IdempotentRequest:
+    """
+    사용 예:
+        return run_guarded(
+            lambda: ...처리...,
+            IdempotentRequest(request, 'scan-commit'),
+            ScanDebounce('scan-commit', scan_device, barcode, operation),
+        )
+    """
+
+    def __init__(self, request, scope):
+        self.key = idempotency_key(request)
+        self.fingerprint = _fingerprint(request.data) if self.key else None
+        user_id = getattr(request.user, 'pk', None)
+        digest = hashlib.sha256(f'{scope}|{user_id}|{self.key}'.encode('utf-8')).hexdigest()
+        self.cache_key = f'idempotency:{digest}'
+        self.timeout = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+    def begin(self):
+        """
+        처리 시작 (키가 없으면 항상 None)
+
+        Returns:
+            Response: 이미 처리된 요청이면 처음 응답, 처리 중이면 409, 아니면 None
+        """
+        if not self.key:
+            return None
+
+        if cache.add(self.cache_key, PENDING, PENDING_TIMEOUT):
+            return None
+
+        stored = cache.get(self.cache_key)
+        if stored is None:
+            # 방금 만료됨 - 다시 선점 시도
+            return None if cache.add(self.cache_key, PENDING, PENDING_TIMEOUT) else _in_progress()
+        if stored == PENDING:
+            return _in_progress()
+        if stored['fingerprint'] != self.fingerprint:
+            return Response(
+                {'error': '같은 Idempotency-Key로 다른 요청을 보낼 수 없습니다.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+
+        response = Response(stored['data'], status=stored['status'])
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def finish(self, response):
+        """
+        응답 저장 후 반환
+        5xx/409 응답은 저장하지 않고 키를 풀어 재시도 허용
+        """
+        if not self.key:
+            return response
+
+        if not _cacheable(response):
+            cache.delete(self.cache_key)
+        else:
+            cache.set(self.cache_key, {
+                'fingerprint': self.fingerprint,
+                'status': response.status_code,
+                'data': response.data,
+            }, self.timeout)
+        return response
+
+    def abort(self):
+        """예외로 처리가 중단된 경우 키 해제"""
+        if self.key:
+            cache.delete(self.cache_key)
+
+
+class ScanDebounce:
+    """
+    장치별 중복 스캔 억제
+    scan_device가 없거나 SCAN_DEBOUNCE_SECONDS가 0이면 아무것도 하지 않음
+    """
+
+    def __init__(self, scope, scan_device, target, operation, window=None):
+        if window is None:
+            window = getattr(settings, 'SCAN_DEBOUNCE_SECONDS', 0)
+        self.window = window
+        self.active = bool(scan_device and target and window and window > 0)
+        digest = hashlib.sha256(f'{scope}|{scan_device}|{target}|{operation}'.encode('utf-8')).hexdigest()
+        self.cache_key = f'scan-debounce:{digest}'
+
+    def begin(self):
+        """
+        Returns:
+            Response: 창 안의 중복 스캔이면 첫 스캔 응답(debounced), 첫 스캔 처리 중이면 409, 아니면 None
+        """
+        if not self.active or cache.add(self.cache_key, PENDING, self.window):
+            return None
+
+        stored = cache.get(self.cache_key)
+        if stored is None:
+            return None if cache.add(self.cache_key, PENDING, self.window) else _in_progress()
+        if stored == PENDING:
+            return _in_progress()
+
+        data = {**stored['data'], 'debounced': True} if isinstance(stored['data'], dict) else stored['data']
+        response = Response(data, status=stored['status'])
+        response['Scan-Debounced'] = 'true'
+        return response
+
+    def finish(self, response):
+        """성공한 스캔만 창 동안 보관 (실패한 스캔은 바로 다시 시도 가능)"""
+        if not self.active:
+            return response
+
+        if status.is_success(response.status_code):
+            cache.set(self.cache_key, {'status': response.status_code, 'data': response.data}, self.window)
+        else:
+            cache.delete(self.cache_key)
+        return response
+
+    def abort(self):
+        if self.active:
+            cache.delete(self.cache_key)
@@ -0,0 +1,373 @@
+"""
+라벨 용지 PDF (인쇄용)
+batch_generate_labels의 base64 PNG 목록 대신 A4 라벨 용지 격자에 맞춘 PDF 한 개를 스트리밍
+
+- 바코드(Code128)/QR은 reportlab 벡터 그래픽으로 그림 (래스터 이미지 없음 → 인쇄 해상도 무관)
+- 페이지 묶음(LABEL_SHEET_PAGES_PER_TASK)을 프로세스 풀에서 렌더링 (excel_parallel 풀 공유)
+- 렌더링된 묶음 순서대로 페이지 객체를 바로 내보내고 페이지 트리/xref는 마지막에 기록
+"""
+import io
+import logging
+import os
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger('hpe')
+
+PAGE_WIDTH_MM = 210.0  # A4
+PAGE_HEIGHT_MM = 297.0
+
+# 라벨 용지 규격 (mm): 라벨 크기, 열/행, 위/왼쪽 여백, 라벨 간 간격
+LABEL_STOCKS = {
+    'L7160': {'label_width': 63.5, 'label_height': 38.1, 'columns': 3, 'rows': 7,
+              'margin_top': 15.15, 'margin_left': 7.25, 'gap_x': 2.5, 'gap_y': 0},
+    'L7163': {'label_width': 99.1, 'label_height': 38.1, 'columns': 2, 'rows': 7,
+              'margin_top': 15.15, 'margin_left': 4.65, 'gap_x': 2.5, 'gap_y': 0},
+    'L7651': {'label_width': 38.1, 'label_height': 21.2, 'columns': 5, 'rows': 13,
+              'margin_top': 10.7, 'margin_left': 4.75, 'gap_x': 2.5, 'gap_y': 0},
+    'A4-3x8': {'label_width': 70.0, 'label_height': 37.0, 'columns': 3, 'rows': 8,
+               'margin_top': 0.5, 'margin_left': 0, 'gap_x': 0, 'gap_y': 0},
+}
+DEFAULT_STOCK = 'L7160'
+LABEL_FIELDS = ('label_width', 'label_height', 'columns', 'rows', 'margin_top', 'margin_left', 'gap_x', 'gap_y')
+
+FONT_PATHS = [
+    '/usr/share/fonts/truetype/nanum/NanumGothic.ttf',  # Linux - Nanum Gothic
+    '/usr/share/fonts/truetype/nanum/NanumBarunGothic.ttf',
+    '/System/Library/Fonts/Supplemental/AppleGothic.ttf',  # macOS
+    'C:/Windows/Fonts/malgun.ttf',  # Windows - 맑은 고딕
+]
+
+
+class LabelStock:
+    """라벨 용지 격자 (mm 단위)"""
+
+    def __init__(self, label_width, label_height, columns, rows,
+                 margin_top=0, margin_left=0, gap_x=0, gap_y=0):
+        self.label_width = float(label_width)
+        self.label_height = float(label_height)
+        self.columns = int(columns)
+        self.rows = int(rows)
+        self.margin_top = float(margin_top)
+        self.margin_left = float(margin_left)
+        self.gap_x = float(gap_x)
+        self.gap_y = float(gap_y)
+
+        if self.label_width < 15 or self.label_height < 10:
+            raise ValueError('라벨 크기는 최소 15mm x 10mm 이상이어야 합니다.')
+        if self.columns < 1 or self.rows < 1:
+            raise ValueError('열/행 수는 1 이상이어야 합니다.')
+        if min(self.margin_top, self.margin_left, self.gap_x, self.gap_y) < 0:
+            raise ValueError('여백/간격은 음수일 수 없습니다.')
+        width = self.margin_left + self.columns * self.label_width + (self.columns - 1) * self.gap_x
+        height = self.margin_top + self.rows * self.label_height + (self.rows - 1) * self.gap_y
+        if width > PAGE_WIDTH_MM + 0.01 or height > PAGE_HEIGHT_MM + 0.01:
+            raise ValueError(f'라벨 격자({width:.1f} x {height:.1f}mm)가 A4 용지를 벗어납니다.')
+
+    @classmethod
+    def from_params(cls, stock=DEFAULT_STOCK, **overrides):
+        """용지 규격 이름 + 개별 값 덮어쓰기 ('custom'이면 모든 값 필요)"""
+        overrides = {key: value for key, value in overrides.items() if value is not None}
+        if stock == 'custom':
+            missing = [key for key in ('label_width', 'label_height', 'columns', 'rows') if key not in overrides]
+            if missing:
+                raise ValueError(f"사용자 정의 용지는 {', '.join(missing)} 값이 필요합니다.")
+            return cls(**overrides)
+        if stock not in LABEL_STOCKS:
+            raise ValueError(f'알 수 없는 라벨 용지: {stock}')
+        return cls(**{**LABEL_STOCKS[stock], **overrides})
+
+    @property
+    def per_page(self):
+        return self.columns * self.rows
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in LABEL_FIELDS}
+
+
+_font_name = None
+
+
+def _font():
+    """한글 폰트 (TTF가 있으면 임베딩, 없으면 reportlab 내장 CID 폰트)"""
+    global _font_name
+    if _font_name is None:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        for font_path in FONT_PATHS:
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont('LabelKorean', font_path))
+                    _font_name = 'LabelKorean'
+                    break
+                except Exception as e:
+                    logger.warning(f'라벨 폰트 로드 실패 ({font_path}): {str(e)}')
+        if _font_name is None:
+            pdfmetrics.registerFont(UnicodeCIDFont('HYGothic-Medium'))
+            _font_name = 'HYGothic-Medium'
+    return _font_name
+
+
+def _fit(text, font, size, width):
+    """폭에 맞게 자르기"""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    text = str(text or '')
+    if stringWidth(text, font, size) <= width:
+        return text
+    while text and stringWidth(text + '…', font, size) > width:
+        text = text[:-1]
+    return text + '…' if text else ''
+
+
+def _draw_barcode(canvas, value, x, y, width, height):
+    """Code128 벡터 바코드 + 바코드 값 (폭에 맞춰 막대 폭 조정)"""
+    from reportlab.graphics.barcode.code128 import Code128
+    from reportlab.lib.units import mm
+
+    text_size = 5
+    modules = Code128(value, barWidth=1, quiet=False, humanReadable=False).width
+    bar_width = min(width / modules, 0.5 * mm)
+    bars = Code128(value, barWidth=bar_width, barHeight=height - text_size - 1, quiet=False, humanReadable=False)
+    left = x + (width - bars.width) / 2
+    bars.drawOn(canvas, left, y + text_size + 1)
+    canvas.setFont('Helvetica', text_size)
+    canvas.drawCentredString(x + width / 2, y, _fit(value, 'Helvetica', text_size, width))
+
+
+def _draw_qr(canvas, data, x, y, size):
+    """QR 코드 (벡터: 행별로 이어진 모듈을 사각형 하나로 묶어 경로 1개로 채움)"""
+    import qrcode
+
+    from .qr_payload import qr_options
+
+    version, error_correction = qr_options(data)
+    qr = qrcode.QRCode(
+        version=version,
+        error_correction=getattr(qrcode.constants, f'ERROR_CORRECT_{error_correction}'),
+        border=1,
+    )
+    qr.add_data(data)
+    qr.make(fit=False)
+    matrix = qr.get_matrix()
+    module = size / len(matrix)
+
+    path = canvas.beginPath()
+    for row, cells in enumerate(matrix):
+        top = y + size - (row + 1) * module
+        column = 0
+        while column < len(cells):
+            if not cells[column]:
+                column += 1
+                continue
+            start = column
+            while column < len(cells) and cells[column]:
+                column += 1
+            path.rect(x + start * module, top, (column - start) * module, module)
+    canvas.setFillColorRGB(0, 0, 0)
+    canvas.drawPath(path, stroke=0, fill=1)
+
+
+def _draw_label(canvas, label, label_type, x, y, width, height):
+    """라벨 1장: 품목코드/품명/규격·단위 + 바코드 및/또는 QR"""
+    from reportlab.lib.units import mm
+
+    pad = 2 * mm
+    ix, iy = x + pad, y + pad
+    iw, ih = width - 2 * pad, height - 2 * pad
+    font = _font()
+    size = max(5, min(9, ih / 6))
+
+    text_width = iw
+    if label_type in ('qr', 'both'):
+        qr_size = min(ih, iw * 0.45)
+        _draw_qr(canvas, label['qr_data'], ix + iw - qr_size, iy + (ih - qr_size) / 2, qr_size)
+        text_width = iw - qr_size - 1 * mm
+
+    bottom = iy
+    if label_type in ('barcode', 'both'):
+        bar_height = max(ih * 0.45, 8 * mm) if label_type == 'barcode' else ih * 0.4
+        _draw_barcode(canvas, label['barcode'], ix, iy, text_width, bar_height)
+        bottom = iy + bar_height + 0.5 * mm
+
+    spec = ' / '.join(part for part in (label['specification'], label['unit']) if part)
+    top = iy + ih
+    for text, text_size in ((label['item_code'], size), (label['name'], size - 1), (spec, size - 2)):
+        top -= text_size + 1
+        if top < bottom:
+            break
+        if text:
+            canvas.setFont(font, text_size)
+            canvas.drawString(ix, top, _fit(text, font, text_size, text_width))
+
+
+def render_pages(stock, label_type, pages):
+    """
+    페이지 묶음 렌더링 (워커 프로세스에서 실행)
+
+    Args:
+        stock: LabelStock.as_dict()
+        pages: [[라벨 dict 또는 None(빈 칸), ...], ...] - 페이지별 칸 목록
+
+    Returns:
+        bytes: 묶음 PDF
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.pdfgen import canvas as pdf_canvas
+
+    stock = LabelStock(**stock)
+    buffer = io.BytesIO()
+    canvas = pdf_canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    width, height = stock.label_width * mm, stock.label_height * mm
+
+    for slots in pages:
+        for index, label in enumerate(slots):
+            if label is None:
+                continue
+            row, column = divmod(index, stock.columns)
+            x = (stock.margin_left + column * (stock.label_width + stock.gap_x)) * mm
+            y = A4[1] - (stock.margin_top + row * (stock.label_height + stock.gap_y)) * mm - height
+            canvas.saveState()
+            _draw_label(canvas, label, label_type, x, y, width, height)
+            canvas.restoreState()
+        canvas.showPage()
+
+    canvas.save()
+    return buffer.getvalue()
+
+
+class StreamingPdfWriter:
+    """
+    여러 PDF 묶음의 페이지를 이어 붙여 순서대로 출력
+    페이지와 그 리소스는 추가 즉시 내보내고, 계속 바뀌는 페이지 트리/카탈로그/정보 객체와
+    xref는 finish()에서 기록 (PyPDF2 PdfWriter의 객체 목록을 사용)
+    """
+
+    def __init__(self):
+        from PyPDF2 import PdfWriter
+
+        self.writer = PdfWriter()
+        self.offset = 0
+        self.positions = {}
+        self.deferred = [self.writer._pages.idnum, self.writer._info.idnum, self.writer._root.idnum]
+        self.written = set(self.deferred)
+        self.pages = 0
+
+    def _emit(self, buffer, idnums):
+        for idnum in idnums:
+            obj = self.writer._objects[idnum - 1]
+            self.positions[idnum] = self.offset + buffer.tell()
+            buffer.write(f'{idnum} 0 obj\n'.encode())
+            obj.write_to_stream(buffer, None)
+            buffer.write(b'\nendobj\n')
+        data = buffer.getvalue()
+        self.offset += len(data)
+        return data
+
+    def header(self):
+        buffer = io.BytesIO()
+        buffer.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        return self._emit(buffer, [])
+
+    def add(self, pdf_bytes):
+        """묶음 PDF의 페이지 추가 → 새로 생긴 객체 bytes"""
+        from PyPDF2 import PdfReader
+
+        for page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+            self.writer.add_page(page)
+            self.pages += 1
+
+        new = [
+            index + 1 for index, obj in enumerate(self.writer._objects)
+            if obj is not None and index + 1 not in self.written
+        ]
+        self.written.update(new)
+        return self._emit(io.BytesIO(), new)
+
+    def finish(self):
+        """페이지 트리/카탈로그 + xref + trailer"""
+        buffer = io.BytesIO()
+        data = self._emit(buffer, self.deferred)
+        size = len(self.writer._objects) + 1
+        lines = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for idnum in range(1, size):
+            position = self.positions.get(idnum)
+            lines.append(f'{position:010d} 00000 n \n' if position is not None else '0000000000 65535 f \n')
+        lines.append(
+            f'trailer\n<< /Size {size} /Root {self.writer._root.idnum} 0 R /Info {self.writer._info.idnum} 0 R >>\n'
+            f'startxref\n{self.offset}\n%%EOF\n'
+        )
+        return data + ''.join(lines).encode()
+
+
+def _paginate(labels, per_page, copies=1, skip=0):
+    """라벨 → 페이지별 칸 목록 (skip: 첫 장에서 이미 사용한 칸 수)"""
+    slots = [None] * skip + [label for label in labels for _ in range(copies)]
+    return [slots[start:start + per_page] for start in range(0, len(slots), per_page)]
+
+
+def _render_chunks(stock, label_type, chunks):
+    """묶음별 PDF bytes를 순서대로 (풀에서 미리 최대 workers*2개 렌더링, 풀 장애 시 순차)"""
+    from .excel_parallel import _reset_pool, get_pool
+
+    config = stock.as_dict()
+    pool = None
+    if len(chunks) > 1:
+        try:
+            pool = get_pool()
+        except Exception as e:
+            logger.warning(f'라벨 병렬 렌더링 풀 생성 실패, 순차 처리: {str(e)}')
+
+    ahead = 2 * (getattr(pool, '_max_workers', 1) or 1)
+    pending = deque()
+    submitted = 0
+    try:
+        for index, chunk in enumerate(chunks):
+            while pool is not None and submitted < len(chunks) and submitted < index + ahead:
+                pending.append(pool.submit(render_pages, config, label_type, chunks[submitted]))
+                submitted += 1
+            if pending:
+                try:
+                    yield pending.popleft().result()
+                    continue
+                except Exception as e:
+                    logger.warning(f'라벨 병렬 렌더링 실패, 순차 처리로 전환: {str(e)}')
+                    for future in pending:
+                        future.cancel()
+                    pending.clear()
+                    pool = None
+                    _reset_pool()
+            yield render_pages(config, label_type, chunk)
+    finally:
+        for future in pending:  # 클라이언트 연결 종료 시 남은 작업 취소
+            future.cancel()
+
+
+def stream_label_sheet(labels, stock, label_type='both', copies=1, skip=0):
+    """
+    라벨 용지 PDF 스트리밍
+
+    Args:
+        labels: [{item_code, name, specification, unit, barcode, qr_data}, ...]
+        stock: LabelStock
+        label_type: 'barcode', 'qr', 'both'
+        copies: 품목당 라벨 수
+        skip: 첫 장에서 건너뛸 칸 수 (쓰다 남은 용지)
+
+    Yields:
+        bytes: PDF 조각 (헤더 → 묶음별 페이지 → xref)
+    """
+    pages = _paginate(labels, stock.per_page, copies, skip % stock.per_page)
+    per_task = getattr(settings, 'LABEL_SHEET_PAGES_PER_TASK', 5)
+    chunks = [pages[start:start + per_task] for start in range(0, len(pages), per_task)]
+
+    pdf = StreamingPdfWriter()
+    yield pdf.header()
+    for chunk_pdf in _render_chunks(stock, label_type, chunks):
+        yield pdf.add(chunk_pdf)
+    yield pdf.finish()
+    logger.info(f'라벨 용지 PDF: 라벨 {len(labels) * copies}장, {pdf.pages}페이지')
@@ -0,0 +1,265 @@
+"""
+수정된 원장 업로드 → DB 재고 조정 (역방향 동기화)
+오프라인에서 수정한 PRT/SUP 원장을 업로드하면 DB와 대사한 뒤 미리보기를 보여주고,
+확인 시 한 트랜잭션에서 조정 거래(bulk_create)와 품목 수량(bulk_update)을 일괄 반영
+
+- 업로드 파일은 읽기 전용 스트리밍 파싱 + 청크 단위 barcode__in 조회 (LedgerReconciler)
+- 미리보기와 반영 사이에 DB가 바뀌면 반영을 거부 (diff_hash 비교 + 잠근 행의 수량을 미리보기 DB 값과 비교)
+- 엑셀 기준 모드에서는 반영 후 서버 원장 파일의 입고/출고 셀도 한 번에 패치
+"""
+import hashlib
+import logging
+import time
+import uuid
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from openpyxl.utils.exceptions import InvalidFileException
+
+from .excel_lock import WorkbookLockTimeout
+from .models import ExcelMasterDocument, ExcelUpdateLog, InventoryItem, StockTransaction
+from .reconciliation import ITEM_FIELDS, QUANTITY_FIELDS, LedgerReconciler, _quantity
+
+logger = logging.getLogger('hpe')
+
+UPLOAD_RETENTION_SECONDS = 24 * 60 * 60
+
+
+class LedgerUploadError(Exception):
+    """업로드 파일을 반영할 수 없음"""
+
+
+class LedgerUploadConflict(LedgerUploadError):
+    """미리보기 이후 DB가 변경됨"""
+
+
+def _upload_dir(document):
+    return Path(settings.MEDIA_ROOT) / 'excel_uploads' / str(document.id)
+
+
+def _diff_hash(adjustments):
+    """미리보기/반영 대상이 같은지 확인하는 해시"""
+    key = '|'.join(
+        f"{entry['barcode']}:{entry['db']}:{entry['excel']}" for entry in adjustments
+    )
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+class LedgerUpload:
+    """업로드된 원장 파일 1건"""
+
+    def __init__(self, document, upload_id, chunk_size=500):
+        if document.doc_type not in ExcelMasterDocument.STOCK_DOC_TYPES:
+            raise LedgerUploadError('재고 원장(PRT/SUP)만 업로드로 반영할 수 있습니다.')
+        try:
+            upload_id = uuid.UUID(str(upload_id)).hex
+        except ValueError:
+            raise LedgerUploadError('잘못된 업로드 ID입니다.')
+
+        self.document = document
+        self.upload_id = upload_id
+        self.path = _upload_dir(document) / f'{upload_id}.xlsx'
+        self.chunk_size = chunk_size
+        if not self.path.exists():
+            raise LedgerUploadError('업로드 파일이 없거나 만료되었습니다. 다시 업로드해주세요.')
+
+    @classmethod
+    def save(cls, document, uploaded_file, chunk_size=500):
+        """업로드 파일을 저장하고 객체 반환 (오래된 업로드 파일 정리)"""
+        directory = _upload_dir(document)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        expired = time.time() - UPLOAD_RETENTION_SECONDS
+        for old in directory.glob('*.xlsx'):
+            if old.stat().st_mtime < expired:
+                old.unlink(missing_ok=True)
+
+        upload_id = uuid.uuid4().hex
+        with open(directory / f'{upload_id}.xlsx', 'wb') as f:
+            for chunk in uploaded_file.chunks():
+                f.write(chunk)
+        return cls(document, upload_id, chunk_size=chunk_size)
+
+    def discard(self):
+        self.path.unlink(missing_ok=True)
+
+    def diff(self):
+        """
+        업로드 파일과 DB 대사
+
+        Returns:
+            dict: summary, adjustments (수량 불일치), missing_in_db, diff_hash
+        """
+        reconciler = LedgerReconciler(self.document, chunk_size=self.chunk_size, file_path=self.path)
+        try:
+            report = reconciler.run()
+        except KeyError:
+            raise LedgerUploadError(f"업로드 파일에 '{self.document.sheet_name}' 시트가 없습니다.")
+        except (OSError, ValueError, zipfile.BadZipFile, InvalidFileException) as e:
+            raise LedgerUploadError(f'엑셀 파일을 읽을 수 없습니다: {e}')
+
+        adjustments = []
+        for entry in report['drift']:
+            delta = entry['excel']['current'] - entry['db']['current']
+            adjustments.append({**entry, 'delta': round(delta, 2)})
+
+        summary = report['summary']
+        return {
+            'upload_id': self.upload_id,
+            'document_id': str(self.document.id),
+            'title': self.document.title,
+            'summary': {
+                'ledger_rows': summary['ledger_rows'],
+                'duplicate_barcodes': summary['duplicate_barcodes'],
+                'adjustments': len(adjustments),
+                'missing_in_db': summary['missing_in_db'],
+                'elapsed_ms': summary['elapsed_ms'],
+            },
+            'adjustments': adjustments,
+            'missing_in_db': report['missing_in_db'],
+            'diff_hash': _diff_hash(adjustments),
+        }
+
+    def apply(self, user, diff_hash=None, remarks=''):
+        """
+        미리보기한 차이를 조정 거래로 반영 (한 트랜잭션)
+
+        Args:
+            diff_hash: 미리보기 결과의 diff_hash (다르면 LedgerUploadConflict)
+
+        Returns:
+            dict: 반영 건수, 조정 거래 수, 소요 시간
+
+        Raises:
+            LedgerUploadConflict: 미리보기 이후 DB 변경 (diff_hash 불일치, 잠근 행 수량이 미리보기와 다름)
+        """
+        from .excel_materialize import db_source_enabled
+        from .services import StockService
+
+        started = time.monotonic()
+        preview = self.diff()
+        if diff_hash and preview['diff_hash'] != diff_hash:
+            raise LedgerUploadConflict('미리보기 이후 재고가 변경되었습니다. 다시 확인해주세요.')
+
+        adjustments = {entry['item_id']: entry for entry in preview['adjustments']}
+        remarks = remarks or f'원장 업로드 반영 ({self.document.title})'
+        now = timezone.now()
+        stamp = now.strftime('%Y%m%d%H%M%S')
+
+        with transaction.atomic():
+            # 잠근 뒤 다시 확인: 파일 대사(diff)는 잠금 밖에서 하므로 그 사이 커밋된 입출고를
+            # 미리보기의 엑셀 값으로 덮어쓰지 않도록 잠근 행이 미리보기의 DB 값과 같은지 비교
+            items = list(
+                InventoryItem.objects.select_for_update().filter(id__in=list(adjustments)).order_by('id')
+            )
+            if len(items) != len(adjustments):
+                raise LedgerUploadConflict('미리보기 이후 품목이 삭제되었습니다. 다시 확인해주세요.')
+
+            changed = []
+            transactions = []
+            for item in items:
+                entry = adjustments[str(item.id)]
+                if any(
+                    _quantity(getattr(item, field)) != _quantity(entry['db'][key])
+                    for key, field in ITEM_FIELDS.items()
+                ):
+                    raise LedgerUploadConflict(
+                        f"미리보기 이후 재고가 변경되었습니다: {entry['barcode']}. 다시 확인해주세요."
+                    )
+                before = item.current_quantity
+                for key, field in ITEM_FIELDS.items():
+                    setattr(item, field, Decimal(str(entry['excel'][key])))
+                item.updated_at = now  # bulk_update는 auto_now를 갱신하지 않음
+                changed.append(item)
+
+                if item.current_quantity != before:
+                    transactions.append(StockTransaction(
+                        # bulk_create는 save()를 거치지 않으므로 거래번호 직접 생성
+                        transaction_number=f'TRX-{stamp}-{uuid.uuid4().hex[:6].upper()}',
+                        item=item,
+                        transaction_type=StockTransaction.TransactionType.ADJUST,
+                        quantity=abs(item.current_quantity - before),
+                        before_quantity=before,
+                        after_quantity=item.current_quantity,
+                        reference_number=f'UPLOAD-{self.upload_id[:8].upper()}',
+                        remarks=remarks,
+                        performed_by=user,
+                    ))
+
+            InventoryItem.objects.bulk_update(
+                changed, [*ITEM_FIELDS.values(), 'updated_at'], batch_size=self.chunk_size
+            )
+            StockTransaction.objects.bulk_create(transactions, batch_size=self.chunk_size)
+
+            # 재고 알림 일괄 확인
+            StockService().check_stock_alerts_bulk(changed)
+
+        patched = 0
+        if changed and not db_source_enabled():
+            try:
+                patched = self._patch_ledger(changed, user)
+            except WorkbookLockTimeout:
+                # DB는 이미 반영됨 - 원장 파일은 야간 대사(reconcile_ledgers)에서 맞춰짐
+                logger.warning(f'원장 업로드 반영 후 파일 패치 실패 (잠금 대기 초과): {self.document.title}')
+
+        self.discard()
+        elapsed = round((time.monotonic() - started) * 1000, 1)
+        logger.info(
+            f'원장 업로드 반영: {self.document.title} 품목 {len(changed)}건, '
+            f'조정 거래 {len(transactions)}건 ({elapsed}ms)'
+        )
+        return {
+            'updated': len(changed),
+            'transactions': len(transactions),
+            'ledger_rows_patched': patched,
+            'missing_in_db': preview['summary']['missing_in_db'],
+            'elapsed_ms': elapsed,
+        }
+
+    def _patch_ledger(self, items, user):
+        """서버 원장 파일의 수량 셀을 반영된 DB 값으로 패치 (한 번의 저장)"""
+        document = self.document
+        columns = document.extra_columns
+
+        with document.lock():
+            document.ensure_row_index()
+            rows = dict(
+                document.row_index.filter(
+                    barcode__in=[item.barcode for item in items]
+                ).values_list('barcode', 'row')
+            )
+
+            cells = {}
+            logs = []
+            for item in items:
+                row = rows.get(item.barcode)
+                if row is None:
+                    continue
+                values = {key: float(getattr(item, ITEM_FIELDS[key])) for key in QUANTITY_FIELDS}
+                for key in QUANTITY_FIELDS:
+                    if key in columns:
+                        cells[(row, columns[key])] = values[key]
+                logs.append(ExcelUpdateLog(
+                    document=document,
+                    barcode=item.barcode,
+                    action='upload',
+                    updates=values,
+                    created_by=user,
+                ))
+
+            if cells:
+                previous = document.write_cells(cells, keep_formulas=True)
+                for log in logs:
+                    row = rows[log.barcode]
+                    log.previous_values = {
+                        key: previous.get((row, columns[key]))
+                        for key in QUANTITY_FIELDS if key in columns
+                    }
+                document._mark_index_current()
+            ExcelUpdateLog.objects.bulk_create(logs)
+
+        return len(logs)
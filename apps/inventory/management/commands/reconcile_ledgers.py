@@ -0,0 +1,80 @@
+"""
+DB ↔ 엑셀 원장 대사 커맨드
+사용법:
+  python manage.py reconcile_ledgers                     # 보고만
+  python manage.py reconcile_ledgers --doc-type parts    # 특정 원장만
+  python manage.py reconcile_ledgers --apply db --create-missing
+  python manage.py reconcile_ledgers --apply excel
+  python manage.py reconcile_ledgers --json report.json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.inventory.models import ExcelMasterDocument
+from apps.inventory.reconciliation import reconcile_ledgers
+
+
+class Command(BaseCommand):
+    help = 'DB 품목과 엑셀 마스터 원장(KS/계측/PRT/SUP)을 대사하고 선택적으로 보정합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--doc-type', action='append', choices=ExcelMasterDocument.DocType.values,
+            help='대상 원장 유형 (여러 번 지정 가능, 기본: 전체)'
+        )
+        parser.add_argument(
+            '--apply', choices=['db', 'excel'],
+            help='db: 엑셀 기준으로 DB 보정 / excel: DB 기준으로 엑셀 보정'
+        )
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help='--apply db 일 때 DB에 없는 원장 항목을 품목으로 생성'
+        )
+        parser.add_argument('--chunk-size', type=int, default=500, help='barcode__in 조회 청크 크기')
+        parser.add_argument('--json', dest='json_path', help='전체 결과를 JSON 파일로 저장')
+        parser.add_argument('--limit', type=int, default=20, help='유형별 출력 항목 수')
+
+    def handle(self, *args, **options):
+        if options['create_missing'] and options['apply'] != 'db':
+            raise CommandError('--create-missing 은 --apply db 와 함께 사용해야 합니다.')
+
+        reports = reconcile_ledgers(
+            doc_types=options['doc_type'],
+            apply=options['apply'],
+            create_missing=options['create_missing'],
+            chunk_size=options['chunk_size'],
+        )
+
+        limit = options['limit']
+        for report in reports:
+            summary = report['summary']
+            self.stdout.write('=' * 60)
+            self.stdout.write(f"{report['title']} ({report['doc_type']})")
+            self.stdout.write(
+                f"  원장 {summary['ledger_rows']}행 / DB 누락 {summary['missing_in_db']} / "
+                f"엑셀 누락 {summary['missing_in_excel']} / 수량 불일치 {summary['drift']} "
+                f"({summary['elapsed_ms']}ms)"
+            )
+            if summary['duplicate_barcodes']:
+                self.stdout.write(self.style.WARNING(f"  중복 바코드 {summary['duplicate_barcodes']}건"))
+
+            for entry in report['missing_in_db'][:limit]:
+                self.stdout.write(f"  [DB 누락] {entry['barcode']} {entry['name']} (행 {entry['row']})")
+            for entry in report['missing_in_excel'][:limit]:
+                self.stdout.write(f"  [엑셀 누락] {entry['barcode']} {entry['name']}")
+            for entry in report['drift'][:limit]:
+                self.stdout.write(
+                    f"  [불일치] {entry['barcode']} 엑셀 {entry['excel']} / DB {entry['db']}"
+                )
+
+            if 'applied' in report:
+                self.stdout.write(self.style.SUCCESS(f"  보정: {report['applied']}"))
+
+        if options['json_path']:
+            with open(options['json_path'], 'w', encoding='utf-8') as f:
+                json.dump(reports, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"결과 저장: {options['json_path']}")
+
+        self.stdout.write('=' * 60)
+        self.stdout.write(self.style.SUCCESS(f'대사 완료: 원장 {len(reports)}개'))
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_excelmasterdocument_excelupdatelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='excelmasterdocument',
+            name='index_build_ms',
+            field=models.IntegerField(default=0, verbose_name='인덱스생성시간(ms)'),
+        ),
+        migrations.AddField(
+            model_name='excelmasterdocument',
+            name='index_built_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='인덱스생성일시'),
+        ),
+        migrations.AddField(
+            model_name='excelmasterdocument',
+            name='index_rows',
+            field=models.IntegerField(default=0, verbose_name='인덱스항목수'),
+        ),
+        migrations.AddField(
+            model_name='excelmasterdocument',
+            name='index_version',
+            field=models.CharField(blank=True, max_length=64, verbose_name='인덱스버전'),
+        ),
+        migrations.CreateModel(
+            name='ExcelRowIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=100, verbose_name='바코드')),
+                ('row', models.IntegerField(verbose_name='행')),
+                ('last_row', models.IntegerField(verbose_name='마지막행')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_index', to='inventory.excelmasterdocument', verbose_name='문서')),
+            ],
+            options={
+                'verbose_name': '엑셀 행 인덱스',
+                'verbose_name_plural': '엑셀 행 인덱스',
+                'db_table': 'excel_row_index',
+                'unique_together': {('document', 'barcode')},
+            },
+        ),
+    ]
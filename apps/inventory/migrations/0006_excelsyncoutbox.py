@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0005_excelmasterdocument_index_build_ms_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExcelSyncOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.CharField(max_length=100, verbose_name='바코드')),
+                ('operation', models.CharField(max_length=20, verbose_name='작업')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='수량')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('done', '완료'), ('skipped', '건너뜀'), ('failed', '실패')], default='pending', max_length=20, verbose_name='상태')),
+                ('attempts', models.IntegerField(default=0, verbose_name='시도횟수')),
+                ('last_error', models.TextField(blank=True, verbose_name='오류내용')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='등록일시')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='처리일시')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='작업자')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_outbox', to='inventory.excelmasterdocument', verbose_name='문서')),
+                ('stock_transaction', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='excel_sync_entries', to='inventory.stocktransaction', verbose_name='재고 거래')),
+            ],
+            options={
+                'verbose_name': '엑셀 동기화 대기열',
+                'verbose_name_plural': '엑셀 동기화 대기열',
+                'db_table': 'excel_sync_outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['document', 'status', 'id'], name='excel_sync__documen_c2c33c_idx')],
+            },
+        ),
+    ]
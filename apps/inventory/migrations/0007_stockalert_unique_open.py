@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:19
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def resolve_duplicate_alerts(apps, schema_editor):
+    """품목/유형별 미해결 알림이 여러 개면 가장 최근 것만 남기고 해결 처리"""
+    from django.utils import timezone
+    
+    StockAlert = apps.get_model('inventory', 'StockAlert')
+    
+    duplicates = (
+        StockAlert.objects.filter(is_resolved=False)
+        .values('item_id', 'alert_type')
+        .annotate(count=Count('id'), keep=Max('id'))
+        .filter(count__gt=1)
+    )
+    keep_ids = [row['keep'] for row in duplicates]
+    for row in duplicates:
+        StockAlert.objects.filter(
+            item_id=row['item_id'], alert_type=row['alert_type'], is_resolved=False
+        ).exclude(id__in=keep_ids).update(is_resolved=True, resolved_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_excelsyncoutbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_duplicate_alerts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='stockalert',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_resolved', False)), fields=('item', 'alert_type'), name='unique_open_stock_alert'),
+        ),
+    ]
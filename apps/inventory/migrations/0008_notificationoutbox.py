@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0007_stockalert_unique_open'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254, verbose_name='이메일')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('sent', '발송'), ('skipped', '건너뜀'), ('failed', '실패')], default='pending', max_length=20, verbose_name='상태')),
+                ('attempts', models.IntegerField(default=0, verbose_name='시도횟수')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='다음 시도')),
+                ('last_error', models.TextField(blank=True, verbose_name='오류내용')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='등록일시')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='발송일시')),
+                ('alert', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='inventory.stockalert', verbose_name='재고 알림')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_notifications', to=settings.AUTH_USER_MODEL, verbose_name='수신자')),
+            ],
+            options={
+                'verbose_name': '알림 메일 대기열',
+                'verbose_name_plural': '알림 메일 대기열',
+                'db_table': 'notification_outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'email', 'id'], name='notificatio_status_1fff67_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0008_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelPrintJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('printer', models.CharField(max_length=50, verbose_name='프린터')),
+                ('payload', models.TextField(verbose_name='ZPL')),
+                ('label_count', models.IntegerField(default=0, verbose_name='라벨 수')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('sent', '전송'), ('failed', '실패')], default='pending', max_length=20, verbose_name='상태')),
+                ('attempts', models.IntegerField(default=0, verbose_name='시도횟수')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='다음 시도')),
+                ('last_error', models.TextField(blank=True, verbose_name='오류내용')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='등록일시')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='전송일시')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='label_print_jobs', to=settings.AUTH_USER_MODEL, verbose_name='요청자')),
+            ],
+            options={
+                'verbose_name': '라벨 출력 대기열',
+                'verbose_name_plural': '라벨 출력 대기열',
+                'db_table': 'label_print_job',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'printer', 'id'], name='label_print_status_2b4011_idx')],
+            },
+        ),
+    ]
@@ -6,10 +6,13 @@ from django.db import models
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
+import logging
 import uuid
 import openpyxl
 from pathlib import Path
 
+logger = logging.getLogger('hpe')
+
 
 class Warehouse(models.Model):
     """창고"""
@@ -435,11 +438,120 @@ class StockAlert(models.Model):
         verbose_name = _('재고 알림')
         verbose_name_plural = _('재고 알림')
         ordering = ['-created_at']
+        constraints = [
+            # 품목/유형별 미해결 알림은 하나만 (동시 입출고에서도 중복 생성 방지)
+            models.UniqueConstraint(
+                fields=['item', 'alert_type'],
+                condition=models.Q(is_resolved=False),
+                name='unique_open_stock_alert',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.item.name} - {self.get_alert_type_display()}"
 
 
+class NotificationOutbox(models.Model):
+    """
+    재고 알림 메일 대기열 (수신자 × 알림)
+    재고 거래 경로에서는 기록만 하고, Celery 작업이 수신자별 요약 메일로 묶어 발송
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('대기')
+        SENT = 'sent', _('발송')
+        SKIPPED = 'skipped', _('건너뜀')
+        FAILED = 'failed', _('실패')
+    
+    alert = models.ForeignKey(
+        StockAlert,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name=_('재고 알림')
+    )
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='alert_notifications',
+        verbose_name=_('수신자')
+    )
+    email = models.EmailField(_('이메일'))
+    
+    status = models.CharField(
+        _('상태'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.IntegerField(_('시도횟수'), default=0)
+    next_attempt_at = models.DateTimeField(_('다음 시도'), null=True, blank=True)
+    last_error = models.TextField(_('오류내용'), blank=True)
+    
+    created_at = models.DateTimeField(_('등록일시'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('발송일시'), null=True, blank=True)
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = _('알림 메일 대기열')
+        verbose_name_plural = _('알림 메일 대기열')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'email', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.email} - {self.alert_id} ({self.status})"
+
+
+class LabelPrintJob(models.Model):
+    """
+    라벨 프린터 출력 대기열 (ZPL, RAW TCP 9100)
+    요청 경로에서는 기록만 하고, Celery 작업이 프린터별로 순서대로 전송
+    """
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('대기')
+        SENT = 'sent', _('전송')
+        FAILED = 'failed', _('실패')
+    
+    printer = models.CharField(_('프린터'), max_length=50)
+    payload = models.TextField(_('ZPL'))
+    label_count = models.IntegerField(_('라벨 수'), default=0)
+    
+    status = models.CharField(
+        _('상태'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.IntegerField(_('시도횟수'), default=0)
+    next_attempt_at = models.DateTimeField(_('다음 시도'), null=True, blank=True)
+    last_error = models.TextField(_('오류내용'), blank=True)
+    
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='label_print_jobs',
+        verbose_name=_('요청자')
+    )
+    created_at = models.DateTimeField(_('등록일시'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('전송일시'), null=True, blank=True)
+    
+    class Meta:
+        db_table = 'label_print_job'
+        verbose_name = _('라벨 출력 대기열')
+        verbose_name_plural = _('라벨 출력 대기열')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'printer', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.printer} #{self.id} - {self.label_count}장 ({self.status})"
+
+
 class InventoryCount(models.Model):
     """재고 실사"""
     
@@ -578,6 +690,13 @@ class ExcelMasterDocument(models.Model):
     # 예: {'received': 8, 'issued': 9, 'current': 10}
     
     total_items = models.IntegerField(_('총항목수'), default=0)
+    
+    # 바코드 → 행 인덱스 상태 (파일 내용 해시가 바뀔 때만 재생성)
+    index_version = models.CharField(_('인덱스버전'), max_length=64, blank=True)
+    index_rows = models.IntegerField(_('인덱스항목수'), default=0)
+    index_built_at = models.DateTimeField(_('인덱스생성일시'), null=True, blank=True)
+    index_build_ms = models.IntegerField(_('인덱스생성시간(ms)'), default=0)
+    
     last_updated = models.DateTimeField(_('최종수정일시'), auto_now=True)
     created_at = models.DateTimeField(_('등록일시'), auto_now_add=True)
     
@@ -589,125 +708,683 @@ class ExcelMasterDocument(models.Model):
     def __str__(self):
         return self.title
     
+    # 바코드 접두어 → 문서 유형
+    BARCODE_PREFIXES = (
+        ('HP-KSTC-', DocType.KS_CERT),
+        ('HP-P10-', DocType.MEASUREMENT),
+        ('HP-P20-', DocType.MEASUREMENT),
+        ('HP-PRT-', DocType.PARTS),
+        ('HP-SUP-', DocType.SUPPLIES),
+    )
+    
+    # 입고/출고 수량을 관리하는 문서 유형
+    STOCK_DOC_TYPES = (DocType.PARTS, DocType.SUPPLIES)
+    
+    @classmethod
+    def doc_type_for_barcode(cls, barcode):
+        """바코드 패턴으로 문서 유형 판별 (컴파일된 접두어 라우팅 표)"""
+        from .barcode_resolver import router
+        return router().route(barcode)[1]
+    
+    @classmethod
+    def for_barcode(cls, barcode):
+        """바코드 패턴으로 문서 찾기"""
+        doc_type = cls.doc_type_for_barcode(barcode)
+        if doc_type is None:
+            return None
+        return cls.objects.filter(doc_type=doc_type).first()
+    
     def get_file_path(self):
         """실제 파일 경로 반환"""
         from pathlib import Path
         return Path(settings.MEDIA_ROOT) / self.file_path
     
+    def _index_version_for(self, content_hash):
+        """파일 내용 해시 + 엑셀 구조 정보로 인덱스 버전 계산"""
+        import hashlib
+        return hashlib.sha256(f'{content_hash}|{self.layout_key()}'.encode()).hexdigest()
+    
+    def current_index_version(self):
+        """현재 파일 기준 인덱스 버전 (파일이 없으면 None)"""
+        from .excel_cache import file_content_hash
+        
+        content_hash = file_content_hash(self.get_file_path())
+        if content_hash is None:
+            return None
+        return self._index_version_for(content_hash)
+    
+    def ensure_row_index(self):
+        """파일이 바뀌었으면 바코드 → 행 인덱스 재생성"""
+        version = self.current_index_version()
+        if version is None:
+            return False
+        if version != self.index_version:
+            self.rebuild_row_index(version)
+        return True
+    
+    def rebuild_row_index(self, version=None):
+        """바코드 → 행 인덱스 전체 재생성"""
+        import time
+        from django.db import transaction
+        from django.utils import timezone
+        
+        version = version or self.current_index_version()
+        if version is None:
+            return 0
+        
+        started = time.monotonic()
+        entries = []
+        seen = set()
+        for item in self.read_all_items():
+            # 중복 바코드는 첫 번째 행만 인덱싱 (기존 선형 검색과 동일)
+            if item['barcode'] in seen:
+                continue
+            seen.add(item['barcode'])
+            entries.append(ExcelRowIndex(
+                document=self,
+                barcode=item['barcode'],
+                row=item['row'],
+                last_row=item.get('last_row', item['row']),
+            ))
+        
+        with transaction.atomic():
+            ExcelRowIndex.objects.filter(document=self).delete()
+            ExcelRowIndex.objects.bulk_create(entries, batch_size=500)
+            self.index_version = version
+            self.index_rows = len(entries)
+            self.index_built_at = timezone.now()
+            self.index_build_ms = int((time.monotonic() - started) * 1000)
+            self.save(update_fields=[
+                'index_version', 'index_rows', 'index_built_at', 'index_build_ms'
+            ])
+        
+        from .barcode_resolver import barcode_resolver
+        barcode_resolver.invalidate([entry.barcode for entry in entries])
+        return len(entries)
+    
+    def _mark_index_current(self):
+        """셀 값만 수정한 경우 (행 구조 변화 없음) 인덱스를 재생성 없이 최신으로 표시"""
+        version = self.current_index_version()
+        if version and version != self.index_version:
+            self.index_version = version
+            self.save(update_fields=['index_version'])
+    
     def find_item_row(self, barcode):
-        """바코드로 엑셀 행 찾기"""
-        import openpyxl
+        """바코드로 엑셀 행 찾기 (인덱스 사용)"""
+        if not self.ensure_row_index():
+            return None
         
-        file_path = self.get_file_path()
-        if not file_path.exists():
+        return ExcelRowIndex.objects.filter(
+            document=self, barcode=barcode
+        ).values_list('row', flat=True).first()
+    
+    def read_item(self, barcode):
+        """
+        바코드 항목 1건 읽기 (인덱스로 행을 찾아 해당 행 항목 반환, 없으면 None)
+        lock() 안에서 호출하면 쓰기 직전의 최신 값 - 파일이 바뀌면 파싱 캐시도 다시 읽음
+        """
+        row = self.find_item_row(barcode)
+        if row is None:
             return None
+        return next((item for item in self.read_all_items() if item['row'] == row), None)
+    
+    def lock(self, timeout=None):
+        """문서 쓰기 잠금 (프로세스 간 공유)"""
+        from .excel_lock import workbook_lock
+        return workbook_lock(self.id, timeout)
+    
+    def save_workbook(self, wb):
+        """워크북 원자적 저장 (임시 파일 → os.replace, 저장 전 스냅샷)"""
+        from .excel_lock import atomic_save
+        atomic_save(wb, self.get_file_path(), document_id=self.id)
+        self.invalidate_cache()
+    
+    def write_cells(self, cells, sheet_name=None, keep_formulas=False):
+        """
+        셀 값 쓰기 (잠금 안에서 호출)
+        cells: {(row, col): value}
+        keep_formulas: True면 수식 셀은 덮어쓰지 않음 (=H15-I15 같은 계산 열 유지)
         
-        wb = openpyxl.load_workbook(file_path)
-        ws = wb[self.sheet_name]
+        OOXML 셀 패치를 우선 사용하고, 행 추가 등 지원하지 않는 변경은 openpyxl로 저장
+        Returns:
+            dict: {(row, col): 이전 값}
+        """
+        from .excel_patch import PatchNotSupported, patch_cells
         
-        for row_idx in range(self.data_start_row, ws.max_row + 1):
-            cell_value = ws.cell(row=row_idx, column=self.barcode_column).value
-            if cell_value and str(cell_value).strip() == barcode:
-                wb.close()
-                return row_idx
+        if not cells:
+            return {}
+        
+        file_path = self.get_file_path()
+        sheet_name = sheet_name or self.sheet_name
+        
+        if getattr(settings, 'EXCEL_PATCH_ENABLED', True):
+            try:
+                previous = patch_cells(
+                    file_path, sheet_name, cells, document_id=self.id, keep_formulas=keep_formulas
+                )
+                self.invalidate_cache()
+                return previous
+            except PatchNotSupported as e:
+                logger.info(f'엑셀 셀 패치 불가, openpyxl로 저장: {str(e)}')
         
-        wb.close()
-        return None
+        wb = openpyxl.load_workbook(file_path)
+        try:
+            ws = wb[sheet_name] if sheet_name in wb.sheetnames else wb.active
+            previous = {}
+            for (row, col), value in cells.items():
+                cell = ws.cell(row=row, column=col)
+                previous[(row, col)] = cell.value
+                if keep_formulas and isinstance(cell.value, str) and cell.value.startswith('='):
+                    continue
+                cell.value = value
+            self.save_workbook(wb)
+        finally:
+            wb.close()
+        return previous
     
     def update_item(self, barcode, updates):
         """
         바코드로 항목 찾아서 업데이트
         updates: {column_key: value} 형태
         예: {'received': 30, 'issued': 5, 'current': 25}
+        수식으로 계산되는 열(현재고 등)은 값을 쓰지 않고 수식을 유지
         """
-        import openpyxl
+        with self.lock():
+            # 인덱스 버전이 파일 내용 해시와 일치하므로 행 위치를 그대로 사용
+            row_idx = self.find_item_row(barcode)
+            if row_idx is None:
+                return False
+            
+            cells = {
+                (row_idx, self.extra_columns[key]): value
+                for key, value in updates.items()
+                if key in self.extra_columns
+            }
+            if cells:
+                self.write_cells(cells, keep_formulas=True)
+                self._mark_index_current()
+        return True
+    
+    def _table_columns(self, ws):
+        """원장 표의 열 범위 (헤더 행 기준, 옆에 붙은 다른 표는 제외)"""
+        merged_header = set()
+        for merged in ws.merged_cells.ranges:
+            if merged.min_row <= self.header_row <= merged.max_row:
+                merged_header.update(range(merged.min_col + 1, merged.max_col + 1))
         
-        file_path = self.get_file_path()
-        if not file_path.exists():
-            return False
+        def in_table(col):
+            value = ws.cell(row=self.header_row, column=col).value
+            return value not in (None, '') or col in merged_header
         
-        wb = openpyxl.load_workbook(file_path)
-        ws = wb[self.sheet_name]
-        
-        row_idx = None
-        for row_idx in range(self.data_start_row, ws.max_row + 1):
-            cell_value = ws.cell(row=row_idx, column=self.barcode_column).value
-            if cell_value and str(cell_value).strip() == barcode:
-                break
-        else:
-            wb.close()
-            return False
+        columns = [self.barcode_column, self.name_column, *self.extra_columns.values()]
+        first, last = min(columns), max(columns)
+        while first > 1 and in_table(first - 1):
+            first -= 1
+        while last < ws.max_column and in_table(last + 1):
+            last += 1
+        return first, last
+    
+    def _append_anchors(self):
+        """
+        새 행을 붙일 위치 목록 [(이 행 다음부터, 서식 기준 행, 반복 머리글 건너뛰기 여부), ...] (앞에서부터 사용)
+        1) 첫 번째 표의 마지막 항목 - 문서 유형 접두어가 아닌 바코드 칸 값(반복 머리글 '관리 번호' 등)에서 표가 끝남
+        2) 시트 전체의 마지막 항목 (첫 번째 표에 빈 행이 없으면 시트 끝에 추가)
+        """
+        prefixes = tuple(prefix for prefix, doc_type in self.BARCODE_PREFIXES if doc_type == self.doc_type)
+        table_last = None
+        sheet_last = None
+        table_ended = False
+        for item in sorted(self.read_all_items(), key=lambda item: item['row']):
+            if prefixes and not item['barcode'].startswith(prefixes):
+                table_ended = table_last is not None
+                continue
+            if not table_ended:
+                table_last = item
+            sheet_last = item
         
-        # 업데이트할 컬럼들
-        for key, value in updates.items():
-            if key in self.extra_columns:
-                col_idx = self.extra_columns[key]
-                ws.cell(row=row_idx, column=col_idx, value=value)
+        if table_last is None:
+            return [(self.data_start_row - 1, self.data_start_row, False)]
+        anchors = [(table_last['last_row'], table_last['row'], False)]
+        if sheet_last is not table_last:
+            anchors.append((sheet_last['last_row'], sheet_last['row'], True))
+        return anchors
+    
+    def append_items(self, entries):
+        """
+        원장 마지막 항목 뒤에 새 행 추가 (여러 항목을 한 번에 저장)
+        entries: [{'barcode', 'name', 'received', 'issued'}, ...]
         
-        # 저장
-        wb.save(file_path)
-        wb.close()
-        return True
+        첫 번째 표 아래의 미리 서식 지정된 빈 행(바코드/이름 칸이 빈 행)을 먼저 채우고,
+        없으면 시트 마지막 항목 뒤에 추가 (_append_anchors, 다음 페이지 머리글은 건너뜀)
+        서식이 없는 행에는 기준 데이터 행의 스타일/병합/행 높이를 복사하고 바코드 인덱스는 증분 갱신
+        Returns:
+            dict: {barcode: 추가된 행} (이미 있는 바코드는 제외)
+        """
+        from copy import copy
+        from openpyxl.cell.cell import MergedCell
+        from openpyxl.formula.translate import Translator
+        from openpyxl.utils import get_column_letter
+        
+        with self.lock():
+            self.ensure_row_index()
+            
+            barcodes = [entry['barcode'] for entry in entries]
+            existing = set(
+                self.row_index.filter(barcode__in=barcodes).values_list('barcode', flat=True)
+            )
+            new_entries = {}
+            for entry in entries:
+                if entry['barcode'] not in existing:
+                    new_entries.setdefault(entry['barcode'], entry)
+            if not new_entries:
+                return {}
+            
+            anchors = self._append_anchors()
+            
+            wb = openpyxl.load_workbook(self.get_file_path())
+            try:
+                ws = wb[self.sheet_name]
+                first_col, last_col = self._table_columns(ws)
+                
+                def is_formula(value):
+                    return isinstance(value, str) and value.startswith('=')
+                
+                item_columns = {self.barcode_column, self.name_column, *self.extra_columns.values()}
+                
+                def usable(row, template_row):
+                    """
+                    바코드/이름/수량 칸이 비어 있고 (수량 칸 수식은 허용)
+                    나머지 칸은 비었거나 수식, 순번 숫자, 기준 행과 같은 값 (날짜 등)
+                    """
+                    for col in range(first_col, last_col + 1):
+                        cell = ws.cell(row=row, column=col)
+                        if col in item_columns and isinstance(cell, MergedCell):
+                            return False  # 다른 칸에 병합된 행 (구분선/제목 등)
+                        value = cell.value
+                        if value in (None, '') or (is_formula(value) and col != self.barcode_column):
+                            continue
+                        if col in item_columns:
+                            return False
+                        if isinstance(value, (int, float)) and not isinstance(value, bool):
+                            continue
+                        if value != ws.cell(row=template_row, column=col).value:
+                            return False
+                    return True
+                
+                # 반복 머리글의 바코드 칸 값 ('관리 번호', '(Management No.)' 등)
+                header_labels = {
+                    ws.cell(row=row, column=self.barcode_column).value
+                    for row in range(self.header_row, self.data_start_row)
+                } - {None, ''}
+                header_rows = max(self.data_start_row - self.header_row, 1)
+                
+                def slots():
+                    """(새 행, 기준 행) - 위치마다 바로 아래부터 사용할 수 없는 행이 나올 때까지"""
+                    for after_row, template_row, skip_headers in anchors:
+                        row = after_row + 1
+                        while True:
+                            if usable(row, template_row):
+                                yield row, template_row
+                                row += 1
+                            elif skip_headers and ws.cell(row=row, column=self.barcode_column).value in header_labels:
+                                row += header_rows  # 다음 페이지 머리글 다음부터
+                            else:
+                                break
+                    raise ValueError(
+                        f'{self.title}: {row}행에 다른 내용이 있어 새 항목을 추가할 수 없습니다.'
+                    )
+                
+                added = {}
+                available = slots()
+                for barcode, entry in new_entries.items():
+                    row, template_row = next(available)
+                    # 날짜/수식/서식이 미리 채워진 행은 서식을 그대로 사용
+                    preformatted = any(
+                        ws.cell(row=row, column=col).has_style
+                        or ws.cell(row=row, column=col).value not in (None, '')
+                        for col in range(first_col, last_col + 1)
+                    )
+                    
+                    if row != template_row and not preformatted:
+                        for col in range(first_col, last_col + 1):
+                            source = ws.cell(row=template_row, column=col)
+                            if source.has_style:
+                                ws.cell(row=row, column=col)._style = copy(source._style)
+                        template_height = ws.row_dimensions[template_row].height
+                        if template_height:
+                            ws.row_dimensions[row].height = template_height
+                        
+                        template_merges = [
+                            (merged.min_col, merged.max_col) for merged in ws.merged_cells.ranges
+                            if merged.min_row == merged.max_row == template_row
+                            and first_col <= merged.min_col and merged.max_col <= last_col
+                        ]
+                        row_merges = [
+                            merged for merged in ws.merged_cells.ranges
+                            if merged.min_row <= row <= merged.max_row
+                            and merged.min_col <= last_col and merged.max_col >= first_col
+                        ]
+                        for min_col, max_col in template_merges:
+                            if not any(
+                                merged.min_col <= max_col and merged.max_col >= min_col
+                                for merged in row_merges
+                            ):
+                                ws.merge_cells(
+                                    start_row=row, start_column=min_col,
+                                    end_row=row, end_column=max_col
+                                )
+                    
+                    received = float(entry.get('received', 0) or 0)
+                    issued = float(entry.get('issued', 0) or 0)
+                    values = {'received': received, 'issued': issued, 'current': received - issued}
+                    
+                    ws.cell(row=row, column=self.barcode_column, value=barcode)
+                    ws.cell(row=row, column=self.name_column, value=entry.get('name') or '')
+                    for key, col_idx in self.extra_columns.items():
+                        if is_formula(ws.cell(row=row, column=col_idx).value):
+                            continue  # 미리 채워진 행의 수식 유지
+                        source = ws.cell(row=template_row, column=col_idx)
+                        if row != template_row and is_formula(source.value):
+                            # 계산 열은 기준 행의 수식을 새 행 기준으로 옮김 (=H15-I15 → =H16-I16)
+                            ws.cell(row=row, column=col_idx, value=Translator(
+                                source.value, origin=source.coordinate
+                            ).translate_formula(f'{get_column_letter(col_idx)}{row}'))
+                        elif key in values:
+                            ws.cell(row=row, column=col_idx, value=values[key])
+                    
+                    added[barcode] = row
+                
+                self.save_workbook(wb)
+            finally:
+                wb.close()
+            
+            # 바코드 인덱스 증분 갱신 (기존 행 위치는 그대로)
+            ExcelRowIndex.objects.bulk_create([
+                ExcelRowIndex(document=self, barcode=barcode, row=row, last_row=row)
+                for barcode, row in added.items()
+            ])
+            self.index_version = self.current_index_version()
+            self.index_rows += len(added)
+            self.save(update_fields=['index_version', 'index_rows'])
+            
+            from .barcode_resolver import barcode_resolver
+            barcode_resolver.invalidate(list(added))
+        
+        return added
+    
+    def layout_key(self):
+        """파싱 결과에 영향을 주는 엑셀 구조 정보 키"""
+        columns = ','.join(f'{k}={v}' for k, v in sorted(self.extra_columns.items()))
+        return (
+            f'{self.sheet_name}|{self.data_start_row}|{self.barcode_column}|'
+            f'{self.name_column}|{columns}'
+        )
+    
+    def invalidate_cache(self):
+        """파싱 캐시 무효화 (파일 수정 후 호출)"""
+        from .excel_cache import ledger_cache
+        ledger_cache.invalidate(self.id)
     
     def read_all_items(self):
-        """모든 항목 읽기"""
-        import openpyxl
+        """
+        모든 항목 읽기
+        파일 mtime/size 기준으로 캐시된 파싱 결과를 사용
+        """
+        return list(self.stream_items())
+    
+    def cached_items(self):
+        """
+        캐시된 파싱 결과 반환 (캐시에 없으면 None, 파일이 없으면 빈 목록)
+        반환값은 캐시 원본이므로 수정하지 말 것
+        """
+        from .excel_cache import ledger_cache, file_signature
         
         file_path = self.get_file_path()
-        if not file_path.exists():
+        signature = file_signature(file_path)
+        if signature is None:
             return []
+        return ledger_cache.get(self.id, signature, self.layout_key(), file_path)
+    
+    def store_parsed_items(self, items, signature=None):
+        """파싱 결과를 캐시에 저장하고 총 항목 수 갱신"""
+        from .excel_cache import ledger_cache, file_signature
         
-        # data_only=True: 수식 대신 계산된 값을 읽음
-        wb = openpyxl.load_workbook(file_path, data_only=True)
-        ws = wb[self.sheet_name]
+        file_path = self.get_file_path()
+        signature = signature or file_signature(file_path)
+        if signature is not None:
+            ledger_cache.set(self.id, signature, self.layout_key(), file_path, items)
+        self._update_total_items(len(items))
+    
+    def _update_total_items(self, count):
+        """총 항목 수가 바뀐 경우에만 업데이트"""
+        if self.total_items != count:
+            self.total_items = count
+            self.save(update_fields=['total_items'])
+    
+    def stream_items(self):
+        """
+        항목을 하나씩 반환하는 제너레이터
+        캐시에 없으면 파일을 스트리밍 파싱하면서 반환하고, 끝까지 읽으면 캐시에 저장
+        DB 기준 모드에서는 DB 품목을 반환
+        """
+        from .excel_cache import file_signature
+        from .excel_materialize import db_source_enabled, iter_db_items
+        
+        if db_source_enabled():
+            yield from iter_db_items(self)
+            return
+        
+        file_path = self.get_file_path()
+        signature = file_signature(file_path)
+        if signature is None:
+            return
+        
+        items = self.cached_items()
+        if items is not None:
+            # 호출자가 항목을 수정해도 캐시가 오염되지 않도록 복사본 반환
+            for item in items:
+                yield dict(item)
+            self._update_total_items(len(items))
+            return
         
         items = []
-        current_item = None
+        for item in self.iter_items(file_path):
+            items.append(item)
+            yield dict(item)
+        self.store_parsed_items(items, signature)
+    
+    def ledger_path(self):
+        """조회/다운로드용 원장 파일 (DB 기준 모드에서는 DB로 생성한 파일)"""
+        from .excel_materialize import db_source_enabled, materialize_ledger
         
-        for row_idx in range(self.data_start_row, ws.max_row + 1):
-            barcode = ws.cell(row=row_idx, column=self.barcode_column).value
-            name = ws.cell(row=row_idx, column=self.name_column).value
-            
-            # 바코드가 있으면 새 항목
-            if barcode:
-                if current_item:
-                    items.append(current_item)
-                
-                current_item = {
-                    'row': row_idx,
-                    'barcode': str(barcode).strip(),
-                    'name': str(name).strip() if name else ''
-                }
-                
-                # 추가 컬럼 읽기 (수식이 계산된 값으로 읽힘)
-                for key, col_idx in self.extra_columns.items():
-                    value = ws.cell(row=row_idx, column=col_idx).value
-                    # 숫자가 아닌 값은 0으로 처리
-                    if value is not None and isinstance(value, (int, float)):
-                        current_item[key] = value
-                    elif value is not None and isinstance(value, str):
-                        # 문자열이면 숫자로 변환 시도
-                        try:
-                            current_item[key] = float(value)
-                        except ValueError:
-                            current_item[key] = 0
-                    else:
-                        current_item[key] = 0
-            
-            # 이름만 있으면 이전 항목에 추가 (여러 행에 걸친 이름)
-            elif current_item and name:
-                current_item['name'] += ' ' + str(name).strip()
+        if db_source_enabled():
+            return materialize_ledger(self)
+        return self.get_file_path()
+    
+    def items_version(self):
+        """항목 목록 버전 (엑셀: 파일 내용+구조, DB 기준: 품목/거래 상태)"""
+        from .excel_materialize import db_source_enabled, ledger_version
+        
+        if db_source_enabled():
+            return ledger_version(self)
+        return self.current_index_version()
+    
+    def parser_config(self):
+        """파싱에 필요한 구조 정보 (다른 프로세스에서 문서 객체 재구성용)"""
+        return {
+            'id': self.id,
+            'file_path': str(self.get_file_path()),
+            'sheet_name': self.sheet_name,
+            'data_start_row': self.data_start_row,
+            'barcode_column': self.barcode_column,
+            'name_column': self.name_column,
+            'extra_columns': dict(self.extra_columns),
+        }
+    
+    @staticmethod
+    def _to_number(value):
+        """추가 컬럼 값을 숫자로 변환 (숫자가 아닌 값은 0)"""
+        if value is not None and isinstance(value, (int, float)):
+            return value
+        if value is not None and isinstance(value, str):
+            # 문자열이면 숫자로 변환 시도
+            try:
+                return float(value)
+            except ValueError:
+                return 0
+        return 0
+    
+    def iter_items(self, file_path=None):
+        """
+        엑셀 파일 스트리밍 파싱 (읽기 전용 모드, 캐시 미사용)
+        시트 크기와 관계없이 메모리 사용량이 일정하며,
+        여러 행에 걸친 이름도 한 번의 순회로 병합
+        
+        수식 셀은 Excel이 마지막으로 저장한 값(data_only) 대신 행 값으로 직접 계산
+        (셀 패치/openpyxl 저장 후에도 현재고 등 계산 열이 최신 값)
+        """
+        import openpyxl
+        from .excel_formula import FormulaError, RowEvaluator, UnsupportedFormula
         
-        if current_item:
-            items.append(current_item)
+        file_path = file_path or self.get_file_path()
         
-        wb.close()
+        # 수식은 문자열로 읽고 평가기로 계산 (같은 상대 수식은 한 번만 컴파일)
+        wb = openpyxl.load_workbook(file_path, read_only=True)
+        failed = []
         
-        # 총 항목 수 업데이트
-        self.total_items = len(items)
-        self.save(update_fields=['total_items'])
+        def value_of(evaluator, col):
+            try:
+                return evaluator.value(col)
+            except (UnsupportedFormula, FormulaError) as e:
+                failed.append((evaluator.row, col, str(e)))
+                return None
         
-        return items
+        try:
+            ws = wb[self.sheet_name]
+            
+            extra = list(self.extra_columns.items())
+            
+            current_item = None
+            rows = ws.iter_rows(min_row=self.data_start_row, values_only=True)
+            
+            for row_idx, values in enumerate(rows, start=self.data_start_row):
+                evaluator = RowEvaluator(row_idx, values)
+                barcode = value_of(evaluator, self.barcode_column)
+                name = value_of(evaluator, self.name_column)
+                
+                # 바코드가 있으면 새 항목
+                if barcode:
+                    if current_item:
+                        yield current_item
+                    
+                    current_item = {
+                        'row': row_idx,
+                        'last_row': row_idx,
+                        'barcode': str(barcode).strip(),
+                        'name': str(name).strip() if name else ''
+                    }
+                    
+                    # 추가 컬럼 읽기 (수식은 계산된 값)
+                    for key, col_idx in extra:
+                        current_item[key] = self._to_number(value_of(evaluator, col_idx))
+                
+                # 이름만 있으면 이전 항목에 추가 (여러 행에 걸친 이름)
+                elif current_item and name:
+                    current_item['name'] += ' ' + str(name).strip()
+                    current_item['last_row'] = row_idx
+            
+            if current_item:
+                yield current_item
+        finally:
+            wb.close()
+            if failed:
+                row, col, reason = failed[0]
+                logger.warning(
+                    f'{self.title}: 수식 {len(failed)}개를 계산하지 못해 빈 값으로 처리 '
+                    f'(첫 번째: {row}행 {col}열, {reason})'
+                )
+
+
+class ExcelRowIndex(models.Model):
+    """엑셀 문서의 바코드 → 행 인덱스"""
+    
+    document = models.ForeignKey(
+        ExcelMasterDocument,
+        on_delete=models.CASCADE,
+        related_name='row_index',
+        verbose_name=_('문서')
+    )
+    barcode = models.CharField(_('바코드'), max_length=100)
+    row = models.IntegerField(_('행'))
+    last_row = models.IntegerField(_('마지막행'))  # 여러 행에 걸친 이름의 마지막 행
+    
+    class Meta:
+        db_table = 'excel_row_index'
+        verbose_name = _('엑셀 행 인덱스')
+        verbose_name_plural = _('엑셀 행 인덱스')
+        unique_together = ['document', 'barcode']
+    
+    def __str__(self):
+        return f"{self.barcode} → {self.row}"
+
+
+class ExcelSyncOutbox(models.Model):
+    """엑셀 동기화 대기열 (재고 거래와 같은 DB 트랜잭션에서 기록)"""
+    
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('대기')
+        DONE = 'done', _('완료')
+        SKIPPED = 'skipped', _('건너뜀')
+        FAILED = 'failed', _('실패')
+    
+    document = models.ForeignKey(
+        ExcelMasterDocument,
+        on_delete=models.CASCADE,
+        related_name='sync_outbox',
+        verbose_name=_('문서')
+    )
+    stock_transaction = models.ForeignKey(
+        StockTransaction,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='excel_sync_entries',
+        verbose_name=_('재고 거래')
+    )
+    barcode = models.CharField(_('바코드'), max_length=100)
+    operation = models.CharField(_('작업'), max_length=20)  # in, out
+    quantity = models.DecimalField(_('수량'), max_digits=12, decimal_places=2)
+    
+    status = models.CharField(
+        _('상태'),
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.IntegerField(_('시도횟수'), default=0)
+    last_error = models.TextField(_('오류내용'), blank=True)
+    
+    created_at = models.DateTimeField(_('등록일시'), auto_now_add=True)
+    processed_at = models.DateTimeField(_('처리일시'), null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name=_('작업자')
+    )
+    
+    class Meta:
+        db_table = 'excel_sync_outbox'
+        verbose_name = _('엑셀 동기화 대기열')
+        verbose_name_plural = _('엑셀 동기화 대기열')
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['document', 'status', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.barcode} - {self.operation} {self.quantity} ({self.status})"
 
 
 class ExcelUpdateLog(models.Model):
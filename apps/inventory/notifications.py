@@ -0,0 +1,200 @@
+"""
+재고 알림 메일 (대기열 + 수신자별 요약)
+재고 거래 경로에서는 NotificationOutbox에 기록만 하고 (SMTP 없음),
+Celery 작업이 수신자별로 요약 창(ALERT_DIGEST_WINDOW) 동안의 알림을 한 통으로 묶어
+하나의 SMTP 연결로 발송
+
+- 수신자의 가장 오래된 대기 알림이 창 길이만큼 지나면 그 수신자의 대기 알림 전체를 한 통으로
+- 발송 전에 해결된 알림(창 안에 재입고된 품목)은 건너뜀
+- 발송 실패 시 지수 백오프로 재시도, NOTIFICATION_MAX_ATTEMPTS 초과 시 실패 처리
+- 창이 끝난 뒤 발송은 예약 작업(countdown)과 매분 주기 작업(Celery beat)에 의존
+- CELERY_TASK_ALWAYS_EAGER(개발 환경, 브로커/beat 없음)에서는 창 없이 커밋 직후 바로 발송
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import NotificationOutbox
+
+logger = logging.getLogger('hpe')
+
+ALERT_TYPES = ('low_stock', 'out_of_stock')
+
+
+def _eager():
+    """Celery 작업이 호출 즉시 실행되는 모드 (countdown 무시, beat 없음)"""
+    return getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+def digest_window():
+    """요약 창 길이 (초, eager 모드에서는 0 - 기다렸다 보낼 작업이 없음)"""
+    if _eager():
+        return 0
+    return getattr(settings, 'ALERT_DIGEST_WINDOW', 600)
+
+
+def enqueue_alert_notifications(alerts):
+    """
+    알림 메일 대기열 등록 (수신자 조회 1회 + bulk_create 1회)
+    호출자의 DB 트랜잭션 안에서 호출하면 알림과 함께 커밋/롤백
+
+    Returns:
+        int: 등록 건수
+    """
+    from apps.accounts.models import User
+
+    alerts = [alert for alert in alerts if alert.alert_type in ALERT_TYPES]
+    if not alerts or not getattr(settings, 'SAFETY_STOCK_ALERT_ENABLED', True):
+        return 0
+
+    # 관리자 및 매니저에게 알림
+    recipients = list(
+        User.objects.filter(role__in=['admin', 'manager'], is_active=True)
+        .exclude(email='')
+        .values_list('id', 'email')
+    )
+    if not recipients:
+        return 0
+
+    entries = NotificationOutbox.objects.bulk_create([
+        NotificationOutbox(alert_id=alert.id, recipient_id=user_id, email=email)
+        for alert in alerts
+        for user_id, email in recipients
+    ])
+    transaction.on_commit(schedule_digest)
+    return len(entries)
+
+
+def schedule_digest():
+    """창이 끝날 때 요약 발송 예약 (창마다 1회, 브로커 장애 시 주기 작업이 처리)"""
+    from .tasks import send_alert_digests
+
+    if _eager():
+        # 예약 없이 바로 실행되므로 중복 방지 키를 남기지 않음 (남기면 창 동안 발송되지 않음)
+        send_alert_digests.delay()
+        return
+
+    window = digest_window()
+    if not cache.add('alert-digest-scheduled', True, window):
+        return
+    try:
+        send_alert_digests.apply_async(countdown=window)
+    except Exception as e:
+        cache.delete('alert-digest-scheduled')
+        logger.warning(f'알림 요약 발송 예약 실패: {str(e)}')
+
+
+def _digest_message(email, entries):
+    """수신자 1명의 요약 메일"""
+    from django.core.mail import EmailMessage
+
+    alerts = [entry.alert for entry in entries]
+    if len(alerts) == 1:
+        subject = f'[HPE 재고관리] {alerts[0].get_alert_type_display()} 알림'
+    else:
+        subject = f'[HPE 재고관리] 재고 알림 {len(alerts)}건'
+
+    lines = [f'재고 알림이 발생했습니다. ({len(alerts)}건)', '']
+    for alert in alerts:
+        item = alert.item
+        lines.extend([
+            f'[{alert.get_alert_type_display()}] {item.item_code} {item.name}',
+            f'  현재수량: {alert.current_quantity} {item.unit} / 안전재고: {alert.threshold_quantity} {item.unit}',
+        ])
+    lines.extend(['', '시스템에서 확인해주세요.'])
+
+    return EmailMessage(
+        subject=subject,
+        body='\n'.join(lines),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email],
+    )
+
+
+def _record_failure(entries, error, now):
+    """발송 실패 기록 (시도 횟수에 따라 다음 시도 지연, 최대 횟수 초과 시 실패 처리)"""
+    max_attempts = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+    for entry in entries:
+        entry.attempts += 1
+        entry.last_error = str(error)[:2000]
+        if entry.attempts >= max_attempts:
+            entry.status = NotificationOutbox.Status.FAILED
+            entry.next_attempt_at = None
+        else:
+            entry.next_attempt_at = now + timedelta(seconds=min(60 * 2 ** entry.attempts, 3600))
+    NotificationOutbox.objects.bulk_update(entries, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def send_due_digests(now=None):
+    """
+    창이 지난 수신자별 요약 메일 발송 (SMTP 연결 1개 재사용)
+
+    Returns:
+        dict: recipients, sent, skipped, failed (대기열 항목 수)
+    """
+    from django.core.mail import get_connection
+    from django.db.models import Min, Q
+
+    now = now or timezone.now()
+    result = {'recipients': 0, 'sent': 0, 'skipped': 0, 'failed': 0}
+
+    pending = NotificationOutbox.objects.filter(
+        Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+        status=NotificationOutbox.Status.PENDING,
+    )
+    due = list(
+        pending.order_by().values('email')
+        .annotate(first=Min('created_at'))
+        .filter(first__lte=now - timedelta(seconds=digest_window()))
+        .values_list('email', flat=True)
+    )
+    if not due:
+        return result
+
+    result['skipped'] = pending.filter(email__in=due, alert__is_resolved=True).update(
+        status=NotificationOutbox.Status.SKIPPED
+    )
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning(f'알림 메일 SMTP 연결 실패: {str(e)}')
+        entries = list(pending.filter(email__in=due))
+        _record_failure(entries, e, now)
+        result['failed'] = len(entries)
+        return result
+
+    try:
+        for email in due:
+            with transaction.atomic():
+                # 동시에 실행된 작업과 같은 항목을 중복 발송하지 않도록 잠금 (잠긴 행은 건너뜀)
+                entries = list(
+                    pending.filter(email=email)
+                    .select_related('alert__item')
+                    .select_for_update(skip_locked=True, of=('self',))
+                )
+                if not entries:
+                    continue
+
+                try:
+                    connection.send_messages([_digest_message(email, entries)])
+                except Exception as e:
+                    logger.warning(f'알림 메일 발송 실패 ({email}): {str(e)}')
+                    _record_failure(entries, e, now)
+                    result['failed'] += len(entries)
+                    continue
+
+                NotificationOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+                    status=NotificationOutbox.Status.SENT, sent_at=now
+                )
+                result['recipients'] += 1
+                result['sent'] += len(entries)
+    finally:
+        connection.close()
+
+    return result
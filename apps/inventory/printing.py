@@ -0,0 +1,145 @@
+"""
+라벨 프린터 출력 대기열 (ZPL, RAW TCP 9100)
+요청 경로에서는 LabelPrintJob에 기록만 하고, Celery 작업이 프린터별로 등록 순서대로 전송
+
+- 프린터 설정: LABEL_PRINTERS = {'이름': {'host', 'port'(9100), 'dpi', 'label_width', 'label_height'}}
+- 같은 프린터에는 한 번에 하나의 작업만 전송 (캐시 잠금) - 작업 간 라벨이 섞이지 않음
+- 전송 실패 시 그 프린터의 이후 작업은 보류하고 지수 백오프로 재시도,
+  LABEL_PRINT_MAX_ATTEMPTS 초과 시 실패 처리 (관리자 화면에서 재시도)
+"""
+import logging
+import socket
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LabelPrintJob
+
+logger = logging.getLogger('hpe')
+
+LOCK_TIMEOUT = 300  # 전송 중 표시 (작업이 비정상 종료되면 이후 재시도 허용)
+
+
+def printers():
+    return getattr(settings, 'LABEL_PRINTERS', {})
+
+
+def get_printer(name=None):
+    """
+    프린터 설정 (이름이 없으면 LABEL_PRINTER_DEFAULT 또는 유일한 프린터)
+
+    Raises:
+        ValueError: 설정되지 않은 프린터
+    """
+    configured = printers()
+    name = name or getattr(settings, 'LABEL_PRINTER_DEFAULT', None)
+    if not name and len(configured) == 1:
+        name = next(iter(configured))
+    if not name or name not in configured:
+        raise ValueError(f'설정되지 않은 라벨 프린터입니다: {name or "(기본값 없음)"}')
+    return name, {'port': 9100, **configured[name]}
+
+
+def send_raw(host, port, payload, timeout=None):
+    """RAW 소켓 전송 (프린터는 연결 종료 시 작업 완료로 처리)"""
+    timeout = timeout or getattr(settings, 'LABEL_PRINT_TIMEOUT', 10)
+    data = payload.encode('utf-8') if isinstance(payload, str) else payload
+    with socket.create_connection((host, int(port)), timeout=timeout) as sock:
+        sock.sendall(data)
+        sock.shutdown(socket.SHUT_WR)
+
+
+def enqueue_print_job(printer, payload, label_count, user=None):
+    """
+    출력 작업 등록 (커밋 후 해당 프린터 대기열 처리 예약)
+
+    Returns:
+        LabelPrintJob
+    """
+    job = LabelPrintJob.objects.create(
+        printer=printer,
+        payload=payload,
+        label_count=label_count,
+        created_by=user,
+    )
+    transaction.on_commit(lambda: _schedule(printer))
+    return job
+
+
+def _schedule(printer):
+    from .tasks import process_label_print_queue
+
+    try:
+        process_label_print_queue.delay(printer)
+    except Exception as e:
+        # 브로커 장애 시 주기 작업이 처리
+        logger.warning(f'라벨 출력 작업 예약 실패: {str(e)}')
+
+
+def _record_failure(job, error, now):
+    """전송 실패 기록 (시도 횟수에 따라 다음 시도 지연, 최대 횟수 초과 시 실패 처리)"""
+    max_attempts = getattr(settings, 'LABEL_PRINT_MAX_ATTEMPTS', 5)
+    job.attempts += 1
+    job.last_error = str(error)[:2000]
+    if job.attempts >= max_attempts:
+        job.status = LabelPrintJob.Status.FAILED
+        job.next_attempt_at = None
+    else:
+        job.next_attempt_at = now + timedelta(seconds=min(10 * 2 ** job.attempts, 600))
+    job.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def process_print_queue(printer=None, now=None):
+    """
+    대기 중인 출력 작업 전송 (프린터별 등록 순서, 프린터당 동시 전송 1개)
+
+    Returns:
+        dict: printers, sent, failed, deferred (백오프 대기 또는 다른 작업자가 전송 중)
+    """
+    now = now or timezone.now()
+    result = {'printers': 0, 'sent': 0, 'failed': 0, 'deferred': 0}
+
+    pending = LabelPrintJob.objects.filter(status=LabelPrintJob.Status.PENDING)
+    names = [printer] if printer else list(pending.order_by().values_list('printer', flat=True).distinct())
+
+    for name in names:
+        lock = f'label-printer:{name}'
+        if not cache.add(lock, True, LOCK_TIMEOUT):
+            result['deferred'] += pending.filter(printer=name).count()
+            continue
+
+        try:
+            config = printers().get(name)
+            jobs = list(pending.filter(printer=name).order_by('id'))
+            if not jobs:
+                continue
+            result['printers'] += 1
+
+            for index, job in enumerate(jobs):
+                # 앞 작업이 백오프 중이면 순서를 지키기 위해 이후 작업도 보류
+                if job.next_attempt_at and job.next_attempt_at > now:
+                    result['deferred'] += len(jobs) - index
+                    break
+
+                try:
+                    if config is None:
+                        raise ValueError(f'설정되지 않은 라벨 프린터입니다: {name}')
+                    send_raw(config['host'], config.get('port', 9100), job.payload)
+                except (OSError, ValueError) as e:
+                    logger.warning(f'라벨 출력 실패 ({name} #{job.id}): {str(e)}')
+                    _record_failure(job, e, now)
+                    result['failed'] += 1
+                    result['deferred'] += len(jobs) - index - 1
+                    break
+
+                LabelPrintJob.objects.filter(id=job.id, status=LabelPrintJob.Status.PENDING).update(
+                    status=LabelPrintJob.Status.SENT, sent_at=timezone.now(), attempts=job.attempts + 1
+                )
+                result['sent'] += 1
+        finally:
+            cache.delete(lock)
+
+    return result
@@ -0,0 +1,124 @@
+"""
+QR 페이로드 (간결형, 버전 포함)
+기존 JSON 페이로드({"code", "item_code", "name", ...})는 한글 품목명 때문에 QR 버전이 커져
+(예: 버전 9, 53x53 모듈) 휴대폰 카메라 인식이 느리고 거리에서 잘 안 읽힘
+→ 접두어 + 바코드만 넣어 영숫자 모드(대문자/숫자/-:./ 등)로 인코딩 (대부분 버전 1~2)
+
+- 형식: 'HP1:<바코드>' 또는 'HP1.<필드>:<바코드>'
+  필드는 (태그 1바이트, 길이 1바이트, UTF-8 값) 묶음을 base32(패딩 없음)로 - 영숫자 모드 유지
+- 포함할 필드: QR_PAYLOAD_FIELDS (기본 없음 - 품목 정보는 스캔 시 바코드로 조회)
+- QR_PAYLOAD_FORMAT = 'json'이면 기존 JSON 형식으로 생성 (구형 스캐너 앱 대비)
+- 스캔 값 해석은 간결형/기존 JSON/바코드 그대로 모두 지원
+- QR 버전/오류정정: L 기준 최소 버전을 고른 뒤 그 버전에 들어가는 가장 높은 오류정정 수준 사용
+"""
+import base64
+import json
+from functools import lru_cache
+
+from django.conf import settings
+
+PREFIX = 'HP1'
+FIELD_TAGS = {'item_code': 1, 'unit': 2, 'name': 3}
+TAG_FIELDS = {tag: field for field, tag in FIELD_TAGS.items()}
+ERROR_LEVELS = ('L', 'M', 'Q', 'H')
+
+
+def _pack(fields):
+    data = bytearray()
+    for field, value in fields.items():
+        encoded = str(value).encode('utf-8')[:255]
+        data += bytes((FIELD_TAGS[field], len(encoded))) + encoded
+    return base64.b32encode(bytes(data)).decode('ascii').rstrip('=')
+
+
+def _unpack(text):
+    data = base64.b32decode(text + '=' * (-len(text) % 8))
+    fields = {}
+    index = 0
+    while index + 2 <= len(data):
+        tag, length = data[index], data[index + 1]
+        value = data[index + 2:index + 2 + length]
+        index += 2 + length
+        if tag in TAG_FIELDS:
+            fields[TAG_FIELDS[tag]] = value.decode('utf-8', errors='replace')
+    return fields
+
+
+def encode(code, additional_info=None):
+    """
+    바코드 + 추가 정보 → QR 페이로드
+
+    Args:
+        additional_info: {'item_code', 'name', 'unit', ...} - QR_PAYLOAD_FIELDS에 있는 것만 포함
+    """
+    if getattr(settings, 'QR_PAYLOAD_FORMAT', 'compact') == 'json':
+        if additional_info:
+            return json.dumps({'code': code, **additional_info}, ensure_ascii=False)
+        return code
+
+    included = getattr(settings, 'QR_PAYLOAD_FIELDS', ())
+    fields = {
+        field: value for field, value in (additional_info or {}).items()
+        if field in included and field in FIELD_TAGS and value
+        and not (field == 'item_code' and value == code)  # 대부분 바코드와 같음
+    }
+    if fields:
+        return f'{PREFIX}.{_pack(fields)}:{code}'
+    return f'{PREFIX}:{code}'
+
+
+def decode(text):
+    """
+    스캔 값 → (바코드, 추가 정보, 형식)
+    형식: 'compact' (HP1), 'json' (기존 JSON), 'plain' (바코드 그대로 - 1D 바코드 등)
+    """
+    text = (text or '').strip()
+
+    if text.startswith(PREFIX + ':'):
+        return text[len(PREFIX) + 1:], {}, 'compact'
+    if text.startswith(PREFIX + '.') and ':' in text:
+        packed, _, code = text[len(PREFIX) + 1:].partition(':')
+        try:
+            return code, _unpack(packed), 'compact'
+        except ValueError:
+            pass
+
+    if text.startswith('{'):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and data.get('code'):
+            info = {key: value for key, value in data.items() if key != 'code'}
+            return str(data['code']).strip(), info, 'json'
+
+    return text, {}, 'plain'
+
+
+def scanned_barcode(text):
+    """스캔 값에서 바코드만 (QR 페이로드가 아니면 그대로)"""
+    return decode(text)[0]
+
+
+@lru_cache(maxsize=4096)
+def qr_options(payload):
+    """
+    (버전, 오류정정 수준) - 최소 버전 + 그 버전에 들어가는 가장 높은 오류정정
+
+    Returns:
+        tuple: (int, 'L'|'M'|'Q'|'H')
+    """
+    import qrcode
+
+    def version(level):
+        qr = qrcode.QRCode(error_correction=getattr(qrcode.constants, f'ERROR_CORRECT_{level}'))
+        qr.add_data(payload)
+        return qr.best_fit()
+
+    smallest = version('L')
+    best = 'L'
+    for level in ERROR_LEVELS[1:]:
+        if version(level) > smallest:
+            break
+        best = level
+    return smallest, best
@@ -0,0 +1,315 @@
+"""
+DB ↔ 엑셀 원장 대사 (Reconciliation)
+- 원장을 한 번 스트리밍하면서 청크 단위 barcode__in 조회로 DB 품목과 비교
+- 결과: DB 누락 / 엑셀 누락 / 수량 불일치
+- 선택적으로 한쪽 기준으로 일괄 보정 (excel → DB: bulk_update/bulk_create, DB → excel: 한 번의 셀 패치)
+- DB 기준 모드(EXCEL_LEDGER_SOURCE='db')에서도 원장 파일을 직접 파싱 (stream_items는 DB 품목을 반환)
+"""
+import logging
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .barcode_resolver import barcode_resolver
+from .excel_materialize import db_source_enabled
+from .models import ExcelMasterDocument, ExcelUpdateLog, InventoryItem
+
+logger = logging.getLogger('hpe')
+
+QUANTITY_FIELDS = ('received', 'issued', 'current')
+
+# 원장 컬럼 → 품목 필드
+ITEM_FIELDS = {
+    'received': 'received_quantity',
+    'issued': 'issued_quantity',
+    'current': 'current_quantity',
+}
+
+# 원장 유형 → 품목 유형 (bulk_create는 save()를 거치지 않으므로 직접 지정)
+ITEM_TYPES = {
+    ExcelMasterDocument.DocType.KS_CERT: InventoryItem.ItemType.KS_CERTIFICATION,
+    ExcelMasterDocument.DocType.MEASUREMENT: InventoryItem.ItemType.MEASUREMENT,
+    ExcelMasterDocument.DocType.PARTS: InventoryItem.ItemType.PARTS,
+    ExcelMasterDocument.DocType.SUPPLIES: InventoryItem.ItemType.SUPPLIES,
+}
+
+_CENT = Decimal('0.01')
+
+
+def _quantity(value):
+    """엑셀/DB 수량을 소수점 2자리 Decimal로 정규화"""
+    try:
+        return Decimal(str(value or 0)).quantize(_CENT)
+    except (InvalidOperation, ValueError):
+        return Decimal('0.00')
+
+
+class LedgerReconciler:
+    """엑셀 원장 1건에 대한 대사"""
+
+    def __init__(self, document, chunk_size=500, file_path=None):
+        self.document = document
+        self.chunk_size = chunk_size
+        self.file_path = file_path  # 지정하면 문서 원장 대신 이 파일과 대사 (업로드 파일)
+        self.prefixes = tuple(
+            prefix for prefix, doc_type in ExcelMasterDocument.BARCODE_PREFIXES
+            if doc_type == document.doc_type
+        )
+        self.tracks_quantity = document.doc_type in ExcelMasterDocument.STOCK_DOC_TYPES
+
+    def _excel_quantities(self, entry):
+        received = _quantity(entry.get('received'))
+        issued = _quantity(entry.get('issued'))
+        # 현재고 열은 파싱 시 수식을 계산한 값 (열이 없으면 입고-출고)
+        current = _quantity(entry['current']) if 'current' in entry else received - issued
+        return {'received': received, 'issued': issued, 'current': current}
+
+    def _compare_chunk(self, chunk, report):
+        """청크 단위로 DB 품목 조회 후 비교 (쿼리 1회)"""
+        found = {
+            row['barcode']: row
+            for row in InventoryItem.objects.filter(
+                barcode__in=[entry['barcode'] for entry in chunk]
+            ).values('id', 'barcode', 'name', *ITEM_FIELDS.values())
+        }
+
+        for entry in chunk:
+            db_item = found.get(entry['barcode'])
+            if db_item is None:
+                report['missing_in_db'].append({
+                    'barcode': entry['barcode'],
+                    'name': entry.get('name', ''),
+                    'row': entry['row'],
+                    **({k: float(v) for k, v in self._excel_quantities(entry).items()}
+                       if self.tracks_quantity else {}),
+                })
+                continue
+
+            if not self.tracks_quantity:
+                continue
+
+            excel = self._excel_quantities(entry)
+            db = {key: _quantity(db_item[field]) for key, field in ITEM_FIELDS.items()}
+            if excel != db:
+                report['drift'].append({
+                    'barcode': entry['barcode'],
+                    'name': entry.get('name', ''),
+                    'row': entry['row'],
+                    'item_id': str(db_item['id']),
+                    'excel': {k: float(v) for k, v in excel.items()},
+                    'db': {k: float(v) for k, v in db.items()},
+                })
+
+    def run(self):
+        """
+        대사 실행
+
+        Returns:
+            dict: 문서 정보, 건수 요약, missing_in_db, missing_in_excel, drift
+        """
+        started = time.monotonic()
+        report = {
+            'document_id': str(self.document.id),
+            'doc_type': self.document.doc_type,
+            'title': self.document.title,
+            'missing_in_db': [],
+            'missing_in_excel': [],
+            'drift': [],
+        }
+
+        ledger_barcodes = set()
+        duplicates = 0
+        chunk = []
+
+        if self.file_path:
+            entries = self.document.iter_items(self.file_path)
+        elif db_source_enabled():
+            # stream_items()는 DB 품목을 반환하므로 DB끼리 비교하게 됨 - 파일을 직접 파싱
+            entries = self.document.iter_items(self.document.get_file_path())
+        else:
+            entries = self.document.stream_items()
+
+        for entry in entries:
+            barcode = entry['barcode']
+            if not barcode.startswith(self.prefixes):
+                continue  # 머리글/비고 등 원장 유형과 무관한 행
+            if barcode in ledger_barcodes:
+                duplicates += 1
+                continue
+            ledger_barcodes.add(barcode)
+            chunk.append(entry)
+            if len(chunk) >= self.chunk_size:
+                self._compare_chunk(chunk, report)
+                chunk = []
+        if chunk:
+            self._compare_chunk(chunk, report)
+
+        # 원장 유형의 DB 품목 중 엑셀에 없는 항목
+        db_items = InventoryItem.objects.filter(is_active=True)
+        prefix_filter = None
+        for prefix in self.prefixes:
+            condition = db_items.filter(barcode__startswith=prefix)
+            prefix_filter = condition if prefix_filter is None else prefix_filter | condition
+        if prefix_filter is not None:
+            for row in prefix_filter.values('id', 'barcode', 'name').iterator(chunk_size=2000):
+                if row['barcode'] not in ledger_barcodes:
+                    report['missing_in_excel'].append({
+                        'barcode': row['barcode'],
+                        'name': row['name'],
+                        'item_id': str(row['id']),
+                    })
+
+        report['summary'] = {
+            'ledger_rows': len(ledger_barcodes),
+            'duplicate_barcodes': duplicates,
+            'missing_in_db': len(report['missing_in_db']),
+            'missing_in_excel': len(report['missing_in_excel']),
+            'drift': len(report['drift']),
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        }
+        return report
+
+    def apply_to_db(self, report, create_missing=False):
+        """
+        엑셀 기준으로 DB 보정
+        - 수량 불일치: bulk_update
+        - DB 누락 (create_missing=True): bulk_create
+        """
+        drift = report['drift']
+        updated = 0
+        created = 0
+        changed = []
+        new_items = []
+        now = timezone.now()
+
+        with transaction.atomic():
+            if drift:
+                items = {
+                    str(pk): item for pk, item in InventoryItem.objects.in_bulk(
+                        [entry['item_id'] for entry in drift]
+                    ).items()
+                }
+                for entry in drift:
+                    item = items.get(entry['item_id'])
+                    if item is None:
+                        continue
+                    for key, field in ITEM_FIELDS.items():
+                        setattr(item, field, Decimal(str(entry['excel'][key])))
+                    item.updated_at = now  # bulk_update는 auto_now를 갱신하지 않음 (DB 원장 버전에 반영)
+                    changed.append(item)
+                InventoryItem.objects.bulk_update(
+                    changed, [*ITEM_FIELDS.values(), 'updated_at'], batch_size=self.chunk_size
+                )
+                updated = len(changed)
+
+            if create_missing and report['missing_in_db']:
+                barcodes = [entry['barcode'] for entry in report['missing_in_db']]
+                # item_code가 이미 사용 중인 항목은 건너뜀 (unique)
+                taken = set(
+                    InventoryItem.objects.filter(item_code__in=barcodes).values_list('item_code', flat=True)
+                )
+                item_type = ITEM_TYPES.get(self.document.doc_type, InventoryItem.ItemType.MATERIAL)
+                for entry in report['missing_in_db']:
+                    if entry['barcode'] in taken:
+                        continue
+                    new_item = InventoryItem(
+                        barcode=entry['barcode'],
+                        item_code=entry['barcode'],
+                        name=entry['name'][:200],
+                        item_type=item_type,
+                        unit='EA',
+                    )
+                    if self.tracks_quantity:
+                        for key, field in ITEM_FIELDS.items():
+                            setattr(new_item, field, Decimal(str(entry[key])))
+                    new_items.append(new_item)
+                InventoryItem.objects.bulk_create(new_items, batch_size=self.chunk_size)
+                created = len(new_items)
+
+            # bulk_create/bulk_update는 post_save를 보내지 않으므로 바코드 해석 캐시 직접 무효화
+            # (캐시된 '미등록' 결과 때문에 새 품목이 스캔되지 않는 것 방지)
+            barcodes = [item.barcode for item in [*changed, *new_items]]
+            transaction.on_commit(lambda: barcode_resolver.invalidate(barcodes))
+
+        return {'updated': updated, 'created': created}
+
+    def apply_to_excel(self, report, user=None):
+        """
+        DB 기준으로 엑셀 보정 (수량 불일치 행만, 한 번의 저장)
+        엑셀에 없는 품목의 행 추가는 하지 않음
+        """
+        document = self.document
+        columns = document.extra_columns
+        if not report['drift'] or not all(key in columns for key in ('received', 'issued')):
+            return {'updated': 0}
+
+        with document.lock():
+            document.ensure_row_index()
+            rows = dict(
+                document.row_index.filter(
+                    barcode__in=[entry['barcode'] for entry in report['drift']]
+                ).values_list('barcode', 'row')
+            )
+
+            cells = {}
+            logs = []
+            for entry in report['drift']:
+                row = rows.get(entry['barcode'])
+                if row is None:
+                    continue
+                for key in QUANTITY_FIELDS:
+                    if key in columns:
+                        cells[(row, columns[key])] = entry['db'][key]
+                logs.append(ExcelUpdateLog(
+                    document=document,
+                    barcode=entry['barcode'],
+                    action='reconcile',
+                    updates=entry['db'],
+                    previous_values=entry['excel'],
+                    created_by=user,
+                ))
+
+            if cells:
+                document.write_cells(cells, keep_formulas=True)
+                document._mark_index_current()
+            ExcelUpdateLog.objects.bulk_create(logs)
+
+        return {'updated': len(logs)}
+
+
+def reconcile_ledgers(doc_types=None, apply=None, create_missing=False, user=None, chunk_size=500):
+    """
+    원장 대사 실행
+
+    Args:
+        doc_types: 대상 문서 유형 목록 (None이면 전체)
+        apply: None(보고만) / 'db' (엑셀 기준으로 DB 보정) / 'excel' (DB 기준으로 엑셀 보정)
+        create_missing: apply='db'일 때 DB에 없는 원장 항목 생성
+
+    Returns:
+        list: 문서별 대사 결과
+    """
+    documents = ExcelMasterDocument.objects.all()
+    if doc_types:
+        documents = documents.filter(doc_type__in=doc_types)
+
+    reports = []
+    for document in documents:
+        if not document.get_file_path().exists():
+            logger.warning(f'대사 대상 엑셀 파일 없음: {document.title}')
+            continue
+
+        reconciler = LedgerReconciler(document, chunk_size=chunk_size)
+        report = reconciler.run()
+
+        if apply == 'db':
+            report['applied'] = reconciler.apply_to_db(report, create_missing=create_missing)
+        elif apply == 'excel':
+            report['applied'] = reconciler.apply_to_excel(report, user=user)
+
+        report['checked_at'] = timezone.now().isoformat()
+        reports.append(report)
+
+    return reports
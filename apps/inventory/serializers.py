@@ -9,6 +9,15 @@ from .models import (
 )
 
 
+class ScannedBarcodeField(serializers.CharField):
+    """스캔 값 필드 (QR 페이로드면 바코드만 추출 - 간결형 HP1:/기존 JSON 모두 지원)"""
+    
+    def to_internal_value(self, data):
+        from .qr_payload import scanned_barcode
+        
+        return scanned_barcode(super().to_internal_value(data))
+
+
 class WarehouseSerializer(serializers.ModelSerializer):
     """창고 시리얼라이저"""
     
@@ -185,12 +194,14 @@ class StockInSerializer(serializers.Serializer):
     """입고 시리얼라이저 (바코드 기반) - 자동 품목 생성"""
     
     item_id = serializers.UUIDField(required=False, allow_null=True)
-    barcode = serializers.CharField(required=False, allow_blank=True)
+    barcode = ScannedBarcodeField(required=False, allow_blank=True)
     quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0.01)
     location_id = serializers.IntegerField(required=False, allow_null=True)
     reference_number = serializers.CharField(required=False, allow_blank=True)
     remarks = serializers.CharField(required=False, allow_blank=True)
     scanned_barcode = serializers.CharField(required=False, allow_blank=True)
+    scan_device = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    idempotency_key = serializers.CharField(required=False, allow_blank=True, max_length=100)
     
     def validate(self, attrs):
         """item_id 또는 barcode 중 하나는 필수, 새 바코드면 자동 생성"""
@@ -227,12 +238,14 @@ class StockOutSerializer(serializers.Serializer):
     """출고 시리얼라이저 (바코드 기반)"""
     
     item_id = serializers.UUIDField(required=False, allow_null=True)
-    barcode = serializers.CharField(required=False, allow_blank=True)
+    barcode = ScannedBarcodeField(required=False, allow_blank=True)
     quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0.01)
     location_id = serializers.IntegerField(required=False, allow_null=True)
     reference_number = serializers.CharField(required=False, allow_blank=True)
     remarks = serializers.CharField(required=False, allow_blank=True)
     scanned_barcode = serializers.CharField(required=False, allow_blank=True)
+    scan_device = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    idempotency_key = serializers.CharField(required=False, allow_blank=True, max_length=100)
     
     def validate(self, attrs):
         """item_id 또는 barcode 중 하나는 필수"""
@@ -271,13 +284,139 @@ class StockAdjustSerializer(serializers.Serializer):
     reason = serializers.CharField()
 
 
+class StockBatchLineSerializer(serializers.Serializer):
+    """일괄 입출고 한 줄"""
+    
+    item_id = serializers.UUIDField(required=False, allow_null=True)
+    barcode = ScannedBarcodeField(required=False, allow_blank=True)
+    transaction_type = serializers.ChoiceField(choices=['in', 'out', 'adjust'])
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    location_id = serializers.IntegerField(required=False, allow_null=True)
+    reference_number = serializers.CharField(required=False, allow_blank=True)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    scanned_barcode = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        """item_id 또는 barcode 중 하나는 필수, 입출고 수량은 0보다 커야 함"""
+        if not attrs.get('item_id') and not attrs.get('barcode'):
+            raise serializers.ValidationError('item_id 또는 barcode 중 하나는 필수입니다.')
+        if attrs['transaction_type'] != 'adjust' and attrs['quantity'] <= 0:
+            raise serializers.ValidationError('수량은 0보다 커야 합니다.')
+        return attrs
+
+
+class StockBatchSerializer(serializers.Serializer):
+    """일괄 입출고 시리얼라이저"""
+    
+    lines = StockBatchLineSerializer(many=True, allow_empty=False)
+    mode = serializers.ChoiceField(
+        choices=['all_or_nothing', 'partial'],
+        default='all_or_nothing'
+    )
+    
+    def validate_lines(self, value):
+        if len(value) > 1000:
+            raise serializers.ValidationError('한 번에 최대 1000줄까지 처리할 수 있습니다.')
+        return value
+
+
 class BarcodeScanSerializer(serializers.Serializer):
     """바코드 스캔 시리얼라이저"""
     
-    barcode = serializers.CharField(max_length=100)
+    barcode = ScannedBarcodeField(max_length=100)
     scan_type = serializers.ChoiceField(choices=['item', 'location', 'any'], default='any')
 
 
+class BarcodeBulkScanSerializer(serializers.Serializer):
+    """바코드 일괄 조회 시리얼라이저 (재고 실사 등)"""
+    
+    barcodes = serializers.ListField(
+        child=ScannedBarcodeField(max_length=100),
+        allow_empty=False,
+        max_length=1000
+    )
+    
+    def validate_barcodes(self, value):
+        # 공백 제거 + 중복 제거 (순서 유지)
+        return list(dict.fromkeys(barcode.strip() for barcode in value if barcode.strip()))
+
+
+class LabelSheetSerializer(serializers.Serializer):
+    """라벨 용지 PDF 시리얼라이저 (용지 규격 + 개별 치수 덮어쓰기, mm)"""
+    
+    item_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=5000
+    )
+    label_type = serializers.ChoiceField(choices=['barcode', 'qr', 'both'], default='both')
+    stock = serializers.CharField(default='L7160')
+    label_width = serializers.FloatField(required=False)
+    label_height = serializers.FloatField(required=False)
+    columns = serializers.IntegerField(required=False)
+    rows = serializers.IntegerField(required=False)
+    margin_top = serializers.FloatField(required=False)
+    margin_left = serializers.FloatField(required=False)
+    gap_x = serializers.FloatField(required=False)
+    gap_y = serializers.FloatField(required=False)
+    copies = serializers.IntegerField(min_value=1, max_value=100, default=1)
+    skip = serializers.IntegerField(min_value=0, default=0)
+    
+    def validate(self, attrs):
+        from .label_sheet import LABEL_FIELDS, LabelStock
+        
+        try:
+            attrs['layout'] = LabelStock.from_params(
+                attrs['stock'], **{field: attrs.get(field) for field in LABEL_FIELDS}
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({'stock': str(e)})
+        attrs['item_ids'] = list(dict.fromkeys(attrs['item_ids']))
+        return attrs
+
+
+class LabelPrintSerializer(serializers.Serializer):
+    """ZPL 라벨 출력 시리얼라이저 (output=queue: 프린터 대기열, zpl: ZPL 파일 반환)"""
+    
+    item_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=5000
+    )
+    label_type = serializers.ChoiceField(choices=['barcode', 'qr', 'both'], default='both')
+    copies = serializers.IntegerField(min_value=1, max_value=100, default=1)
+    printer = serializers.CharField(required=False, allow_blank=True, max_length=50)
+    output = serializers.ChoiceField(choices=['queue', 'zpl'], default='queue')
+    
+    def validate(self, attrs):
+        from .printing import get_printer
+        
+        attrs['item_ids'] = list(dict.fromkeys(attrs['item_ids']))
+        attrs['printer_config'] = None
+        if attrs['output'] == 'queue' or attrs.get('printer'):
+            try:
+                attrs['printer'], attrs['printer_config'] = get_printer(attrs.get('printer'))
+            except ValueError as e:
+                raise serializers.ValidationError({'printer': str(e)})
+        return attrs
+
+
+class ScanCommitSerializer(serializers.Serializer):
+    """스캔 즉시 입출고 시리얼라이저"""
+    
+    barcode = ScannedBarcodeField(max_length=100)
+    operation = serializers.ChoiceField(choices=['in', 'out'])
+    quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0.01, default=1)
+    location_id = serializers.IntegerField(required=False, allow_null=True)
+    reference_number = serializers.CharField(required=False, allow_blank=True)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    scan_device = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    idempotency_key = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    
+    def validate_barcode(self, value):
+        return value.strip()
+
+
 class StockAlertSerializer(serializers.ModelSerializer):
     """재고 알림 시리얼라이저"""
     
@@ -330,6 +469,31 @@ class InventoryCountItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['system_quantity', 'difference']
 
 
+class InventoryCountEntrySerializer(serializers.Serializer):
+    """실사 수량 한 줄"""
+    
+    item_id = serializers.UUIDField(required=False, allow_null=True)
+    barcode = ScannedBarcodeField(required=False, allow_blank=True)
+    counted_quantity = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+    remarks = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate(self, attrs):
+        if not attrs.get('item_id') and not attrs.get('barcode'):
+            raise serializers.ValidationError('item_id 또는 barcode 중 하나는 필수입니다.')
+        return attrs
+
+
+class InventoryCountBulkSerializer(serializers.Serializer):
+    """실사 수량 일괄 입력 시리얼라이저 (스캐너/엑셀 업로드)"""
+    
+    counts = InventoryCountEntrySerializer(many=True, allow_empty=False)
+    
+    def validate_counts(self, value):
+        if len(value) > 20000:
+            raise serializers.ValidationError('한 번에 최대 20000줄까지 입력할 수 있습니다.')
+        return value
+
+
 class DashboardStatsSerializer(serializers.Serializer):
     """대시보드 통계 시리얼라이저"""
     
@@ -3,6 +3,7 @@
 """
 from rest_framework import serializers
 from .models import ExcelMasterDocument, ExcelUpdateLog
+from .serializers import ScannedBarcodeField
 
 
 class ExcelMasterDocumentSerializer(serializers.ModelSerializer):
@@ -43,7 +44,7 @@ class ExcelUpdateLogSerializer(serializers.ModelSerializer):
 
 class BarcodeScanSerializer(serializers.Serializer):
     """바코드 스캔 Serializer"""
-    barcode = serializers.CharField(required=True, max_length=100)
+    barcode = ScannedBarcodeField(required=True, max_length=100)
     action = serializers.ChoiceField(
         choices=['scan', 'stock_in', 'stock_out'],
         default='scan'
@@ -54,6 +55,9 @@ class BarcodeScanSerializer(serializers.Serializer):
         min_value=0
     )
     remarks = serializers.CharField(required=False, allow_blank=True, max_length=500)
+    name = serializers.CharField(required=False, allow_blank=True, max_length=200)  # 새 항목 추가 시 품목명
+    scan_device = serializers.CharField(required=False, allow_blank=True, max_length=100)
+    idempotency_key = serializers.CharField(required=False, allow_blank=True, max_length=100)
     
     def validate_barcode(self, value):
         """바코드 형식 검증"""
@@ -74,3 +78,39 @@ class BarcodeScanSerializer(serializers.Serializer):
         if value <= 0:
             raise serializers.ValidationError('수량은 0보다 커야 합니다.')
         return value
+
+
+class NewLedgerItemSerializer(serializers.Serializer):
+    """원장 새 항목 Serializer (PRT/SUP)"""
+    barcode = serializers.CharField(required=True, max_length=100)
+    name = serializers.CharField(required=False, allow_blank=True, max_length=200)
+    quantity = serializers.DecimalField(
+        max_digits=12, decimal_places=2,
+        required=False, default=0,
+        min_value=0
+    )
+    
+    def validate_barcode(self, value):
+        """PRT/SUP 바코드만 행 추가 가능"""
+        value = value.strip().upper()
+        
+        supported_patterns = ['HP-PRT-', 'HP-SUP-']
+        
+        if not any(value.startswith(pattern) for pattern in supported_patterns):
+            raise serializers.ValidationError(
+                f'새 항목은 {", ".join(supported_patterns)} 바코드만 추가할 수 있습니다.'
+            )
+        
+        return value
+
+
+class AppendItemsSerializer(serializers.Serializer):
+    """원장 새 항목 일괄 추가 Serializer (입고 세션 단위)"""
+    items = NewLedgerItemSerializer(many=True, allow_empty=False)
+
+
+class LedgerUploadApplySerializer(serializers.Serializer):
+    """업로드 원장 반영 Serializer"""
+    upload_id = serializers.CharField(required=True, max_length=64)
+    diff_hash = serializers.CharField(required=False, allow_blank=True, max_length=64)  # 미리보기 결과
+    remarks = serializers.CharField(required=False, allow_blank=True, max_length=500)
@@ -1,19 +1,29 @@
 """
-Inventory Services - Barcode Generation
+Inventory Services - Barcode Generation, Reports, Stock Transactions
 """
-import io
 import base64
-import barcode
-from barcode.writer import ImageWriter
-import qrcode
-from qrcode.image.pil import PilImage
-import json
+
+from django.db.models import Func, UUIDField
 
 
 class BarcodeService:
-    """바코드/QR 코드 생성 서비스"""
+    """
+    바코드/QR 코드 생성 서비스
+    이미지는 렌더 캐시(barcode_render)에 한 번만 렌더링하고 변경되지 않는 URL로 반환
+    (inline=True면 기존처럼 data URI)
+    """
+    
+    def _image(self, spec, inline=False):
+        """렌더 사양 → (키, 이미지 src)"""
+        from .barcode_render import render_cache, render_url
+        
+        key = render_cache.ensure(spec)
+        if inline:
+            image_data = base64.b64encode(render_cache.read(key)).decode('utf-8')
+            return key, f'data:image/png;base64,{image_data}'
+        return key, render_url(key)
     
-    def generate_barcode(self, code, label='', barcode_type='code128'):
+    def generate_barcode(self, code, label='', barcode_type='code128', inline=False):
         """
         바코드 생성
         
@@ -21,36 +31,23 @@ class BarcodeService:
             code: 바코드 값
             label: 라벨 텍스트
             barcode_type: 바코드 유형 (code128, ean13, etc.)
+            inline: True면 base64 data URI, False면 렌더 캐시 URL
         
         Returns:
-            dict: 바코드 이미지 데이터 (base64)
+            dict: 바코드 이미지 데이터 (image: URL 또는 data URI)
         """
+        from .barcode_render import barcode_spec
+        
         try:
-            # 바코드 클래스 가져오기
-            barcode_class = barcode.get_barcode_class(barcode_type)
-            
-            # 이미지 버퍼
-            buffer = io.BytesIO()
-            
-            # 바코드 생성
-            bc = barcode_class(str(code), writer=ImageWriter())
-            bc.write(buffer, options={
-                'module_width': 0.4,
-                'module_height': 15.0,
-                'font_size': 10,
-                'text_distance': 5.0,
-                'quiet_zone': 6.5,
-            })
-            
-            buffer.seek(0)
-            image_data = base64.b64encode(buffer.read()).decode('utf-8')
+            key, image = self._image(barcode_spec(code, barcode_type), inline)
             
             return {
                 'code': code,
                 'label': label,
                 'type': 'barcode',
                 'format': barcode_type,
-                'image': f'data:image/png;base64,{image_data}',
+                'key': key,
+                'image': image,
             }
             
         except Exception as e:
@@ -61,7 +58,14 @@ class BarcodeService:
                 'error': str(e),
             }
     
-    def generate_qr_code(self, code, additional_info=None, size=10):
+    @staticmethod
+    def qr_payload(code, additional_info=None):
+        """QR 코드 데이터 구성 (간결형 'HP1:<바코드>', 라벨 PDF/ZPL과 공용)"""
+        from .qr_payload import encode
+        
+        return encode(code, additional_info)
+    
+    def generate_qr_code(self, code, additional_info=None, size=10, inline=False):
         """
         QR 코드 생성
         
@@ -69,45 +73,23 @@ class BarcodeService:
             code: QR 코드 값
             additional_info: 추가 정보 (dict)
             size: 박스 크기
+            inline: True면 base64 data URI, False면 렌더 캐시 URL
         
         Returns:
-            dict: QR 코드 이미지 데이터 (base64)
+            dict: QR 코드 이미지 데이터 (image: URL 또는 data URI)
         """
+        from .barcode_render import qr_spec
+        
         try:
-            # QR 코드 데이터 구성
-            if additional_info:
-                qr_data = json.dumps({
-                    'code': code,
-                    **additional_info
-                }, ensure_ascii=False)
-            else:
-                qr_data = code
-            
-            # QR 코드 생성
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_M,
-                box_size=size,
-                border=4,
-            )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            
-            # 이미지 생성
-            img = qr.make_image(fill_color='black', back_color='white')
-            
-            # 버퍼에 저장
-            buffer = io.BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            image_data = base64.b64encode(buffer.read()).decode('utf-8')
+            qr_data = self.qr_payload(code, additional_info)
+            key, image = self._image(qr_spec(qr_data, size), inline)
             
             return {
                 'code': code,
                 'data': qr_data,
                 'type': 'qr',
-                'image': f'data:image/png;base64,{image_data}',
+                'key': key,
+                'image': image,
             }
             
         except Exception as e:
@@ -117,20 +99,22 @@ class BarcodeService:
                 'error': str(e),
             }
     
-    def generate_label(self, item, include_qr=True):
+    def generate_label(self, item, include_qr=True, inline=False):
         """
         품목 라벨 생성 (바코드 + 정보)
         
         Args:
             item: InventoryItem 객체
             include_qr: QR 코드 포함 여부
+            inline: True면 이미지를 data URI로
         
         Returns:
             dict: 라벨 데이터
         """
         barcode_data = self.generate_barcode(
             item.barcode,
-            item.name
+            item.name,
+            inline=inline
         )
         
         label_data = {
@@ -149,19 +133,21 @@ class BarcodeService:
                     'item_code': item.item_code,
                     'name': item.name,
                     'unit': item.unit,
-                }
+                },
+                inline=inline
             )
             label_data['qr_image'] = qr_data.get('image')
         
         return label_data
     
-    def batch_generate_labels(self, items, label_type='barcode'):
+    def batch_generate_labels(self, items, label_type='barcode', inline=False):
         """
-        품목 라벨 일괄 생성
+        품목 라벨 일괄 생성 (같은 이미지는 렌더 캐시에서 재사용)
         
         Args:
             items: InventoryItem 목록
             label_type: 'barcode', 'qr', 'both'
+            inline: True면 이미지를 data URI로
         
         Returns:
             list: 라벨 데이터 목록
@@ -178,19 +164,68 @@ class BarcodeService:
             }
             
             if label_type in ['barcode', 'both']:
-                barcode_data = self.generate_barcode(item.barcode, item.name)
+                barcode_data = self.generate_barcode(item.barcode, item.name, inline=inline)
                 label['barcode_image'] = barcode_data.get('image')
             
             if label_type in ['qr', 'both']:
                 qr_data = self.generate_qr_code(
                     item.barcode,
-                    {'item_code': item.item_code, 'name': item.name}
+                    {'item_code': item.item_code, 'name': item.name},
+                    inline=inline
                 )
                 label['qr_image'] = qr_data.get('image')
             
             labels.append(label)
         
         return labels
+    
+    def label_sheet(self, items, stock, label_type='both', copies=1, skip=0):
+        """
+        라벨 용지 PDF 스트림 (바코드/QR 벡터, 페이지 묶음 병렬 렌더링)
+        
+        Args:
+            items: InventoryItem 목록 (인쇄 순서)
+            stock: label_sheet.LabelStock
+        
+        Returns:
+            generator: PDF bytes 조각
+        """
+        from .label_sheet import stream_label_sheet
+        
+        labels = [self.label_fields(item) for item in items]
+        return stream_label_sheet(labels, stock, label_type, copies, skip)
+    
+    def label_fields(self, item):
+        """라벨 출력 항목 (PDF/ZPL 공용 - generate_label과 같은 품목 필드)"""
+        return {
+            'item_code': item.item_code,
+            'barcode': item.barcode,
+            'name': item.name,
+            'specification': item.specification,
+            'unit': item.unit,
+            'qr_data': self.qr_payload(
+                item.barcode,
+                {'item_code': item.item_code, 'name': item.name}
+            ),
+        }
+    
+    def generate_zpl(self, items, label_type='both', copies=1, zpl_format=None):
+        """
+        감열 라벨 프린터용 ZPL (바코드/QR은 프린터가 직접 생성)
+        
+        Args:
+            items: InventoryItem 목록 (출력 순서)
+            zpl_format: zpl.ZplFormat (프린터 dpi/라벨 크기, 기본 203dpi 60x40mm)
+        
+        Returns:
+            str: ZPL (라벨마다 ^XA...^XZ)
+        """
+        from .zpl import ZplFormat
+        
+        zpl_format = zpl_format or ZplFormat()
+        return zpl_format.render_batch(
+            [self.label_fields(item) for item in items], label_type, copies
+        )
 
 
 class InventoryReportService:
@@ -269,5 +304,659 @@ class InventoryReportService:
         return report
 
 
+
+class StockService:
+    """재고 거래 처리 서비스 (재고 수량 변경 + 거래 기록 + 알림)"""
+    
+    # 거래 유형별 수량 변경 (current_quantity 부호, 누계 필드)
+    DELTAS = {
+        'in': (1, 'received_quantity'),
+        'out': (-1, 'issued_quantity'),
+    }
+    
+    def process_transaction(self, item, transaction_type, quantity, user, **kwargs):
+        """
+        거래 처리
+        - 입고/출고: 조건부 UPDATE ... RETURNING 한 문장 (재고 확인과 차감이 원자적)
+        - 조정/이동: SELECT ... FOR UPDATE로 행을 잠근 뒤 처리
+        거래 전/후 수량은 잠긴(갱신된) 행 기준이며, item 인스턴스도 최신 값으로 갱신
+        
+        Returns:
+            StockTransaction
+        Raises:
+            ValueError: 재고 부족
+        """
+        from django.db import transaction
+        from .models import StockTransaction
+        from .excel_sync import enqueue_stock_sync
+        
+        with transaction.atomic():
+            if transaction_type in self.DELTAS:
+                before_qty, after_qty = self._apply_delta(item, transaction_type, quantity)
+            else:
+                before_qty, after_qty = self._apply_locked(item, transaction_type, quantity, kwargs)
+            
+            # 거래 기록 생성
+            stock_transaction = StockTransaction.objects.create(
+                item=item,
+                transaction_type=transaction_type,
+                quantity=abs(quantity) if transaction_type != 'adjust' else abs(after_qty - before_qty),
+                before_quantity=before_qty,
+                after_quantity=after_qty,
+                performed_by=user,
+                **kwargs
+            )
+            
+            # 안전재고 알림 확인
+            self.check_stock_alerts(item)
+            
+            # 엑셀 동기화 대기열 등록 (같은 트랜잭션, 커밋 후 워커가 반영)
+            enqueue_stock_sync(item, transaction_type, quantity, user, stock_transaction)
+        
+        return stock_transaction
+    
+    def _apply_delta(self, item, transaction_type, quantity):
+        """
+        입고/출고 수량 반영 (조건부 UPDATE ... RETURNING, 쿼리 1회)
+        출고는 WHERE current_quantity >= 수량 조건이라 동시 출고로 음수가 되지 않음
+        
+        Returns:
+            tuple: (거래 전 수량, 거래 후 수량)
+        """
+        from decimal import Decimal
+        from django.db import connection
+        from django.utils import timezone
+        from .models import InventoryItem
+        
+        sign, total_field = self.DELTAS[transaction_type]
+        quantity = Decimal(str(quantity))
+        qn = connection.ops.quote_name
+        meta = InventoryItem._meta
+        
+        sql = (
+            f'UPDATE {qn(meta.db_table)} '
+            f'SET {qn("current_quantity")} = {qn("current_quantity")} + %s, '
+            f'{qn(total_field)} = {qn(total_field)} + %s, {qn("updated_at")} = %s '
+            f'WHERE {qn(meta.pk.column)} = %s'
+        )
+        params = [
+            sign * quantity, quantity,
+            meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection),
+            meta.pk.get_db_prep_value(item.pk, connection),
+        ]
+        if sign < 0:
+            sql += f' AND {qn("current_quantity")} >= %s'
+            params.append(quantity)
+        sql += f' RETURNING {qn("current_quantity")}, {qn("received_quantity")}, {qn("issued_quantity")}'
+        
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        
+        if row is None:
+            if sign < 0 and InventoryItem.objects.filter(pk=item.pk).exists():
+                raise ValueError('재고가 부족합니다.')
+            raise InventoryItem.DoesNotExist('품목을 찾을 수 없습니다.')
+        
+        # SQLite는 DECIMAL을 float으로 반환하므로 필드 정밀도로 정규화
+        current, received, issued = (
+            Decimal(str(value)).quantize(Decimal('0.01')) for value in row
+        )
+        item.current_quantity = current
+        item.received_quantity = received
+        item.issued_quantity = issued
+        return current - sign * quantity, current
+    
+    def _apply_locked(self, item, transaction_type, quantity, kwargs):
+        """
+        조정/이동 처리 (SELECT ... FOR UPDATE)
+        - 조정: 현재고를 지정 수량으로
+        - 이동: 총 재고는 그대로, 보유 수량 이내만 이동 가능 (전량 이동이면 기본 위치 변경)
+        
+        Returns:
+            tuple: (거래 전 수량, 거래 후 수량)
+        """
+        from .models import InventoryItem
+        
+        locked = InventoryItem.objects.select_for_update().get(pk=item.pk)
+        before_qty = locked.current_quantity
+        
+        if transaction_type == 'adjust':
+            locked.current_quantity = quantity
+            locked.save(update_fields=['current_quantity', 'updated_at'])
+        elif transaction_type == 'transfer':
+            if quantity > before_qty:
+                raise ValueError(f'이동 수량이 현재고({before_qty})보다 많습니다.')
+            to_location_id = kwargs.get('to_location_id')
+            if to_location_id and quantity == before_qty and locked.default_location_id != to_location_id:
+                locked.default_location_id = to_location_id
+                locked.save(update_fields=['default_location', 'updated_at'])
+            item.default_location_id = locked.default_location_id
+        
+        item.current_quantity = locked.current_quantity
+        item.received_quantity = locked.received_quantity
+        item.issued_quantity = locked.issued_quantity
+        return before_qty, locked.current_quantity
+    
+    def process_batch(self, lines, user, partial=False):
+        """
+        여러 줄의 입고/출고/조정을 한 트랜잭션으로 처리
+        - 품목은 id 순서로 SELECT ... FOR UPDATE (교착 방지)
+        - 줄 순서대로 메모리에서 전/후 수량 계산 후 bulk_create/bulk_update
+        - 알림은 한 번에 확인, 엑셀 동기화는 원장별로 한 번 예약
+        
+        Args:
+            lines: [{'item_id' 또는 'barcode', 'transaction_type', 'quantity', 'location_id',
+                     'reference_number', 'remarks', 'scanned_barcode'}, ...]
+            partial: True면 실패한 줄만 제외하고 나머지 반영,
+                     False면 한 줄이라도 실패하면 전체 취소
+        
+        Returns:
+            dict: results (줄별 status/transaction/error), applied, failed
+        """
+        import uuid
+        from decimal import Decimal
+        from django.db import transaction
+        from .models import InventoryItem, StockTransaction
+        from .excel_sync import enqueue_stock_sync_bulk
+        
+        # 바코드 → 품목 id (쿼리 1회)
+        barcodes = [line['barcode'] for line in lines if not line.get('item_id') and line.get('barcode')]
+        item_ids = dict(
+            InventoryItem.objects.filter(barcode__in=barcodes).values_list('barcode', 'id')
+        ) if barcodes else {}
+        
+        results = [{'index': index, 'status': 'pending'} for index in range(len(lines))]
+        
+        with transaction.atomic():
+            resolved = [line.get('item_id') or item_ids.get(line.get('barcode')) for line in lines]
+            items = {
+                item.id: item for item in InventoryItem.objects.select_for_update().filter(
+                    id__in={item_id for item_id in resolved if item_id}
+                ).order_by('id')
+            }
+            
+            now = timezone.now()
+            stamp = now.strftime('%Y%m%d%H%M%S')
+            transactions = []
+            sync_entries = []
+            changed = {}
+            
+            for index, (line, item_id) in enumerate(zip(lines, resolved)):
+                item = items.get(item_id)
+                transaction_type = line['transaction_type']
+                quantity = Decimal(str(line['quantity']))
+                
+                error = None
+                if item is None:
+                    error = f"품목을 찾을 수 없습니다: {line.get('barcode') or line.get('item_id')}"
+                elif transaction_type == 'out' and item.current_quantity < quantity:
+                    error = f'재고가 부족합니다. (현재 {item.current_quantity}, 요청 {quantity})'
+                if error:
+                    results[index].update(status='failed', error=error)
+                    continue
+                
+                before_qty = item.current_quantity
+                if transaction_type == 'in':
+                    item.current_quantity += quantity
+                    item.received_quantity += quantity
+                elif transaction_type == 'out':
+                    item.current_quantity -= quantity
+                    item.issued_quantity += quantity
+                elif transaction_type == 'adjust':
+                    item.current_quantity = quantity
+                item.updated_at = now
+                changed[item.id] = item
+                
+                stock_transaction = StockTransaction(
+                    # bulk_create는 save()를 거치지 않으므로 거래번호 직접 생성
+                    transaction_number=f'TRX-{stamp}-{uuid.uuid4().hex[:6].upper()}',
+                    item=item,
+                    transaction_type=transaction_type,
+                    quantity=quantity if transaction_type != 'adjust' else abs(item.current_quantity - before_qty),
+                    before_quantity=before_qty,
+                    after_quantity=item.current_quantity,
+                    location_id=line.get('location_id'),
+                    reference_number=line.get('reference_number', ''),
+                    remarks=line.get('remarks', ''),
+                    scanned_barcode=line.get('scanned_barcode', '') or line.get('barcode', ''),
+                    performed_by=user,
+                )
+                transactions.append(stock_transaction)
+                sync_entries.append((item, transaction_type, quantity, stock_transaction))
+                results[index].update(status='applied', transaction=stock_transaction)
+            
+            failed = [result for result in results if result['status'] == 'failed']
+            if failed and not partial:
+                # 전체 취소 모드: 아무것도 쓰지 않음
+                for result in results:
+                    if result['status'] == 'applied':
+                        result.update(status='cancelled')
+                        del result['transaction']
+                return {'results': results, 'applied': 0, 'failed': len(failed)}
+            
+            InventoryItem.objects.bulk_update(
+                list(changed.values()),
+                ['current_quantity', 'received_quantity', 'issued_quantity', 'updated_at']
+            )
+            StockTransaction.objects.bulk_create(transactions)
+            self.check_stock_alerts_bulk(list(changed.values()))
+            enqueue_stock_sync_bulk(sync_entries, user)
+        
+        return {'results': results, 'applied': len(transactions), 'failed': len(failed)}
+    
+    def check_stock_alerts(self, item):
+        """재고 알림 확인 및 생성 (쿼리 1회 - StockAlertService.check)"""
+        StockAlertService().check([item])
+    
+    def check_stock_alerts_bulk(self, items):
+        """여러 품목의 재고 알림을 한 번에 확인 (INSERT ... SELECT 1회 + 해결 UPDATE 1회)"""
+        StockAlertService().check(items)
+
+
+class StockAlertService:
+    """
+    재고 알림 생성/해결 (집합 단위 SQL)
+    - 생성: 조건에 맞는 품목을 INSERT ... SELECT ... ON CONFLICT DO NOTHING 한 문장으로
+      (미해결 알림 부분 유니크 인덱스가 중복을 막으므로 기존 알림 조회가 필요 없음)
+    - 해결: 재고가 안전재고를 넘은 품목의 미해결 알림을 UPDATE 한 문장으로
+    - 새로 생성된 알림만 커밋 후 이메일 발송 (raw INSERT는 post_save를 보내지 않음)
+    """
+    
+    ALERT_TYPES = ['out_of_stock', 'low_stock']
+    
+    def check(self, items):
+        """
+        거래 직후 품목들의 알림 확인 (메모리의 최신 수량으로 생성/해결 대상 구분)
+        
+        Returns:
+            dict: created, resolved
+        """
+        from .models import InventoryItem
+        
+        alerting, recovered = [], []
+        for item in items:
+            if item.current_quantity <= 0 or item.current_quantity <= item.safety_stock:
+                alerting.append(item.id)
+            else:
+                recovered.append(item.id)
+        
+        created = self.create_alerts(InventoryItem.objects.filter(id__in=alerting)) if alerting else []
+        resolved = self.resolve_alerts(InventoryItem.objects.filter(id__in=recovered)) if recovered else 0
+        return {'created': len(created), 'resolved': resolved}
+    
+    def sync_all(self):
+        """
+        전체 활성 품목 알림 갱신 (정기 작업) - 품목 수와 관계없이 쿼리 3회
+        
+        Returns:
+            dict: 미달/소진 품목 수, 새 알림/해결 알림 수, 단계별 소요 시간(ms)
+        """
+        import time
+        from django.db.models import F, Q
+        from .models import InventoryItem
+        
+        active = InventoryItem.objects.filter(is_active=True)
+        timings = {}
+        
+        started = time.monotonic()
+        created = self.create_alerts(active)
+        timings['create_ms'] = round((time.monotonic() - started) * 1000, 1)
+        
+        started = time.monotonic()
+        resolved = self.resolve_alerts(InventoryItem.objects.all())
+        timings['resolve_ms'] = round((time.monotonic() - started) * 1000, 1)
+        
+        started = time.monotonic()
+        counts = active.aggregate(
+            low_stock=Count('id', filter=Q(current_quantity__lte=F('safety_stock'), current_quantity__gt=0)),
+            out_of_stock=Count('id', filter=Q(current_quantity__lte=0)),
+        )
+        timings['count_ms'] = round((time.monotonic() - started) * 1000, 1)
+        
+        return {
+            'low_stock_count': counts['low_stock'],
+            'out_of_stock_count': counts['out_of_stock'],
+            'new_alerts': len(created),
+            'resolved_alerts': resolved,
+            'timings': timings,
+        }
+    
+    def create_alerts(self, items):
+        """
+        품목 QuerySet 중 안전재고 이하/소진 품목의 미해결 알림 생성 (INSERT ... SELECT 1회)
+        
+        Returns:
+            list: 새로 생성된 알림 ID
+        """
+        from django.db import connection, transaction
+        from django.db.models import Case, CharField, DecimalField, F, Q, Value, When
+        from django.db.models.functions import Cast, Concat
+        from .models import StockAlert
+        
+        out_of_stock = Q(current_quantity__lte=0)
+        text = CharField()
+        
+        # 열 순서 = INSERT 열 순서 (모든 값을 annotation으로 두어 SELECT 순서를 고정)
+        select = items.filter(
+            out_of_stock | Q(current_quantity__lte=F('safety_stock'))
+        ).order_by().annotate(
+            a_item=F('id'),
+            a_type=Case(
+                When(out_of_stock, then=Value('out_of_stock')),
+                default=Value('low_stock'),
+                output_field=text,
+            ),
+            a_message=Case(
+                When(out_of_stock, then=Concat(F('name'), Value('의 재고가 소진되었습니다.'), output_field=text)),
+                default=Concat(
+                    F('name'), Value('의 재고가 안전재고('), Cast('safety_stock', text), Value(') 이하입니다.'),
+                    output_field=text,
+                ),
+                output_field=text,
+            ),
+            a_current=F('current_quantity'),
+            a_threshold=Case(
+                When(out_of_stock, then=Value(0)),
+                default=F('safety_stock'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            a_resolved=Value(False),
+            a_created=Value(timezone.now(), output_field=StockAlert._meta.get_field('created_at')),
+        ).values_list('a_item', 'a_type', 'a_message', 'a_current', 'a_threshold', 'a_resolved', 'a_created')
+        
+        select_sql, params = select.query.sql_with_params()
+        qn = connection.ops.quote_name
+        columns = ', '.join(qn(StockAlert._meta.get_field(name).column) for name in (
+            'item', 'alert_type', 'message', 'current_quantity', 'threshold_quantity', 'is_resolved', 'created_at'
+        ))
+        sql = (
+            f'INSERT INTO {qn(StockAlert._meta.db_table)} ({columns}) {select_sql} '
+            f'ON CONFLICT DO NOTHING RETURNING {qn(StockAlert._meta.pk.column)}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            created = [row[0] for row in cursor.fetchall()]
+        
+        if created:
+            from .signals import notify_stock_alerts
+            transaction.on_commit(lambda: notify_stock_alerts(
+                StockAlert.objects.filter(id__in=created).select_related('item')
+            ))
+        return created
+    
+    def resolve_alerts(self, items):
+        """
+        품목 QuerySet 중 재고가 안전재고를 넘은 품목의 미해결 알림 해결 (UPDATE 1회)
+        
+        Returns:
+            int: 해결된 알림 수
+        """
+        from django.db.models import F
+        from .models import StockAlert
+        
+        recovered = items.filter(current_quantity__gt=F('safety_stock')).values('id')
+        return StockAlert.objects.filter(
+            item_id__in=recovered,
+            is_resolved=False
+        ).update(is_resolved=True, resolved_at=timezone.now())
+
+
+class InventoryCountService:
+    """
+    재고 실사 (품목 수와 관계없이 집합 단위로 처리)
+    - 스냅샷: 창고의 활성 품목을 INSERT ... SELECT 한 문장으로 실사 품목에 복사 (시스템 수량 = 현재 재고)
+    - 실사 수량 일괄 입력: 바코드 해석 1회 + (실사, 품목) 기준 bulk_create 업서트 (실사에 없던 품목은 추가)
+    - 완료: 차이 계산 UPDATE, 조정 거래 INSERT ... SELECT, 품목 재고 UPDATE 각 1회 + 알림 집합 확인
+      (bulk_create/bulk_update는 행마다 모델 객체/CASE 식을 만들어 1만 건이면 수 초 걸림)
+    """
+    
+    def snapshot(self, inventory_count):
+        """
+        창고의 활성 품목(기본 위치 기준)을 실사 품목으로 복사 - 이미 있는 품목은 건너뜀
+        작성중인 실사는 진행중으로 변경
+        
+        Returns:
+            int: 새로 추가된 실사 품목 수
+        
+        Raises:
+            ValueError: 완료/취소된 실사
+        """
+        from django.db import connection, transaction
+        from django.db.models import F, Value
+        from .models import InventoryCount, InventoryCountItem, InventoryItem
+        
+        if inventory_count.status not in (InventoryCount.Status.DRAFT, InventoryCount.Status.IN_PROGRESS):
+            raise ValueError('작성중이거나 진행중인 실사만 품목을 추가할 수 있습니다.')
+        
+        field = InventoryCountItem._meta.get_field
+        # 열 순서 = INSERT 열 순서
+        select = InventoryItem.objects.filter(
+            is_active=True,
+            default_location__warehouse_id=inventory_count.warehouse_id
+        ).order_by().annotate(
+            a_count=Value(inventory_count.id, output_field=field('inventory_count')),
+            a_item=F('id'),
+            a_system=F('current_quantity'),
+            a_remarks=Value('', output_field=field('remarks')),
+        ).values_list('a_count', 'a_item', 'a_system', 'a_remarks')
+        
+        select_sql, params = select.query.sql_with_params()
+        qn = connection.ops.quote_name
+        columns = ', '.join(qn(field(name).column) for name in (
+            'inventory_count', 'item', 'system_quantity', 'remarks'
+        ))
+        sql = (
+            f'INSERT INTO {qn(InventoryCountItem._meta.db_table)} ({columns}) {select_sql} '
+            f'ON CONFLICT DO NOTHING'
+        )
+        
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                created = cursor.rowcount
+            
+            if inventory_count.status == InventoryCount.Status.DRAFT:
+                inventory_count.status = InventoryCount.Status.IN_PROGRESS
+                inventory_count.save(update_fields=['status'])
+        
+        return created
+    
+    def record_counts(self, inventory_count, entries, user):
+        """
+        실사 수량 일괄 입력 (같은 품목이 여러 번 오면 마지막 값)
+        
+        Args:
+            entries: [{'item_id' 또는 'barcode', 'counted_quantity', 'remarks'}, ...]
+        
+        Returns:
+            dict: updated, created, failed (줄별 index/error)
+        
+        Raises:
+            ValueError: 완료/취소된 실사
+        """
+        from django.db import transaction
+        from .models import InventoryCount, InventoryCountItem, InventoryItem
+        
+        if inventory_count.status not in (InventoryCount.Status.DRAFT, InventoryCount.Status.IN_PROGRESS):
+            raise ValueError('작성중이거나 진행중인 실사만 수량을 입력할 수 있습니다.')
+        
+        # 바코드 → 품목 id (쿼리 1회)
+        barcodes = [entry['barcode'] for entry in entries if not entry.get('item_id') and entry.get('barcode')]
+        item_ids = dict(
+            InventoryItem.objects.filter(barcode__in=barcodes).values_list('barcode', 'id')
+        ) if barcodes else {}
+        
+        latest, failed = {}, []
+        for index, entry in enumerate(entries):
+            item_id = entry.get('item_id') or item_ids.get(entry.get('barcode'))
+            if item_id is None:
+                failed.append({'index': index, 'error': f"품목을 찾을 수 없습니다: {entry.get('barcode')}"})
+                continue
+            latest[item_id] = entry
+        
+        now = timezone.now()
+        with transaction.atomic():
+            existing = {
+                item_id: (system_quantity, remarks)
+                for item_id, system_quantity, remarks in inventory_count.items.filter(
+                    item_id__in=list(latest)
+                ).values_list('item_id', 'system_quantity', 'remarks')
+            }
+            # 스냅샷에 없던 품목 (다른 창고 품목이 발견된 경우 등) - 현재 재고를 시스템 수량으로
+            missing = dict(InventoryItem.objects.filter(
+                id__in=[item_id for item_id in latest if item_id not in existing]
+            ).values_list('id', 'current_quantity')) if len(existing) < len(latest) else {}
+            
+            rows = []
+            for index, entry in enumerate(entries):
+                item_id = entry.get('item_id') or item_ids.get(entry.get('barcode'))
+                if item_id is None or latest.get(item_id) is not entry:
+                    continue
+                if item_id in existing:
+                    system_quantity, remarks = existing[item_id]
+                elif item_id in missing:
+                    system_quantity, remarks = missing[item_id], ''
+                else:
+                    failed.append({'index': index, 'error': f'품목을 찾을 수 없습니다: {item_id}'})
+                    continue
+                rows.append(InventoryCountItem(
+                    inventory_count=inventory_count,
+                    item_id=item_id,
+                    system_quantity=system_quantity,
+                    counted_quantity=entry['counted_quantity'],
+                    difference=entry['counted_quantity'] - system_quantity,
+                    remarks=entry.get('remarks', remarks),
+                    counted_by=user,
+                    counted_at=now,
+                ))
+            
+            # (실사, 품목) 유니크 기준 INSERT ... ON CONFLICT DO UPDATE - 행별 UPDATE/CASE 없이 한 번에
+            # (스냅샷 행의 시스템 수량은 유지)
+            InventoryCountItem.objects.bulk_create(
+                rows,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['inventory_count', 'item'],
+                update_fields=['counted_quantity', 'difference', 'remarks', 'counted_by', 'counted_at'],
+            )
+            
+            if inventory_count.status == InventoryCount.Status.DRAFT:
+                inventory_count.status = InventoryCount.Status.IN_PROGRESS
+                inventory_count.save(update_fields=['status'])
+        
+        created = sum(1 for row in rows if row.item_id not in existing)
+        failed.sort(key=lambda failure: failure['index'])
+        return {'updated': len(rows) - created, 'created': created, 'failed': failed}
+    
+    def complete(self, inventory_count, user):
+        """
+        실사 완료 및 재고 조정 (실사 행 잠금으로 중복 완료 방지, 품목은 id 순서로 잠금)
+        - 차이 계산, 조정 거래 생성(INSERT ... SELECT), 품목 재고 반영 모두 집합 단위 SQL
+        - 실사 수량이 없거나 현재 재고와 같은 품목은 조정하지 않음
+        
+        Returns:
+            dict: counted, adjusted, uncounted, elapsed_ms
+        
+        Raises:
+            ValueError: 진행중이 아닌 실사
+        """
+        import time
+        import uuid
+        from django.db import connection, transaction
+        from django.db.models import CharField, F, OuterRef, Subquery, Value
+        from django.db.models.functions import Abs, Cast, Concat
+        from .models import InventoryCount, InventoryItem, StockTransaction
+        
+        started = time.monotonic()
+        with transaction.atomic():
+            locked = InventoryCount.objects.select_for_update().get(pk=inventory_count.pk)
+            if locked.status != InventoryCount.Status.IN_PROGRESS:
+                raise ValueError('진행중인 실사만 완료할 수 있습니다.')
+            
+            counted = locked.items.filter(counted_quantity__isnull=False)
+            counted_total = counted.update(difference=F('counted_quantity') - F('system_quantity'))
+            uncounted = locked.items.filter(counted_quantity__isnull=True).count()
+            
+            # 차이가 있는 품목 잠금 (id 순서 - 교착 방지)
+            list(InventoryItem.objects.select_for_update().filter(
+                id__in=counted.exclude(difference=0).values('item_id')
+            ).order_by('id').values_list('id', flat=True))
+            adjusting = counted.exclude(difference=0).exclude(counted_quantity=F('item__current_quantity'))
+            
+            now = timezone.now()
+            # INSERT ... SELECT는 save()를 거치지 않으므로 거래번호 직접 생성 (실사 품목 id로 중복 방지)
+            prefix = f"TRX-{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6].upper()}-"
+            field = StockTransaction._meta.get_field
+            text = CharField()
+            # 열 순서 = INSERT 열 순서 (품목 재고 반영 전에 조회해 전 수량 = 현재 재고)
+            select = adjusting.order_by().annotate(
+                a_id=_RandomUUID(),
+                a_number=Concat(Value(prefix), Cast('id', text), output_field=text),
+                a_item=F('item_id'),
+                a_type=Value('adjust', output_field=text),
+                a_quantity=Abs(F('counted_quantity') - F('item__current_quantity'), output_field=field('quantity')),
+                a_before=F('item__current_quantity'),
+                a_after=F('counted_quantity'),
+                a_reference=Value(locked.count_number, output_field=text),
+                a_remarks=Concat(Value('재고 실사 조정: '), F('remarks'), output_field=text),
+                a_user=Value(user.pk, output_field=field('performed_by')),
+                a_created=Value(now, output_field=field('created_at')),
+                a_barcode=Value('', output_field=text),
+                a_device=Value('', output_field=text),
+            ).values_list(
+                'a_id', 'a_number', 'a_item', 'a_type', 'a_quantity', 'a_before', 'a_after',
+                'a_reference', 'a_remarks', 'a_user', 'a_created', 'a_barcode', 'a_device'
+            )
+            select_sql, params = select.query.sql_with_params()
+            qn = connection.ops.quote_name
+            columns = ', '.join(qn(field(name).column) for name in (
+                'id', 'transaction_number', 'item', 'transaction_type', 'quantity', 'before_quantity',
+                'after_quantity', 'reference_number', 'remarks', 'performed_by', 'created_at',
+                'scanned_barcode', 'scan_device'
+            ))
+            with connection.cursor() as cursor:
+                cursor.execute(f'INSERT INTO {qn(StockTransaction._meta.db_table)} ({columns}) {select_sql}', params)
+                adjusted = cursor.rowcount
+            
+            # 조정 대상 = 방금 생성한 거래의 품목 (재고 반영 후에는 실사 수량과 같아져 다시 구분할 수 없음)
+            changed = InventoryItem.objects.filter(id__in=StockTransaction.objects.filter(
+                transaction_type='adjust', created_at=now, reference_number=locked.count_number
+            ).values('item_id'))
+            # 품목 재고 = 실사 수량 (UPDATE 1회 - bulk_update의 CASE 식은 행 수에 비례해 느려짐)
+            changed.update(
+                current_quantity=Subquery(
+                    locked.items.filter(item_id=OuterRef('id')).values('counted_quantity')[:1]
+                ),
+                updated_at=now
+            )
+            alerts = StockAlertService()
+            alerts.create_alerts(changed)
+            alerts.resolve_alerts(changed)
+            
+            locked.status = InventoryCount.Status.COMPLETED
+            locked.completed_at = now
+            locked.approved_by = user
+            locked.save(update_fields=['status', 'completed_at', 'approved_by'])
+        
+        inventory_count.refresh_from_db()
+        return {
+            'counted': counted_total,
+            'adjusted': adjusted,
+            'uncounted': uncounted,
+            'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        }
+
+
+class _RandomUUID(Func):
+    """DB에서 UUID 생성 (PostgreSQL 13+ gen_random_uuid, SQLite는 UUIDField 저장 형식인 32자리 hex)"""
+    
+    function = 'gen_random_uuid'
+    template = '%(function)s()'
+    output_field = UUIDField()
+    
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return 'lower(hex(randomblob(16)))', []
+
 from django.utils import timezone
 from django.db.models import Count
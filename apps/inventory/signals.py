@@ -1,53 +1,37 @@
 """
 Inventory Signals
 """
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.conf import settings
-from .models import StockAlert, InventoryItem
+from .models import StockAlert, InventoryItem, Location
 
 
 @receiver(post_save, sender=StockAlert)
 def notify_low_stock_alert(sender, instance, created, **kwargs):
-    """안전재고 알림 발생 시 관리자에게 이메일 발송"""
-    if not created or instance.alert_type not in ['low_stock', 'out_of_stock']:
+    """안전재고 알림 발생 시 관리자 이메일 대기열 등록"""
+    if not created:
         return
     
-    if not getattr(settings, 'SAFETY_STOCK_ALERT_ENABLED', True):
-        return
-    
-    from django.core.mail import send_mail
-    from apps.accounts.models import User
-    
-    # 관리자 및 매니저에게 알림
-    recipients = User.objects.filter(
-        role__in=['admin', 'manager'],
-        is_active=True
-    ).values_list('email', flat=True)
-    
-    if not recipients:
-        return
+    notify_stock_alerts([instance])
+
+
+def notify_stock_alerts(alerts):
+    """
+    재고 알림 메일 대기열 등록 (관리자/매니저)
+    bulk_create는 post_save를 보내지 않으므로 일괄 생성한 알림은 직접 호출
+    메일은 Celery 작업이 수신자별 요약으로 묶어 발송 (재고 거래 경로에서 SMTP 대기 없음)
+    """
+    from .notifications import enqueue_alert_notifications
     
-    subject = f'[HPE 재고관리] {instance.get_alert_type_display()} 알림'
-    message = f'''
-재고 알림이 발생했습니다.
+    enqueue_alert_notifications(alerts)
 
-품목코드: {instance.item.item_code}
-품목명: {instance.item.name}
-알림유형: {instance.get_alert_type_display()}
-현재수량: {instance.current_quantity} {instance.item.unit}
-안전재고: {instance.threshold_quantity} {instance.item.unit}
 
-시스템에서 확인해주세요.
-    '''
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_barcode_cache(sender, instance, **kwargs):
+    """품목/위치 저장·삭제 시 바코드 해석 캐시 무효화"""
+    from .barcode_resolver import barcode_resolver
     
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=list(recipients),
-            fail_silently=True,
-        )
-    except Exception:
-        pass
+    barcode_resolver.invalidate([instance.barcode])
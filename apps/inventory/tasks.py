@@ -14,67 +14,17 @@ logger = logging.getLogger('hpe')
 def check_safety_stock_levels():
     """
     안전재고 미달 품목 확인 및 알림 생성
-    매시간 실행
+    매시간 실행 - 품목 수와 관계없이 INSERT ... SELECT / UPDATE 몇 문장으로 처리
     """
-    from .models import InventoryItem, StockAlert
+    from .services import StockAlertService
     
-    # 안전재고 미달 품목 조회
-    low_stock_items = InventoryItem.objects.filter(
-        current_quantity__lte=F('safety_stock'),
-        current_quantity__gt=0,
-        is_active=True
-    )
+    result = StockAlertService().sync_all()
     
-    out_of_stock_items = InventoryItem.objects.filter(
-        current_quantity__lte=0,
-        is_active=True
+    logger.info(
+        f"Safety stock check completed. Created {result['new_alerts']} new alerts, "
+        f"resolved {result['resolved_alerts']} ({result['timings']})."
     )
-    
-    created_alerts = 0
-    
-    # 안전재고 미달 알림 생성
-    for item in low_stock_items:
-        alert, created = StockAlert.objects.get_or_create(
-            item=item,
-            alert_type='low_stock',
-            is_resolved=False,
-            defaults={
-                'message': f'{item.name}의 재고({item.current_quantity})가 안전재고({item.safety_stock}) 이하입니다.',
-                'current_quantity': item.current_quantity,
-                'threshold_quantity': item.safety_stock,
-            }
-        )
-        if created:
-            created_alerts += 1
-    
-    # 재고 소진 알림 생성
-    for item in out_of_stock_items:
-        alert, created = StockAlert.objects.get_or_create(
-            item=item,
-            alert_type='out_of_stock',
-            is_resolved=False,
-            defaults={
-                'message': f'{item.name}의 재고가 소진되었습니다.',
-                'current_quantity': item.current_quantity,
-                'threshold_quantity': 0,
-            }
-        )
-        if created:
-            created_alerts += 1
-    
-    # 재고가 복구된 품목의 알림 해결
-    from django.utils import timezone
-    StockAlert.objects.filter(
-        item__current_quantity__gt=F('item__safety_stock'),
-        is_resolved=False
-    ).update(is_resolved=True, resolved_at=timezone.now())
-    
-    logger.info(f'Safety stock check completed. Created {created_alerts} new alerts.')
-    return {
-        'low_stock_count': low_stock_items.count(),
-        'out_of_stock_count': out_of_stock_items.count(),
-        'new_alerts': created_alerts
-    }
+    return result
 
 
 @shared_task
@@ -171,4 +121,153 @@ def cleanup_resolved_alerts(days=30):
     return {'deleted_count': deleted_count}
 
 
+@shared_task(bind=True, max_retries=5, default_retry_delay=30)
+def sync_excel_outbox(self, document_id):
+    """
+    엑셀 동기화 대기열 처리 (문서 단위)
+    대기 중인 입출고를 한 번의 로드/저장으로 반영
+    """
+    from .models import ExcelMasterDocument
+    from .excel_sync import drain_document_outbox, record_outbox_failure
+    
+    document = ExcelMasterDocument.objects.filter(id=document_id).first()
+    if not document:
+        return {'applied': 0, 'skipped': 0, 'failed': 0, 'barcodes': 0}
+    
+    try:
+        result = drain_document_outbox(document)
+    except Exception as e:
+        logger.error(f'엑셀 동기화 실패 ({document.title}): {str(e)}')
+        record_outbox_failure(document, e)
+        raise self.retry(exc=e, countdown=min(30 * 2 ** self.request.retries, 600))
+    
+    if result['applied'] or result['skipped'] or result['failed']:
+        logger.info(
+            f"Excel sync for {document.title}: applied {result['applied']} entries "
+            f"on {result['barcodes']} barcodes, skipped {result['skipped']}, failed {result['failed']}"
+        )
+    return result
+
+
+@shared_task
+def sync_pending_excel_outbox():
+    """
+    남아있는 엑셀 동기화 대기열 처리
+    매분 실행 (작업 예약 실패/재시도 대비)
+    """
+    from .models import ExcelSyncOutbox
+    
+    document_ids = list(ExcelSyncOutbox.objects.filter(
+        status=ExcelSyncOutbox.Status.PENDING
+    ).order_by().values_list('document_id', flat=True).distinct())
+    
+    for document_id in document_ids:
+        sync_excel_outbox.delay(str(document_id))
+    
+    return {'documents': len(document_ids)}
+
+
+@shared_task
+def send_alert_digests():
+    """
+    재고 알림 요약 메일 발송
+    매분 실행 + 알림 등록 시 요약 창 끝에 예약 (창이 지난 수신자만 발송)
+    """
+    from .notifications import send_due_digests
+    
+    result = send_due_digests()
+    if result['sent'] or result['failed']:
+        logger.info(
+            f"Alert digests: sent {result['sent']} alerts to {result['recipients']} recipients, "
+            f"skipped {result['skipped']}, failed {result['failed']}"
+        )
+    return result
+
+
+@shared_task
+def process_label_print_queue(printer=None):
+    """
+    라벨 프린터 출력 대기열 전송
+    작업 등록 시 해당 프린터로 즉시 실행 + 매분 실행 (백오프 재시도)
+    """
+    from .printing import process_print_queue
+    
+    result = process_print_queue(printer)
+    if result['sent'] or result['failed']:
+        logger.info(
+            f"Label print queue: sent {result['sent']} jobs, failed {result['failed']}, "
+            f"deferred {result['deferred']}"
+        )
+    return result
+
+
+@shared_task
+def warm_barcode_renders(label_type='both'):
+    """
+    활성 품목 라벨 이미지(바코드/QR) 미리 렌더링
+    이미 캐시에 있는 이미지는 건너뛰므로 바뀐/새 품목만 렌더링
+    """
+    import time
+    from .models import InventoryItem
+    from .services import BarcodeService
+    from .barcode_render import render_cache
+    
+    started = time.monotonic()
+    misses_before = render_cache.misses
+    service = BarcodeService()
+    
+    items = InventoryItem.objects.filter(is_active=True).exclude(barcode='').only(
+        'item_code', 'barcode', 'name', 'specification', 'unit'
+    )
+    count = 0
+    errors = 0
+    for item in items.iterator(chunk_size=500):
+        label = service.batch_generate_labels([item], label_type)[0]
+        errors += sum(1 for key in ('barcode_image', 'qr_image') if key in label and not label[key])
+        count += 1
+    
+    render_cache.prune()
+    result = {
+        'items': count,
+        'rendered': render_cache.misses - misses_before,
+        'errors': errors,
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+    }
+    logger.info(f'Barcode render warm-up: {result}')
+    return result
+
+
+@shared_task
+def reconcile_excel_ledgers(doc_types=None, apply=None, create_missing=False):
+    """
+    DB ↔ 엑셀 원장 대사
+    기본은 보고만 (apply='db' / 'excel' 지정 시 일괄 보정)
+    DB 기준 모드에서는 원장이 DB로 생성되고 엑셀 파일은 양식일 뿐이므로 건너뜀
+    """
+    from .excel_materialize import db_source_enabled
+    from .reconciliation import reconcile_ledgers
+    
+    if db_source_enabled():
+        logger.info('Ledger reconciliation skipped: EXCEL_LEDGER_SOURCE=db')
+        return []
+    
+    reports = reconcile_ledgers(doc_types=doc_types, apply=apply, create_missing=create_missing)
+    
+    summaries = []
+    for report in reports:
+        summary = report['summary']
+        if summary['missing_in_db'] or summary['missing_in_excel'] or summary['drift']:
+            logger.warning(
+                f"Ledger reconciliation for {report['title']}: "
+                f"missing_in_db={summary['missing_in_db']}, "
+                f"missing_in_excel={summary['missing_in_excel']}, drift={summary['drift']}"
+            )
+        summaries.append({
+            'doc_type': report['doc_type'],
+            **summary,
+            'applied': report.get('applied'),
+        })
+    return summaries
+
+
 from django.db import models
@@ -7,7 +7,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     WarehouseViewSet, LocationViewSet, ItemCategoryViewSet,
     InventoryItemViewSet, StockTransactionViewSet,
-    StockOperationView, BarcodeScanView,
+    StockOperationView, StockBatchView, BarcodeScanView, BarcodeBulkScanView, ScanCommitView,
+    BarcodeRenderView,
     StockAlertViewSet, InventoryCountViewSet,
     InventoryDashboardView
 )
@@ -37,9 +38,15 @@ urlpatterns = [
     path('stock/out/', StockOperationView.as_view(), {'operation_type': 'out'}, name='stock-out'),
     path('stock/adjust/', StockOperationView.as_view(), {'operation_type': 'adjust'}, name='stock-adjust'),
     path('stock/transfer/', StockOperationView.as_view(), {'operation_type': 'transfer'}, name='stock-transfer'),
+    path('stock/batch/', StockBatchView.as_view(), name='stock-batch'),
     
     # Barcode Scan
     path('scan/', BarcodeScanView.as_view(), name='barcode-scan'),
+    path('scan/bulk/', BarcodeBulkScanView.as_view(), name='barcode-bulk-scan'),
+    path('scan/commit/', ScanCommitView.as_view(), name='scan-commit'),
+    
+    # Barcode/QR Images (render cache)
+    path('renders/<str:key>.png', BarcodeRenderView.as_view(), name='barcode-render'),
     
     # ViewSet routes
     path('', include(router.urls)),
@@ -4,17 +4,17 @@ Inventory Views
 from rest_framework import viewsets, status, generics, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.db import transaction, models
 from django.db.models import F, Sum
 from django.utils import timezone
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
 from apps.accounts.permissions import IsAdminRole, IsManagerOrAdmin
 from .models import (
     Warehouse, Location, ItemCategory, InventoryItem,
-    StockTransaction, StockAlert, InventoryCount, InventoryCountItem,
-    ExcelMasterDocument, ExcelUpdateLog
+    StockTransaction, StockAlert, InventoryCount, InventoryCountItem
 )
 from .serializers import (
     WarehouseSerializer, LocationSerializer, ItemCategorySerializer,
@@ -22,11 +22,16 @@ from .serializers import (
     InventoryItemCreateSerializer, InventoryItemUpdateSerializer,
     StockTransactionSerializer,
     StockInSerializer, StockOutSerializer, StockTransferSerializer,
-    StockAdjustSerializer, BarcodeScanSerializer, StockAlertSerializer,
-    InventoryCountSerializer, InventoryCountItemSerializer,
+    StockAdjustSerializer, StockBatchSerializer, BarcodeScanSerializer, BarcodeBulkScanSerializer,
+    ScanCommitSerializer, LabelSheetSerializer, LabelPrintSerializer,
+    StockAlertSerializer,
+    InventoryCountSerializer, InventoryCountItemSerializer, InventoryCountBulkSerializer,
     DashboardStatsSerializer
 )
-from .services import BarcodeService
+from .services import BarcodeService, StockService, InventoryCountService
+from .idempotency import IdempotentRequest, ScanDebounce, run_guarded
+from .barcode_resolver import barcode_resolver
+from .qr_payload import scanned_barcode
 
 
 class WarehouseViewSet(viewsets.ModelViewSet):
@@ -58,12 +63,13 @@ class LocationViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def barcode(self, request, pk=None):
-        """위치 바코드 생성"""
+        """위치 바코드 생성 (?inline=true면 data URI, 기본은 렌더 캐시 URL)"""
         location = self.get_object()
         barcode_service = BarcodeService()
         barcode_data = barcode_service.generate_barcode(
             location.barcode,
-            f"{location.warehouse.name} - {location.name}"
+            f"{location.warehouse.name} - {location.name}",
+            inline=request.query_params.get('inline') == 'true'
         )
         return Response(barcode_data)
 
@@ -115,6 +121,7 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
         if low_stock == 'true':
             queryset = queryset.filter(current_quantity__lte=F('safety_stock'))
         if search:
+            search = scanned_barcode(search)  # QR 페이로드 스캔값
             queryset = queryset.filter(
                 models.Q(item_code__icontains=search) |
                 models.Q(name__icontains=search) |
@@ -127,10 +134,11 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def barcode(self, request, pk=None):
-        """품목 바코드/QR 생성"""
+        """품목 바코드/QR 생성 (?inline=true면 data URI, 기본은 렌더 캐시 URL)"""
         item = self.get_object()
         barcode_service = BarcodeService()
         code_type = request.query_params.get('type', 'barcode')  # barcode or qr
+        inline = request.query_params.get('inline') == 'true'
         
         if code_type == 'qr':
             data = barcode_service.generate_qr_code(
@@ -139,13 +147,81 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
                     'name': item.name,
                     'code': item.item_code,
                     'unit': item.unit
-                }
+                },
+                inline=inline
             )
         else:
-            data = barcode_service.generate_barcode(item.barcode, item.name)
+            data = barcode_service.generate_barcode(item.barcode, item.name, inline=inline)
         
         return Response(data)
     
+    @action(detail=False, methods=['post'], url_path='label-sheet')
+    def label_sheet(self, request):
+        """라벨 용지 PDF (A4 격자, 페이지 단위 스트리밍)"""
+        serializer = LabelSheetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        items = InventoryItem.objects.in_bulk(data['item_ids'])
+        missing = [str(item_id) for item_id in data['item_ids'] if item_id not in items]
+        if missing:
+            return Response(
+                {'error': '존재하지 않는 품목이 있습니다.', 'missing': missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        stream = BarcodeService().label_sheet(
+            [items[item_id] for item_id in data['item_ids']],
+            data['layout'],
+            label_type=data['label_type'],
+            copies=data['copies'],
+            skip=data['skip']
+        )
+        response = StreamingHttpResponse(stream, content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="labels-{timezone.now():%Y%m%d%H%M%S}.pdf"'
+        return response
+    
+    @action(detail=False, methods=['post'], url_path='print-labels')
+    def print_labels(self, request):
+        """감열 라벨 프린터 출력 (ZPL, RAW 9100 대기열) 또는 ZPL 파일"""
+        from .printing import enqueue_print_job
+        from .zpl import ZplFormat
+        
+        serializer = LabelPrintSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        items = InventoryItem.objects.in_bulk(data['item_ids'])
+        missing = [str(item_id) for item_id in data['item_ids'] if item_id not in items]
+        if missing:
+            return Response(
+                {'error': '존재하지 않는 품목이 있습니다.', 'missing': missing},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        zpl_format = ZplFormat.for_printer(data['printer_config']) if data['printer_config'] else ZplFormat()
+        payload = BarcodeService().generate_zpl(
+            [items[item_id] for item_id in data['item_ids']],
+            label_type=data['label_type'],
+            copies=data['copies'],
+            zpl_format=zpl_format
+        )
+        label_count = len(items) * data['copies']
+        
+        if data['output'] == 'zpl':
+            response = HttpResponse(payload, content_type='text/plain; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="labels-{timezone.now():%Y%m%d%H%M%S}.zpl"'
+            return response
+        
+        job = enqueue_print_job(data['printer'], payload, label_count, user=request.user)
+        return Response({
+            'job_id': job.id,
+            'printer': job.printer,
+            'labels': label_count,
+            'bytes': len(payload.encode('utf-8')),
+            'status': job.status,
+        }, status=status.HTTP_202_ACCEPTED)
+    
     @action(detail=True, methods=['get'])
     def transactions(self, request, pk=None):
         """품목 거래 이력"""
@@ -200,150 +276,9 @@ class StockOperationView(generics.GenericAPIView):
     
     permission_classes = [IsAuthenticated]
     
-    @transaction.atomic
     def _process_transaction(self, item, transaction_type, quantity, user, **kwargs):
         """거래 처리"""
-        before_qty = item.current_quantity
-        
-        if transaction_type == 'in':
-            item.current_quantity = F('current_quantity') + quantity
-        elif transaction_type == 'out':
-            if item.current_quantity < quantity:
-                raise ValueError('재고가 부족합니다.')
-            item.current_quantity = F('current_quantity') - quantity
-        elif transaction_type == 'adjust':
-            item.current_quantity = quantity
-        
-        item.save()
-        item.refresh_from_db()
-        
-        after_qty = item.current_quantity
-        
-        # 거래 기록 생성
-        transaction = StockTransaction.objects.create(
-            item=item,
-            transaction_type=transaction_type,
-            quantity=abs(quantity) if transaction_type != 'adjust' else abs(after_qty - before_qty),
-            before_quantity=before_qty,
-            after_quantity=after_qty,
-            performed_by=user,
-            **kwargs
-        )
-        
-        # 안전재고 알림 확인
-        self._check_stock_alerts(item)
-        
-        return transaction
-    
-    def _check_stock_alerts(self, item):
-        """재고 알림 확인 및 생성"""
-        if item.current_quantity <= 0:
-            StockAlert.objects.get_or_create(
-                item=item,
-                alert_type='out_of_stock',
-                is_resolved=False,
-                defaults={
-                    'message': f'{item.name}의 재고가 소진되었습니다.',
-                    'current_quantity': item.current_quantity,
-                    'threshold_quantity': 0,
-                }
-            )
-        elif item.current_quantity <= item.safety_stock:
-            StockAlert.objects.get_or_create(
-                item=item,
-                alert_type='low_stock',
-                is_resolved=False,
-                defaults={
-                    'message': f'{item.name}의 재고가 안전재고({item.safety_stock}) 이하입니다.',
-                    'current_quantity': item.current_quantity,
-                    'threshold_quantity': item.safety_stock,
-                }
-            )
-        else:
-            # 재고가 충분하면 미해결 알림 해결 처리
-            StockAlert.objects.filter(
-                item=item,
-                is_resolved=False
-            ).update(is_resolved=True, resolved_at=timezone.now())
-    
-    def _update_excel_file(self, item, operation_type, quantity, user):
-        """엑셀 파일 동기화"""
-        try:
-            # 바코드로 문서 찾기
-            barcode = item.barcode
-            if not barcode:
-                return  # 바코드 없으면 스킵
-            
-            # 문서 타입 판별
-            document = None
-            if barcode.startswith('HP-KSTC-'):
-                document = ExcelMasterDocument.objects.filter(doc_type='ks_cert').first()
-            elif barcode.startswith('HP-P10-') or barcode.startswith('HP-P20-'):
-                document = ExcelMasterDocument.objects.filter(doc_type='measurement').first()
-            elif barcode.startswith('HP-PRT-'):
-                document = ExcelMasterDocument.objects.filter(doc_type='parts').first()
-            elif barcode.startswith('HP-SUP-'):
-                document = ExcelMasterDocument.objects.filter(doc_type='supplies').first()
-            
-            if not document:
-                return  # 해당 문서 없으면 스킵
-            
-            # PRT/SUP만 입고/출고 처리
-            if document.doc_type not in ['parts', 'supplies']:
-                return
-            
-            # 현재 엑셀 값 읽기
-            items = document.read_all_items()
-            existing_item = next((i for i in items if i['barcode'] == barcode), None)
-            
-            if not existing_item:
-                return  # 엑셀에 없으면 스킵
-            
-            # 현재 값
-            current_received = float(existing_item.get('received', 0) or 0)
-            current_issued = float(existing_item.get('issued', 0) or 0)
-            
-            # 새 값 계산
-            if operation_type == 'in':
-                new_received = current_received + float(quantity)
-                new_issued = current_issued
-            elif operation_type == 'out':
-                new_received = current_received
-                new_issued = current_issued + float(quantity)
-            else:
-                return  # 조정/이동은 스킵
-            
-            new_current = new_received - new_issued
-            
-            # 엑셀 파일 업데이트
-            updates = {
-                'received': new_received,
-                'issued': new_issued,
-                'current': new_current
-            }
-            
-            success = document.update_item(barcode, updates)
-            
-            if success:
-                # 로그 기록
-                ExcelUpdateLog.objects.create(
-                    document=document,
-                    barcode=barcode,
-                    action=f'stock_{operation_type}',
-                    updates=updates,
-                    previous_values={
-                        'received': current_received,
-                        'issued': current_issued,
-                        'current': current_received - current_issued
-                    },
-                    created_by=user
-                )
-                
-        except Exception as e:
-            # 엑셀 업데이트 실패해도 DB 작업은 성공으로 처리
-            import logging
-            logger = logging.getLogger('hpe')
-            logger.error(f'엑셀 파일 업데이트 실패: {str(e)}')
+        return StockService().process_transaction(item, transaction_type, quantity, user, **kwargs)
     
     def post(self, request, operation_type):
         """입출고/조정 처리"""
@@ -364,6 +299,17 @@ class StockOperationView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
         
+        # 재전송(같은 Idempotency-Key)/중복 스캔(같은 장치·품목·작업)은 한 번만 처리
+        debounce = ScanDebounce(
+            'stock', data.get('scan_device'), data['item_id'], operation_type
+        ) if operation_type in ('in', 'out') else None
+        return run_guarded(
+            lambda: self._operate(request, operation_type, data),
+            IdempotentRequest(request, f'stock-{operation_type}'),
+            *([debounce] if debounce else []),
+        )
+    
+    def _operate(self, request, operation_type, data):
         try:
             item = get_object_or_404(InventoryItem, id=data['item_id'])
             
@@ -373,6 +319,8 @@ class StockOperationView(generics.GenericAPIView):
                 'remarks': data.get('remarks', ''),
                 'scanned_barcode': data.get('scanned_barcode', ''),
             }
+            if data.get('scan_device'):
+                kwargs['scan_device'] = data['scan_device']
             
             if operation_type == 'adjust':
                 kwargs['remarks'] = data.get('reason', '')
@@ -380,6 +328,16 @@ class StockOperationView(generics.GenericAPIView):
             else:
                 quantity = data['quantity']
             
+            if operation_type == 'transfer':
+                from_id, to_id = data['from_location_id'], data['to_location_id']
+                if from_id == to_id or Location.objects.filter(id__in=[from_id, to_id]).count() != 2:
+                    return Response(
+                        {'error': '출발/도착 위치를 확인해주세요.'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                kwargs['location_id'] = from_id
+                kwargs['to_location_id'] = to_id
+            
             transaction = self._process_transaction(
                 item=item,
                 transaction_type=operation_type,
@@ -388,9 +346,6 @@ class StockOperationView(generics.GenericAPIView):
                 **kwargs
             )
             
-            # 엑셀 파일도 업데이트
-            self._update_excel_file(item, operation_type, quantity, request.user)
-            
             return Response({
                 'message': '처리되었습니다.',
                 'transaction': StockTransactionSerializer(transaction).data
@@ -402,6 +357,43 @@ class StockOperationView(generics.GenericAPIView):
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class StockBatchView(generics.GenericAPIView):
+    """일괄 입출고 처리 (입고 전표 등 여러 줄을 한 번에)"""
+    
+    permission_classes = [IsAuthenticated]
+    serializer_class = StockBatchSerializer
+    
+    def post(self, request):
+        """
+        Body: {"mode": "all_or_nothing" | "partial",
+               "lines": [{"barcode": "...", "transaction_type": "in", "quantity": 3, ...}, ...]}
+        
+        all_or_nothing: 한 줄이라도 실패하면 전체 취소 (400)
+        partial: 실패한 줄만 제외하고 반영
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        result = StockService().process_batch(
+            data['lines'], request.user, partial=data['mode'] == 'partial'
+        )
+        
+        for line in result['results']:
+            if 'transaction' in line:
+                line['transaction'] = StockTransactionSerializer(line['transaction']).data
+        
+        if result['failed'] and not result['applied']:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        
+        return Response({
+            'message': f"{result['applied']}건 처리, {result['failed']}건 실패",
+            **result
+        }, status=response_status)
+
+
 class BarcodeScanView(generics.GenericAPIView):
     """바코드 스캔 처리"""
     
@@ -417,35 +409,218 @@ class BarcodeScanView(generics.GenericAPIView):
         
         result = {'found': False, 'type': None, 'data': None}
         
-        # 품목 바코드 검색
+        # 품목 바코드 검색 (해석 캐시 → pk 조회)
         if scan_type in ['item', 'any']:
-            try:
-                item = InventoryItem.objects.get(barcode=barcode)
+            item = barcode_resolver.get_item(barcode)
+            if item is not None:
                 result = {
                     'found': True,
                     'type': 'item',
                     'data': InventoryItemDetailSerializer(item).data
                 }
                 return Response(result)
-            except InventoryItem.DoesNotExist:
-                pass
         
         # 위치 바코드 검색
         if scan_type in ['location', 'any']:
-            try:
-                location = Location.objects.get(barcode=barcode)
+            location = barcode_resolver.get_location(barcode)
+            if location is None and scan_type == 'location':
+                # 품목과 같은 바코드를 쓰는 위치 (해석 결과는 품목 우선)
+                location = Location.objects.filter(barcode=barcode).first()
+            if location is not None:
                 result = {
                     'found': True,
                     'type': 'location',
                     'data': LocationSerializer(location).data
                 }
                 return Response(result)
-            except Location.DoesNotExist:
-                pass
         
         return Response(result)
 
 
+class BarcodeBulkScanView(generics.GenericAPIView):
+    """
+    바코드 일괄 조회 (재고 실사 세션 등에서 수백 건을 한 번에)
+    해석 캐시에 없는 바코드만 종류별 barcode__in 조회, 품목/위치 요약은 각각 1회 조회
+    """
+    
+    permission_classes = [IsAuthenticated]
+    serializer_class = BarcodeBulkScanSerializer
+    
+    ITEM_FIELDS = ('id', 'barcode', 'item_code', 'name', 'unit', 'current_quantity', 'safety_stock')
+    LOCATION_FIELDS = ('id', 'barcode', 'code', 'name')
+    
+    def post(self, request):
+        """
+        Body: {"barcodes": ["HP-PRT-001", "LOC-W1-A", ...]} (최대 1000개)
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        barcodes = serializer.validated_data['barcodes']
+        
+        resolved = barcode_resolver.resolve_many(barcodes)
+        ids = {'item': set(), 'location': set()}
+        for entry in resolved.values():
+            if entry['kind'] in ids:
+                ids[entry['kind']].add(entry['id'])
+        
+        items = {
+            str(row['id']): row for row in
+            InventoryItem.objects.filter(id__in=ids['item']).values(*self.ITEM_FIELDS)
+        } if ids['item'] else {}
+        locations = {
+            str(row['id']): row for row in
+            Location.objects.filter(id__in=ids['location']).values(
+                *self.LOCATION_FIELDS, warehouse_name=F('warehouse__name')
+            )
+        } if ids['location'] else {}
+        
+        results = []
+        missing = []
+        for barcode in barcodes:
+            entry = resolved[barcode]
+            data = {
+                'item': items.get(entry['id']),
+                'location': locations.get(entry['id']),
+            }.get(entry['kind'])
+            # 캐시 이후 바코드가 바뀐 품목/위치는 미발견으로 처리
+            if entry['kind'] in ids and (data is None or data['barcode'] != barcode):
+                barcode_resolver.invalidate([barcode])
+                entry, data = {**entry, 'found': False, 'kind': None, 'id': None}, None
+            if not entry['found']:
+                missing.append(barcode)
+            results.append({
+                'barcode': barcode,
+                'found': entry['found'],
+                'type': entry['kind'],
+                'doc_type': entry['doc_type'],
+                'ledger_row': entry['ledger_row'],
+                'data': data,
+            })
+        
+        return Response({
+            'count': len(results),
+            'found': len(results) - len(missing),
+            'missing': missing,
+            'results': results,
+        })
+
+
+class ScanCommitView(generics.GenericAPIView):
+    """
+    스캔 즉시 입출고 (바코드 조회 + 거래를 한 번의 요청으로)
+    - 품목 바코드 → 입고/출고 처리 후 변경된 수량과 알림 상태만 반환
+    - 위치 바코드 → 거래 없이 위치 정보 반환 (이후 스캔의 location_id로 사용)
+    - Idempotency-Key 헤더(또는 idempotency_key)가 같으면 재처리 없이 처음 응답 반환
+    - 같은 scan_device의 중복 스캔(SCAN_DEBOUNCE_SECONDS 이내)은 한 번만 처리
+    """
+    
+    permission_classes = [IsAuthenticated]
+    serializer_class = ScanCommitSerializer
+    
+    ITEM_FIELDS = ('id', 'barcode', 'item_code', 'name', 'unit', 'current_quantity', 'safety_stock')
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        return run_guarded(
+            lambda: self._commit(request, data),
+            IdempotentRequest(request, 'scan-commit'),
+            ScanDebounce('scan-commit', data.get('scan_device'), data['barcode'], data['operation']),
+        )
+    
+    def _commit(self, request, data):
+        barcode = data['barcode']
+        
+        # 품목 바코드 우선, 없으면 위치 바코드 (BarcodeScanView와 같은 순서, 해석 캐시 사용)
+        item = barcode_resolver.get_item(barcode, InventoryItem.objects.only(*self.ITEM_FIELDS))
+        if item is None:
+            location = barcode_resolver.get_location(barcode, Location.objects.select_related('warehouse'))
+            if location is None:
+                return Response(
+                    {'found': False, 'barcode': barcode, 'error': '등록되지 않은 바코드입니다.'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response({'found': True, 'type': 'location', 'location': {
+                'id': location.id,
+                'code': location.code,
+                'name': location.name,
+                'warehouse_name': location.warehouse.name,
+            }})
+        
+        try:
+            stock_transaction = StockService().process_transaction(
+                item, data['operation'], data['quantity'], request.user,
+                location_id=data.get('location_id'),
+                reference_number=data.get('reference_number', ''),
+                remarks=data.get('remarks', ''),
+                scanned_barcode=barcode,
+                scan_device=data.get('scan_device', ''),
+            )
+        except ValueError as e:
+            return Response({
+                'found': True,
+                'type': 'item',
+                'error': str(e),
+                'item': self._slim_item(item),
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'found': True,
+            'type': 'item',
+            'operation': data['operation'],
+            'quantity': data['quantity'],
+            'transaction_number': stock_transaction.transaction_number,
+            'item': self._slim_item(item),
+        })
+    
+    @staticmethod
+    def _slim_item(item):
+        """품목 요약 (현재고와 알림 상태만 - 상세 Serializer 미사용)"""
+        if item.current_quantity <= 0:
+            alert = 'out_of_stock'
+        elif item.current_quantity <= item.safety_stock:
+            alert = 'low_stock'
+        else:
+            alert = None
+        return {
+            'id': item.id,
+            'barcode': item.barcode,
+            'name': item.name,
+            'unit': item.unit,
+            'current_quantity': item.current_quantity,
+            'safety_stock': item.safety_stock,
+            'alert': alert,
+        }
+
+
+class BarcodeRenderView(generics.GenericAPIView):
+    """
+    렌더 캐시 이미지 (내용 주소 방식이라 한 번 받은 이미지는 바뀌지 않음)
+    <img src>로 직접 불러오므로 인증 없이 제공 (키는 렌더 사양의 SHA-256)
+    """
+    
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    
+    def get(self, request, key):
+        from django.http import HttpResponse, HttpResponseNotModified
+        from .barcode_render import render_cache
+        
+        etag = f'"{key}"'
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            data = render_cache.read(key)
+            if data is None:
+                return Response({'error': '이미지를 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+            response = HttpResponse(data, content_type='image/png')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+
 class StockAlertViewSet(viewsets.ReadOnlyModelViewSet):
     """재고 알림 ViewSet"""
     
@@ -502,40 +677,56 @@ class InventoryCountViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     @action(detail=True, methods=['post'])
-    def complete(self, request, pk=None):
-        """실사 완료 및 재고 조정"""
+    def snapshot(self, request, pk=None):
+        """창고의 활성 품목을 현재 재고로 실사 품목에 일괄 추가 (INSERT ... SELECT 1회)"""
         inventory_count = self.get_object()
         
-        if inventory_count.status != 'in_progress':
-            return Response(
-                {'error': '진행중인 실사만 완료할 수 있습니다.'},
-                status=status.HTTP_400_BAD_REQUEST
+        try:
+            created = InventoryCountService().snapshot(inventory_count)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': f'{created}개 품목이 추가되었습니다.',
+            'created': created,
+            'item_count': inventory_count.items.count(),
+            'status': inventory_count.status,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def counts(self, request, pk=None):
+        """
+        실사 수량 일괄 입력
+        Body: {"counts": [{"barcode": "...", "counted_quantity": 3, "remarks": ""}, ...]}
+        """
+        inventory_count = self.get_object()
+        serializer = InventoryCountBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        try:
+            result = InventoryCountService().record_counts(
+                inventory_count, serializer.validated_data['counts'], request.user
             )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        with transaction.atomic():
-            # 차이가 있는 품목 조정
-            for count_item in inventory_count.items.filter(counted_quantity__isnull=False):
-                if count_item.difference and count_item.difference != 0:
-                    item = count_item.item
-                    StockTransaction.objects.create(
-                        item=item,
-                        transaction_type='adjust',
-                        quantity=abs(count_item.difference),
-                        before_quantity=item.current_quantity,
-                        after_quantity=count_item.counted_quantity,
-                        performed_by=request.user,
-                        reference_number=inventory_count.count_number,
-                        remarks=f'재고 실사 조정: {count_item.remarks}'
-                    )
-                    item.current_quantity = count_item.counted_quantity
-                    item.save(update_fields=['current_quantity'])
-            
-            inventory_count.status = 'completed'
-            inventory_count.completed_at = timezone.now()
-            inventory_count.approved_by = request.user
-            inventory_count.save()
+        applied = result['updated'] + result['created']
+        return Response({
+            'message': f"{applied}건 입력, {len(result['failed'])}건 실패",
+            **result
+        }, status=status.HTTP_200_OK if applied or not result['failed'] else status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """실사 완료 및 재고 조정 (차이 계산 UPDATE 1회 + 일괄 조정)"""
+        inventory_count = self.get_object()
+        
+        try:
+            result = InventoryCountService().complete(inventory_count, request.user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({'message': '재고 실사가 완료되었습니다.'})
+        return Response({'message': '재고 실사가 완료되었습니다.', **result})
 
 
 class InventoryDashboardView(generics.GenericAPIView):
@@ -2,20 +2,67 @@
 엑셀 기반 문서 관리 Views
 바코드 스캔 시 엑셀 파일 직접 업데이트
 """
+from contextlib import nullcontext
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
 from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
 
 from .models import ExcelMasterDocument, ExcelUpdateLog
+from .excel_lock import WorkbookLockTimeout
+from .excel_parallel import warm_ledgers
+from .excel_tiles import SheetTiles
+from .excel_materialize import db_source_enabled
+from .ledger_upload import LedgerUpload, LedgerUploadError, LedgerUploadConflict
+from .idempotency import IdempotentRequest, ScanDebounce, run_guarded
 from .serializers_excel import (
     ExcelMasterDocumentSerializer,
     ExcelUpdateLogSerializer,
-    BarcodeScanSerializer
+    BarcodeScanSerializer,
+    AppendItemsSerializer,
+    LedgerUploadApplySerializer
 )
 
 
+def stream_json_items(list_key, items, chunk_size=64 * 1024, trailer=None, **fields):
+    """
+    항목 제너레이터를 JSON으로 스트리밍
+    {**fields, list_key: [...], "count": N, **trailer()} 형태
+    count와 trailer 필드는 항목을 모두 보낸 뒤 기록 (합계처럼 끝까지 읽어야 아는 값용)
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    
+    def generate():
+        buffer = ['{']
+        for key, value in fields.items():
+            buffer.append(f'{encoder.encode(key)}: {encoder.encode(value)}, ')
+        buffer.append(f'{encoder.encode(list_key)}: [')
+        
+        count = 0
+        size = 0
+        for item in items:
+            chunk = (', ' if count else '') + encoder.encode(item)
+            buffer.append(chunk)
+            size += len(chunk)
+            count += 1
+            if size >= chunk_size:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        
+        buffer.append(f'], "count": {count}')
+        for key, value in (trailer() if trailer else {}).items():
+            buffer.append(f', {encoder.encode(key)}: {encoder.encode(value)}')
+        buffer.append('}')
+        yield ''.join(buffer)
+    
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
 class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
     """엑셀 마스터 문서 ViewSet (읽기 전용)"""
     queryset = ExcelMasterDocument.objects.all()
@@ -24,32 +71,213 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def list_all_items(self, request):
-        """모든 문서의 항목 통합 조회"""
-        all_items = []
+        """
+        모든 문서의 항목 통합 조회 (스트리밍 응답)
         
-        for doc in ExcelMasterDocument.objects.all():
-            items = doc.read_all_items()
-            for item in items:
-                item['document_id'] = str(doc.id)
-                item['document_title'] = doc.title
-                item['document_type'] = doc.doc_type
-                all_items.append(item)
+        Query params:
+            doc_type: 문서 유형 (쉼표로 여러 개)
+            barcode_prefix: 바코드 접두어
+            since: 이전 응답의 문서 버전 (쉼표 구분) - 바뀌지 않은 문서는 제외
+            page, page_size: 페이지네이션 (page_size 미지정 시 전체)
+        """
+        documents = list(ExcelMasterDocument.objects.all())
         
-        return Response({
-            'count': len(all_items),
-            'results': all_items
-        })
+        # 안정적인 병합 순서 (문서 유형 선언 순서)
+        type_order = {value: idx for idx, value in enumerate(ExcelMasterDocument.DocType.values)}
+        documents.sort(key=lambda d: type_order.get(d.doc_type, len(type_order)))
+        
+        doc_types = request.query_params.get('doc_type')
+        if doc_types:
+            wanted = {t.strip() for t in doc_types.split(',') if t.strip()}
+            documents = [d for d in documents if d.doc_type in wanted]
+        
+        # 클라이언트가 가진 버전과 같은 문서는 제외
+        since = {v.strip() for v in request.query_params.get('since', '').split(',') if v.strip()}
+        versions = {}
+        for doc in documents:
+            version = doc.items_version()
+            versions[doc.id] = version[:16] if version else ''
+        changed = [d for d in documents if versions[d.id] not in since]
+        
+        # 캐시에 없는 원장은 병렬 파싱 후 문서별로 하나씩 읽음 (전체 목록을 만들지 않음)
+        warm_ledgers(changed)
+        
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = request.query_params.get('page_size')
+            page_size = max(int(page_size), 1) if page_size else None
+        except ValueError:
+            return Response({'error': 'page, page_size는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        barcode_prefix = request.query_params.get('barcode_prefix', '').strip().upper()
+        start = (page - 1) * page_size if page_size else 0
+        stop = start + page_size if page_size else None
+        summary = {'total': 0}
+        
+        def page_items():
+            # 현재 페이지 항목만 반환하고 나머지는 개수만 셈 (total/has_next는 마지막에 기록)
+            for doc in changed:
+                for item in doc.stream_items():
+                    if barcode_prefix and not item['barcode'].upper().startswith(barcode_prefix):
+                        continue
+                    position = summary['total']
+                    summary['total'] += 1
+                    if position < start or (stop is not None and position >= stop):
+                        continue
+                    item['document_id'] = str(doc.id)
+                    item['document_title'] = doc.title
+                    item['document_type'] = doc.doc_type
+                    yield item
+        
+        def trailer():
+            total = summary['total']
+            return {
+                'total': total,
+                'page_size': page_size or total or 1,
+                'has_next': stop is not None and stop < total,
+            }
+        
+        return stream_json_items(
+            'results',
+            page_items(),
+            trailer=trailer,
+            documents=[
+                {
+                    'id': str(doc.id),
+                    'doc_type': doc.doc_type,
+                    'version': versions[doc.id],
+                    'changed': doc in changed,
+                }
+                for doc in documents
+            ],
+            page=page,
+        )
     
     @action(detail=True, methods=['get'])
     def items(self, request, pk=None):
-        """특정 문서의 항목 조회"""
+        """특정 문서의 항목 조회 (스트리밍 응답)"""
+        document = self.get_object()
+        
+        return stream_json_items(
+            'items',
+            document.stream_items(),
+            document=ExcelMasterDocumentSerializer(document).data
+        )
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """원장 파일 다운로드 (DB 기준 모드에서는 현재 DB 상태로 생성한 파일)"""
+        import os
+        from django.http import FileResponse
+        
+        document = self.get_object()
+        if not document.get_file_path().exists():
+            return Response({'error': '엑셀 파일을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            file_path = document.ledger_path()
+        except WorkbookLockTimeout as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        return FileResponse(
+            open(file_path, 'rb'),
+            as_attachment=True,
+            filename=os.path.basename(document.file_path)
+        )
+    
+    @action(detail=True, methods=['get'])
+    def sheet_tiles(self, request, pk=None):
+        """
+        시트 영역을 JSON 타일로 조회 (뷰어용, 보이는 행만 요청)
+        
+        Query params:
+            sheet: 시트명 (기본: 문서 시트)
+            row, rows: 시작 행(1-based), 행 수 (기본 1, 200)
+            col, cols: 시작 열(1-based), 열 수 (기본 1, 전체)
+        
+        파일 내용 해시 기반 ETag - If-None-Match가 같으면 304
+        """
+        import hashlib
+        
         document = self.get_object()
-        items = document.read_all_items()
+        if not document.get_file_path().exists():
+            return Response({'error': '엑셀 파일을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        params = request.query_params
+        try:
+            row = max(int(params.get('row', 1)), 1)
+            rows = min(max(int(params.get('rows', 200)), 1), 2000)
+            col = max(int(params.get('col', 1)), 1)
+            cols = min(max(int(params.get('cols', 16384)), 1), 16384)
+        except ValueError:
+            return Response({'error': 'row, rows, col, cols는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        tiles = SheetTiles(document, params.get('sheet') or None)
+        window_key = f'{tiles.version}|{tiles.sheet_name}|{row}|{rows}|{col}|{cols}'
+        etag = '"' + hashlib.sha256(window_key.encode('utf-8')).hexdigest()[:32] + '"'
+        
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(tiles.window(row, rows, col, cols))
+        
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    @action(detail=True, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def upload_ledger(self, request, pk=None):
+        """
+        오프라인에서 수정한 원장 업로드 → DB와의 차이 미리보기
+        반영은 apply_upload로 (upload_id, diff_hash 전달)
+        
+        Form: file=<xlsx>
+        """
+        document = self.get_object()
+        uploaded_file = request.FILES.get('file')
+        
+        if not uploaded_file:
+            return Response({'error': '업로드할 엑셀 파일이 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not uploaded_file.name.lower().endswith(('.xlsx', '.xlsm')):
+            return Response({'error': 'xlsx 파일만 업로드할 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        upload = None
+        try:
+            upload = LedgerUpload.save(document, uploaded_file)
+            return Response(upload.diff())
+        except LedgerUploadError as e:
+            if upload:
+                upload.discard()
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=True, methods=['post'])
+    def apply_upload(self, request, pk=None):
+        """
+        업로드 원장의 차이를 조정 거래로 일괄 반영 (한 트랜잭션)
+        
+        Body: {"upload_id": "...", "diff_hash": "...", "remarks": "..."}
+        """
+        document = self.get_object()
+        serializer = LedgerUploadApplySerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        try:
+            upload = LedgerUpload(document, data['upload_id'])
+            result = upload.apply(
+                request.user,
+                diff_hash=data.get('diff_hash'),
+                remarks=data.get('remarks', '')
+            )
+        except LedgerUploadConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except LedgerUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
-            'document': ExcelMasterDocumentSerializer(document).data,
-            'count': len(items),
-            'items': items
+            'message': f"{result['updated']}개 품목이 반영되었습니다. (조정 거래 {result['transactions']}건)",
+            **result
         })
     
     @action(detail=True, methods=['post'])
@@ -63,24 +291,19 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
         if not cells:
             return Response({'error': '수정할 셀이 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
         
+        if db_source_enabled():
+            return Response({
+                'error': 'DB 기준 모드에서는 엑셀 원장을 직접 수정할 수 없습니다. 재고 거래로 처리해주세요.'
+            }, status=status.HTTP_409_CONFLICT)
+        
         try:
-            import openpyxl
+            from openpyxl.utils import get_column_letter
             
             file_path = document.get_file_path()
             if not file_path.exists():
                 return Response({'error': '엑셀 파일을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
             
-            # 엑셀 파일 열기
-            wb = openpyxl.load_workbook(file_path)
-            
-            # 시트 선택
-            if sheet_name and sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-            else:
-                ws = wb.active
-            
-            updated_count = 0
-            previous_values = {}
+            updates = {}
             new_values = {}
             
             for cell_data in cells:
@@ -91,29 +314,31 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 if row is None or col is None:
                     continue
                 
-                cell = ws.cell(row=row, column=col)
-                cell_addr = f"{openpyxl.utils.get_column_letter(col)}{row}"
-                
-                # 이전 값 저장
-                previous_values[cell_addr] = str(cell.value) if cell.value is not None else ''
-                
                 # 숫자 변환 시도
                 try:
                     if value == '':
-                        cell.value = None
+                        converted = None
                     elif '.' in str(value):
-                        cell.value = float(value)
+                        converted = float(value)
                     else:
-                        cell.value = int(value)
+                        converted = int(value)
                 except (ValueError, TypeError):
-                    cell.value = value
+                    converted = value
                 
-                new_values[cell_addr] = str(value)
-                updated_count += 1
+                updates[(row, col)] = converted
+                new_values[f"{get_column_letter(col)}{row}"] = str(value)
+            
+            updated_count = len(updates)
             
-            # 저장
-            wb.save(file_path)
-            wb.close()
+            # 셀 패치 (지원하지 않는 변경은 openpyxl 저장, 임시 파일 → 원본 교체)
+            with document.lock():
+                previous = document.write_cells(updates, sheet_name=sheet_name)
+            
+            # 이전 값 저장
+            previous_values = {
+                f"{get_column_letter(col)}{row}": str(value) if value is not None else ''
+                for (row, col), value in previous.items()
+            }
             
             # 로그 기록
             ExcelUpdateLog.objects.create(
@@ -131,6 +356,8 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 'cells': new_values
             })
             
+        except WorkbookLockTimeout as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             import traceback
             traceback.print_exc()
@@ -144,15 +371,23 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
         바코드 스캔 처리
         - 바코드 패턴으로 문서 자동 판별
         - 해당 엑셀 파일 업데이트
+        - 같은 Idempotency-Key 재전송/같은 scan_device의 중복 입출고 스캔은 한 번만 처리
         """
         serializer = BarcodeScanSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        barcode = serializer.validated_data['barcode']
-        action_type = serializer.validated_data['action']
-        quantity = serializer.validated_data.get('quantity', 1)
-        remarks = serializer.validated_data.get('remarks', '')
+        data = serializer.validated_data
+        guards = [IdempotentRequest(request, 'excel-scan')]
+        if data['action'] in ('stock_in', 'stock_out'):
+            guards.append(ScanDebounce('excel-scan', data.get('scan_device'), data['barcode'], data['action']))
+        return run_guarded(lambda: self._scan_barcode(request, data), *guards)
+    
+    def _scan_barcode(self, request, data):
+        barcode = data['barcode']
+        action_type = data['action']
+        quantity = data.get('quantity', 1)
+        remarks = data.get('remarks', '')
         
         # 1. 바코드 패턴으로 문서 유형 판별
         document = self._get_document_by_barcode(barcode)
@@ -162,40 +397,109 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 'barcode': barcode
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # 2. 엑셀 파일에서 항목 찾기
-        items = document.read_all_items()
-        existing_item = next((item for item in items if item['barcode'] == barcode), None)
+        if db_source_enabled():
+            return self._handle_db_scan(
+                document, barcode, action_type, quantity, remarks,
+                data.get('name', ''), request.user
+            )
+        
+        # 2~3. 입출고는 읽기 → 재고 확인 → 쓰기를 한 잠금 안에서 처리
+        # (잠금 밖에서 읽은 값으로 계산하면 동시 스캔 시 한쪽 입출고가 사라짐)
+        guard = document.lock() if action_type in ('stock_in', 'stock_out') else nullcontext()
+        try:
+            with guard:
+                existing_item = document.read_item(barcode)
+                
+                if not existing_item:
+                    # 새 항목 추가 (PRT, SUP만 가능)
+                    if document.doc_type in [ExcelMasterDocument.DocType.PARTS, ExcelMasterDocument.DocType.SUPPLIES]:
+                        return self._add_new_item(
+                            document, barcode, action_type, quantity,
+                            data.get('name', ''), request.user
+                        )
+                    return Response({
+                        'error': f'바코드 "{barcode}"가 {document.title}에 등록되어 있지 않습니다.',
+                        'barcode': barcode,
+                        'document': document.title
+                    }, status=status.HTTP_404_NOT_FOUND)
+                
+                # 기존 항목 업데이트
+                if action_type == 'stock_in':
+                    return self._handle_stock_in(document, barcode, existing_item, quantity, remarks, request.user)
+                elif action_type == 'stock_out':
+                    return self._handle_stock_out(document, barcode, existing_item, quantity, remarks, request.user)
+                else:  # scan
+                    return self._handle_scan(document, barcode, existing_item, request.user)
+        except WorkbookLockTimeout as e:
+            return Response({'error': str(e), 'barcode': barcode}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    def _handle_db_scan(self, document, barcode, action_type, quantity, remarks, name, user):
+        """DB 기준 모드 스캔 (품목/거래만 기록, 엑셀 파일은 건드리지 않음)"""
+        from .models import InventoryItem
+        from .services import StockService
         
-        if not existing_item:
-            # 새 항목 추가 (PRT, SUP만 가능)
-            if document.doc_type in [ExcelMasterDocument.DocType.PARTS, ExcelMasterDocument.DocType.SUPPLIES]:
-                return self._add_new_item(document, barcode, quantity, remarks, request.user)
-            else:
+        item = InventoryItem.objects.filter(barcode=barcode).first()
+        if item is None:
+            if action_type != 'stock_in' or document.doc_type not in ExcelMasterDocument.STOCK_DOC_TYPES:
                 return Response({
                     'error': f'바코드 "{barcode}"가 {document.title}에 등록되어 있지 않습니다.',
                     'barcode': barcode,
                     'document': document.title
                 }, status=status.HTTP_404_NOT_FOUND)
+            item = InventoryItem.objects.create(
+                barcode=barcode, item_code=barcode, name=name or barcode, unit='EA'
+            )
+        
+        previous = {
+            'received': float(item.received_quantity),
+            'issued': float(item.issued_quantity),
+            'current': float(item.current_quantity)
+        }
+        
+        if action_type == 'scan':
+            ExcelUpdateLog.objects.create(
+                document=document,
+                barcode=barcode,
+                action='scan',
+                updates={'scanned': True},
+                created_by=user
+            )
+            return Response({
+                'message': '스캔 완료',
+                'barcode': barcode,
+                'document': document.title,
+                'item': {'barcode': barcode, 'name': item.name, **previous}
+            })
         
-        # 3. 기존 항목 업데이트
-        if action_type == 'stock_in':
-            return self._handle_stock_in(document, barcode, existing_item, quantity, remarks, request.user)
-        elif action_type == 'stock_out':
-            return self._handle_stock_out(document, barcode, existing_item, quantity, remarks, request.user)
-        else:  # scan
-            return self._handle_scan(document, barcode, existing_item, request.user)
+        try:
+            StockService().process_transaction(
+                item, 'in' if action_type == 'stock_in' else 'out', quantity, user,
+                scanned_barcode=barcode, remarks=remarks
+            )
+        except ValueError:
+            return Response({
+                'error': f'재고 부족: 현재 {previous["current"]}, 출고 요청 {quantity}',
+                'barcode': barcode,
+                'current_stock': previous['current'],
+                'requested_quantity': float(quantity)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': '입고 처리 완료' if action_type == 'stock_in' else '출고 처리 완료',
+            'barcode': barcode,
+            'quantity': quantity,
+            'document': document.title,
+            'previous': previous,
+            'updated': {
+                'received': float(item.received_quantity),
+                'issued': float(item.issued_quantity),
+                'current': float(item.current_quantity)
+            }
+        })
     
     def _get_document_by_barcode(self, barcode):
         """바코드 패턴으로 문서 판별"""
-        if barcode.startswith('HP-KSTC-'):
-            return ExcelMasterDocument.objects.filter(doc_type=ExcelMasterDocument.DocType.KS_CERT).first()
-        elif barcode.startswith('HP-P10-') or barcode.startswith('HP-P20-'):
-            return ExcelMasterDocument.objects.filter(doc_type=ExcelMasterDocument.DocType.MEASUREMENT).first()
-        elif barcode.startswith('HP-PRT-'):
-            return ExcelMasterDocument.objects.filter(doc_type=ExcelMasterDocument.DocType.PARTS).first()
-        elif barcode.startswith('HP-SUP-'):
-            return ExcelMasterDocument.objects.filter(doc_type=ExcelMasterDocument.DocType.SUPPLIES).first()
-        return None
+        return ExcelMasterDocument.for_barcode(barcode)
     
     def _handle_scan(self, document, barcode, item, user):
         """스캔만 (정보 조회)"""
@@ -216,19 +520,19 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
         })
     
     def _handle_stock_in(self, document, barcode, item, quantity, remarks, user):
-        """입고 처리"""
+        """입고 처리 (document.lock() 안에서 읽은 item 기준)"""
         if 'received' not in document.extra_columns:
             return Response({
                 'error': f'{document.title}는 입고 처리를 지원하지 않습니다.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 현재 값 읽기
+        # 현재 값 읽기 (현재고는 원장 수식을 계산한 값)
         current_received = float(item.get('received', 0) or 0)
-        current_issued = float(item.get('issued', 0) or 0)
+        current_stock = float(item.get('current', 0) or 0)
         
-        # 새 값 계산
+        # 새 값 계산 (수식 셀인 현재고는 update_item이 덮어쓰지 않음)
         new_received = current_received + float(quantity)
-        new_current = new_received - current_issued
+        new_current = current_stock + float(quantity)
         
         # 엑셀 파일 업데이트
         updates = {
@@ -245,7 +549,7 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 barcode=barcode,
                 action='stock_in',
                 updates={'quantity': float(quantity), 'new_received': new_received, 'new_current': new_current},
-                previous_values={'received': current_received, 'current': current_received - current_issued},
+                previous_values={'received': current_received, 'current': current_stock},
                 created_by=user
             )
             
@@ -256,7 +560,7 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 'document': document.title,
                 'previous': {
                     'received': current_received,
-                    'current': current_received - current_issued
+                    'current': current_stock
                 },
                 'updated': {
                     'received': new_received,
@@ -269,16 +573,15 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     def _handle_stock_out(self, document, barcode, item, quantity, remarks, user):
-        """출고 처리"""
+        """출고 처리 (document.lock() 안에서 읽은 item 기준)"""
         if 'issued' not in document.extra_columns:
             return Response({
                 'error': f'{document.title}는 출고 처리를 지원하지 않습니다.'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 현재 값 읽기
-        current_received = float(item.get('received', 0) or 0)
+        # 현재 값 읽기 (현재고는 원장 수식을 계산한 값)
         current_issued = float(item.get('issued', 0) or 0)
-        current_stock = current_received - current_issued
+        current_stock = float(item.get('current', 0) or 0)
         
         # 재고 부족 확인
         if current_stock < float(quantity):
@@ -291,7 +594,7 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
         
         # 새 값 계산
         new_issued = current_issued + float(quantity)
-        new_current = current_received - new_issued
+        new_current = current_stock - float(quantity)
         
         # 엑셀 파일 업데이트
         updates = {
@@ -331,13 +634,132 @@ class ExcelMasterDocumentViewSet(viewsets.ReadOnlyModelViewSet):
                 'error': '엑셀 파일 업데이트 실패'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    def _add_new_item(self, document, barcode, quantity, remarks, user):
-        """새 항목 추가 (엑셀에 새 행 추가)"""
-        # TODO: 엑셀에 새 행 추가하는 로직 구현
+    def _add_new_item(self, document, barcode, action_type, quantity, name, user):
+        """새 항목 추가 (엑셀 마지막 항목 뒤에 새 행 추가)"""
+        if action_type == 'stock_out':
+            return Response({
+                'error': f'바코드 "{barcode}"가 {document.title}에 없어 출고할 수 없습니다.',
+                'barcode': barcode
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        received = float(quantity) if action_type == 'stock_in' else 0
+        name = name or self._item_names([barcode]).get(barcode, '')
+        
+        try:
+            added = document.append_items([{'barcode': barcode, 'name': name, 'received': received}])
+        except ValueError as e:
+            return Response({'error': str(e), 'barcode': barcode}, status=status.HTTP_409_CONFLICT)
+        
+        if barcode not in added:
+            # 동시에 다른 요청이 먼저 추가한 경우
+            return Response({
+                'error': f'바코드 "{barcode}"가 이미 {document.title}에 등록되어 있습니다. 다시 스캔해주세요.',
+                'barcode': barcode
+            }, status=status.HTTP_409_CONFLICT)
+        
+        updates = {'name': name, 'received': received, 'issued': 0, 'current': received}
+        ExcelUpdateLog.objects.create(
+            document=document,
+            barcode=barcode,
+            action='add_item',
+            updates={**updates, 'row': added[barcode]},
+            created_by=user
+        )
+        
+        return Response({
+            'message': '새 항목 추가 완료',
+            'barcode': barcode,
+            'quantity': quantity,
+            'document': document.title,
+            'row': added[barcode],
+            'updated': updates
+        }, status=status.HTTP_201_CREATED)
+    
+    @staticmethod
+    def _item_names(barcodes):
+        """등록된 재고 품목명 (엑셀에 이름이 없을 때 사용)"""
+        from .models import InventoryItem
+        return dict(
+            InventoryItem.objects.filter(barcode__in=barcodes).values_list('barcode', 'name')
+        )
+    
+    @action(detail=False, methods=['post'])
+    def append_items(self, request):
+        """
+        새 PRT/SUP 항목 일괄 추가 (입고 세션 단위)
+        문서별로 한 번만 저장
+        
+        Body: {"items": [{"barcode": "HP-PRT-...", "name": "...", "quantity": 3}, ...]}
+        """
+        serializer = AppendItemsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        if db_source_enabled():
+            return Response({
+                'error': 'DB 기준 모드에서는 품목 등록/입고로 처리해주세요. 원장은 조회 시 생성됩니다.'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        entries = serializer.validated_data['items']
+        names = self._item_names([entry['barcode'] for entry in entries])
+        
+        documents = {
+            doc.doc_type: doc for doc in ExcelMasterDocument.objects.filter(
+                doc_type__in=ExcelMasterDocument.STOCK_DOC_TYPES
+            )
+        }
+        
+        grouped = {}
+        for entry in entries:
+            document = documents.get(ExcelMasterDocument.doc_type_for_barcode(entry['barcode']))
+            if not document:
+                continue
+            grouped.setdefault(document.id, (document, []))[1].append({
+                'barcode': entry['barcode'],
+                'name': entry.get('name') or names.get(entry['barcode'], ''),
+                'received': float(entry['quantity']),
+            })
+        
+        results = []
+        logs = []
+        try:
+            for document, doc_entries in grouped.values():
+                added = document.append_items(doc_entries)
+                for entry in doc_entries:
+                    row = added.get(entry['barcode'])
+                    results.append({
+                        'barcode': entry['barcode'],
+                        'document': document.title,
+                        'row': row,
+                        'added': row is not None,
+                    })
+                    if row is not None:
+                        logs.append(ExcelUpdateLog(
+                            document=document,
+                            barcode=entry['barcode'],
+                            action='add_item',
+                            updates={
+                                'name': entry['name'],
+                                'received': entry['received'],
+                                'issued': 0,
+                                'current': entry['received'],
+                                'row': row
+                            },
+                            created_by=request.user
+                        ))
+        except WorkbookLockTimeout as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        finally:
+            ExcelUpdateLog.objects.bulk_create(logs)
+        
+        added_count = sum(1 for result in results if result['added'])
         return Response({
-            'error': '새 항목 추가 기능은 아직 구현되지 않았습니다. 엑셀 파일에서 직접 추가해주세요.',
-            'barcode': barcode
-        }, status=status.HTTP_501_NOT_IMPLEMENTED)
+            'message': f'{added_count}개 항목이 추가되었습니다.',
+            'added_count': added_count,
+            'results': results
+        }, status=status.HTTP_201_CREATED if added_count else status.HTTP_200_OK)
 
 
 class ExcelUpdateLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -0,0 +1,102 @@
+"""
+ZPL 라벨 (Zebra 계열 감열 프린터)
+PNG를 보내는 대신 프린터가 직접 Code128/QR을 생성하도록 ZPL 명령만 전송
+(라벨 1장 수백 바이트, 프린터 해상도 그대로 선명하게 인쇄)
+
+- 필드 값은 ^FH 16진 이스케이프(^, ~, _)로 명령 문자와 분리, ^CI28로 UTF-8 사용
+- 한글 출력은 프린터에 다운로드한 TTF 폰트 필요 (ZPL_FONT, 예: 'E:NANUMGOTHIC.TTF')
+- 위치/크기는 mm 기준으로 계산해 프린터 dpi(203/300/600)에 맞게 도트 변환
+"""
+from django.conf import settings
+
+from .qr_payload import qr_options
+
+ESCAPES = {'_': '_5F', '^': '_5E', '~': '_7E'}
+
+
+def escape(value):
+    """^FH_ 필드 데이터 이스케이프 (제어 문자는 공백으로)"""
+    return ''.join(' ' if ord(ch) < 32 else ESCAPES.get(ch, ch) for ch in str(value or ''))
+
+
+class ZplFormat:
+    """프린터 라벨 규격 (mm, dpi)"""
+
+    def __init__(self, dpi=203, label_width=60, label_height=40, font=None):
+        self.dpi = int(dpi)
+        self.label_width = float(label_width)
+        self.label_height = float(label_height)
+        self.font = font if font is not None else getattr(settings, 'ZPL_FONT', None)
+
+    @classmethod
+    def for_printer(cls, printer):
+        """LABEL_PRINTERS 항목 → 규격"""
+        return cls(**{key: printer[key] for key in ('dpi', 'label_width', 'label_height', 'font') if key in printer})
+
+    def dots(self, mm):
+        return int(round(mm * self.dpi / 25.4))
+
+    def _text(self, x, y, height, width, value):
+        """한 줄 텍스트 (^FB로 폭 안에서 잘림)"""
+        font = f'^A@N,{height},{height},{self.font}' if self.font else f'^A0N,{height},{height}'
+        return f'^FO{x},{y}{font}^FB{width},1,0,L,0^FH_^FD{escape(value)}^FS'
+
+    def render(self, label, label_type='both', copies=1):
+        """
+        라벨 1종 ZPL (^XA ... ^PQ 매수 ^XZ)
+
+        Args:
+            label: {item_code, name, specification, unit, barcode, qr_data}
+        """
+        width, height = self.dots(self.label_width), self.dots(self.label_height)
+        margin = self.dots(2)
+        inner_width, inner_height = width - 2 * margin, height - 2 * margin
+        parts = ['^XA', '^CI28', f'^PW{width}', f'^LL{height}', '^LH0,0']
+
+        text_width = inner_width
+        if label_type in ('qr', 'both'):
+            target = min(inner_height, int(inner_width * 0.45))
+            # 프린터도 오류정정 수준별 최소 버전을 사용하므로 같은 모듈 수
+            version, error_correction = qr_options(label['qr_data'])
+            modules = 17 + 4 * version
+            magnification = max(1, min(10, target // modules))
+            size = magnification * modules
+            # ^BQ는 필드 원점 아래로 약 10도트 여백이 생김
+            top = max(0, margin + (inner_height - size) // 2 - 10)
+            parts.append(
+                f"^FO{width - margin - size},{top}^BQN,2,{magnification}"
+                f"^FH_^FD{error_correction}A,{escape(label['qr_data'])}^FS"
+            )
+            text_width = inner_width - size - self.dots(1)
+
+        bottom = height - margin
+        if label_type in ('barcode', 'both'):
+            bar_height = self.dots(10 if label_type == 'barcode' else 8)
+            text_height = self.dots(2.5)
+            modules = 11 * (len(label['barcode']) + 3) + 2  # Code128 B (시작+체크+정지)
+            module_width = max(1, min(3, text_width // modules))
+            top = bottom - bar_height - text_height
+            parts.append(
+                f"^FO{margin},{top}^BY{module_width},2.0,{bar_height}"
+                f"^BCN,{bar_height},Y,N,N^FH_^FD{escape(label['barcode'])}^FS"
+            )
+            bottom = top - self.dots(0.5)
+
+        spec = ' / '.join(part for part in (label['specification'], label['unit']) if part)
+        y = margin
+        for value, size_mm in ((label['item_code'], 3.5), (label['name'], 3.0), (spec, 2.5)):
+            size = self.dots(size_mm)
+            if y + size > bottom:
+                break
+            if value:
+                parts.append(self._text(margin, y, size, text_width, value))
+            y += size + self.dots(0.8)
+
+        if copies > 1:
+            parts.append(f'^PQ{copies}')
+        parts.append('^XZ')
+        return ''.join(parts)
+
+    def render_batch(self, labels, label_type='both', copies=1):
+        """여러 라벨 ZPL (라벨마다 ^XA...^XZ, 한 번에 전송)"""
+        return '\n'.join(self.render(label, label_type, copies) for label in labels) + '\n'
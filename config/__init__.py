@@ -1 +1,6 @@
 # HPE Configuration Package
+
+# Django 시작 시 Celery 앱 로드 (shared_task가 브로커 설정을 사용하도록)
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -24,6 +24,31 @@ app.conf.beat_schedule = {
         'task': 'apps.inventory.tasks.check_safety_stock_levels',
         'schedule': crontab(minute=0),  # Every hour
     },
+    # Pending Excel ledger sync every minute
+    'sync-excel-outbox': {
+        'task': 'apps.inventory.tasks.sync_pending_excel_outbox',
+        'schedule': crontab(),  # Every minute
+    },
+    # Stock alert email digests every minute
+    'send-alert-digests': {
+        'task': 'apps.inventory.tasks.send_alert_digests',
+        'schedule': crontab(),  # Every minute
+    },
+    # Label printer queue (ZPL, RAW 9100) retries every minute
+    'process-label-print-queue': {
+        'task': 'apps.inventory.tasks.process_label_print_queue',
+        'schedule': crontab(),  # Every minute
+    },
+    # DB ↔ Excel ledger reconciliation report at 3:00 AM
+    'reconcile-excel-ledgers': {
+        'task': 'apps.inventory.tasks.reconcile_excel_ledgers',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Barcode/QR label render cache warm-up at 4:00 AM
+    'warm-barcode-renders': {
+        'task': 'apps.inventory.tasks.warm_barcode_renders',
+        'schedule': crontab(hour=4, minute=0),
+    },
     # Document approval reminder at 9:00 AM
     'approval-reminder': {
         'task': 'apps.documents.tasks.send_pending_approval_reminders',
@@ -183,6 +183,69 @@ WORKFLOW_STATES = {
 
 # Inventory Configuration
 SAFETY_STOCK_ALERT_ENABLED = True
+ALERT_DIGEST_WINDOW = 600  # 재고 알림 메일 요약 창 (초) - 수신자별로 이 시간 동안의 알림을 한 통으로
+# 창이 지난 요약은 예약 작업과 Celery beat의 send-alert-digests(매분, 예약 실패분)가 발송 - 운영은 worker/beat 필요
+# CELERY_TASK_ALWAYS_EAGER(개발)에서는 창 없이 커밋 직후 바로 발송
+NOTIFICATION_MAX_ATTEMPTS = 5  # 알림 메일 발송 최대 시도 횟수 (실패 시 지수 백오프)
+
+# Stock Request Deduplication (스캐너 재전송/중복 스캔)
+IDEMPOTENCY_KEY_TTL = 86400  # Idempotency-Key 응답 보관 시간 (초)
+SCAN_DEBOUNCE_SECONDS = 0  # 같은 장치(scan_device)의 같은 바코드+작업을 N초 안에 다시 보내면 한 번만 처리 (0: 사용 안 함)
+
+# Barcode Resolution Cache (바코드 → 품목/위치/원장 행)
+BARCODE_CACHE_SIZE = 10000  # 프로세스 내 LRU 항목 수
+BARCODE_CACHE_LOCAL_TTL = 30  # 프로세스 내 항목 유효 시간 (초) - 다른 프로세스의 무효화 반영 지연 상한
+BARCODE_CACHE_ALIAS = 'default'  # 공유 계층 (운영은 Redis)
+BARCODE_CACHE_TIMEOUT = 3600  # 공유 계층 보관 시간 (초)
+
+# QR Payload (간결형 'HP1:<바코드>' - 스캔 시 기존 JSON 페이로드도 해석)
+QR_PAYLOAD_FORMAT = 'compact'  # 'json'이면 기존 JSON 형식으로 생성
+QR_PAYLOAD_FIELDS = ()  # QR에 함께 넣을 필드 ('item_code', 'unit', 'name') - 늘리면 QR 버전이 커짐
+
+# Barcode/QR Render Cache (MEDIA_ROOT/barcode_renders, 내용 주소 방식 PNG)
+BARCODE_RENDER_MAX_FILES = 50000  # 초과 시 오래 사용하지 않은 이미지부터 삭제
+
+# Label Sheet PDF (A4 라벨 용지, 프로세스 풀은 EXCEL_PARSE_WORKERS 공유)
+LABEL_SHEET_PAGES_PER_TASK = 5  # 워커 작업 1건당 렌더링할 페이지 수
+
+# Label Printers (ZPL 감열 프린터, RAW TCP 9100)
+# 예: {'warehouse-1': {'host': '192.168.0.50', 'port': 9100, 'dpi': 203, 'label_width': 60, 'label_height': 40}}
+LABEL_PRINTERS = {}
+LABEL_PRINTER_DEFAULT = None  # None이면 프린터가 하나일 때 그 프린터
+LABEL_PRINT_TIMEOUT = 10  # 연결/전송 제한 시간 (초)
+LABEL_PRINT_MAX_ATTEMPTS = 5  # 초과 시 실패 처리 (관리자 화면에서 재시도)
+ZPL_FONT = None  # 한글 출력용 프린터 폰트 (예: 'E:NANUMGOTHIC.TTF'), None이면 내장 폰트 0
+
+# Excel Ledger Cache (파싱된 엑셀 원장 캐시)
+EXCEL_LEDGER_CACHE_SIZE = 16  # 프로세스 내 LRU 항목 수
+EXCEL_LEDGER_CACHE_SHARED = False  # True: Django cache(Redis)를 공유 계층으로 사용
+EXCEL_LEDGER_CACHE_ALIAS = 'default'
+EXCEL_LEDGER_CACHE_TIMEOUT = 3600  # 공유 계층 보관 시간 (초)
+
+# Excel Ledger Sync (입출고 → 엑셀 원장 비동기 반영)
+EXCEL_SYNC_MAX_ATTEMPTS = 5
+
+# Excel Ledger Write Lock (문서별 쓰기 잠금)
+EXCEL_LOCK_TIMEOUT = 10  # 잠금 대기 최대 시간 (초)
+EXCEL_LOCK_DIR = None  # None이면 MEDIA_ROOT/.locks
+EXCEL_SNAPSHOT_VERSIONS = 5  # 저장 전 스냅샷 보관 개수 (0: 사용 안 함)
+
+# Excel Ledger Parallel Loading (여러 원장 동시 파싱)
+EXCEL_PARSE_WORKERS = 2  # 웹 워커 프로세스당 파싱/라벨 렌더링 프로세스 수 (CPU 수 이하로 제한)
+EXCEL_PARSE_START_METHOD = 'forkserver'  # 스레드가 있는 웹 워커를 fork하지 않음 (지원하지 않는 OS는 spawn)
+
+# Excel Ledger Source
+# 'excel': 엑셀 파일이 원장 (입출고 시 파일 갱신)
+# 'db': InventoryItem/StockTransaction이 원본, 엑셀은 조회/다운로드 시 생성
+EXCEL_LEDGER_SOURCE = 'excel'
+
+# Excel Ledger Cell Patch (셀 값만 바뀌는 저장은 워크시트 XML 직접 수정)
+EXCEL_PATCH_ENABLED = True
+
+# Excel Sheet Tiles (뷰어용 서버 측 시트 렌더링)
+EXCEL_TILE_ROWS = 100
+EXCEL_TILE_COLS = 32
+EXCEL_TILE_CACHE_TIMEOUT = 86400  # 내용 해시가 키에 포함되므로 무효화 불필요
 
 # Backup Configuration
 BACKUP_ENABLED = True
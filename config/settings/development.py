@@ -41,6 +41,9 @@ INTERNAL_IPS = ['127.0.0.1']
 # Email - Console backend for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
+# Celery - 브로커 없이 동기 실행
+CELERY_TASK_ALWAYS_EAGER = True
+
 # Disable WhiteNoise in development
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
@@ -63,6 +63,9 @@ CACHES = {
     }
 }
 
+# Excel Ledger Cache - Redis 공유 계층 사용
+EXCEL_LEDGER_CACHE_SHARED = True
+
 # Session Configuration
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+"""
+엑셀 원장 읽기 벤치마크
+- full: 기존 방식 (전체 워크북 로드 + ws.cell 랜덤 접근)
+- streaming: 읽기 전용 iter_rows(values_only=True) 제너레이터
+
+번들된 원장의 데이터 행을 복제해 지정한 행 수(기본 50,000)로 확장한 뒤
+모드별로 별도 프로세스에서 실행하여 소요 시간과 최대 RSS를 측정
+
+- 확장 파일 생성도 별도 프로세스 (부모가 워크북을 메모리에 올리지 않도록)
+- Linux: ru_maxrss는 fork+exec 후에도 부모의 최대값이 이어지므로
+  /proc/self/status의 VmHWM을 사용하고 파싱 직전에 /proc/self/clear_refs로 초기화
+
+사용법: python scripts/benchmark_excel_read.py [--rows 50000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import django
+
+# Django 설정
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+django.setup()
+
+import openpyxl
+from apps.inventory.models import ExcelMasterDocument
+
+LEDGERS = [
+    {
+        'file_path': 'KS 인증 사내문서 관리대장_251226.xlsx',
+        'sheet_name': 'Sheet1',
+        'data_start_row': 8, 'barcode_column': 3, 'name_column': 6,
+        'extra_columns': {},
+    },
+    {
+        'file_path': '계측장비 재고조사 관리대장_251224.xlsx',
+        'sheet_name': '계측장비관리대장',
+        'data_start_row': 8, 'barcode_column': 2, 'name_column': 5,
+        'extra_columns': {},
+    },
+    {
+        'file_path': '재고관리 리스트 (PRT).xlsx',
+        'sheet_name': '사내부품(PRT)-001',
+        'data_start_row': 14, 'barcode_column': 4, 'name_column': 6,
+        'extra_columns': {'received': 8, 'issued': 9, 'current': 10},
+    },
+    {
+        'file_path': '재고관리 리스트 (SUP).xlsx',
+        'sheet_name': '사내부품(PRT)-001',
+        'data_start_row': 14, 'barcode_column': 4, 'name_column': 6,
+        'extra_columns': {'received': 8, 'issued': 9, 'current': 10},
+    },
+]
+
+
+def make_document(ledger, file_path):
+    """DB에 저장하지 않는 문서 객체"""
+    return ExcelMasterDocument(
+        title=os.path.basename(ledger['file_path']),
+        file_path=str(file_path),
+        sheet_name=ledger['sheet_name'],
+        data_start_row=ledger['data_start_row'],
+        barcode_column=ledger['barcode_column'],
+        name_column=ledger['name_column'],
+        extra_columns=ledger['extra_columns'],
+    )
+
+
+def scale_ledger(ledger, target_rows, out_dir):
+    """원장 데이터 행을 복제해 target_rows 행으로 확장"""
+    source = os.path.join(project_root, ledger['file_path'])
+    wb = openpyxl.load_workbook(source)
+    ws = wb[ledger['sheet_name']]
+
+    start = ledger['data_start_row']
+    template = [
+        [cell.value for cell in row]
+        for row in ws.iter_rows(min_row=start, max_row=ws.max_row)
+    ]
+    barcode_idx = ledger['barcode_column'] - 1
+
+    next_row = ws.max_row + 1
+    copy_no = 0
+    while next_row - start < target_rows:
+        copy_no += 1
+        for values in template:
+            if next_row - start >= target_rows:
+                break
+            for col_idx, value in enumerate(values, start=1):
+                if value is None:
+                    continue
+                if col_idx - 1 == barcode_idx:
+                    value = f'{value}-X{copy_no}'
+                ws.cell(row=next_row, column=col_idx, value=value)
+            next_row += 1
+
+    out_path = os.path.join(out_dir, f'scaled_{os.path.basename(ledger["file_path"])}')
+    wb.save(out_path)
+    wb.close()
+    return out_path
+
+
+def parse_full(document):
+    """기존 방식: 전체 로드 + 랜덤 접근"""
+    wb = openpyxl.load_workbook(document.get_file_path(), data_only=True)
+    ws = wb[document.sheet_name]
+
+    items = []
+    current_item = None
+    for row_idx in range(document.data_start_row, ws.max_row + 1):
+        barcode = ws.cell(row=row_idx, column=document.barcode_column).value
+        name = ws.cell(row=row_idx, column=document.name_column).value
+        if barcode:
+            if current_item:
+                items.append(current_item)
+            current_item = {'row': row_idx, 'barcode': str(barcode).strip(), 'name': str(name or '').strip()}
+            for key, col_idx in document.extra_columns.items():
+                current_item[key] = document._to_number(ws.cell(row=row_idx, column=col_idx).value)
+        elif current_item and name:
+            current_item['name'] += ' ' + str(name).strip()
+    if current_item:
+        items.append(current_item)
+    wb.close()
+    return len(items)
+
+
+def parse_streaming(document):
+    """스트리밍 방식: 항목을 보관하지 않고 순회만"""
+    return sum(1 for _ in document.iter_items())
+
+
+def read_status_kb(field):
+    """/proc/self/status 값 (KB, 없으면 None)"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """최대 RSS(VmHWM)를 현재 RSS로 초기화 (Linux 4.0+)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_fallback_kb():
+    """/proc 없는 환경: ru_maxrss (macOS는 bytes 단위)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_child(mode, ledger_index, file_path):
+    """자식 프로세스: 한 가지 모드만 측정"""
+    document = make_document(LEDGERS[ledger_index], file_path)
+    use_proc = reset_peak_rss() and read_status_kb('VmHWM') is not None
+    baseline_rss_kb = read_status_kb('VmRSS') if use_proc else peak_rss_fallback_kb()
+    started = time.perf_counter()
+    count = parse_full(document) if mode == 'full' else parse_streaming(document)
+    elapsed = time.perf_counter() - started
+    peak_rss_kb = read_status_kb('VmHWM') if use_proc else peak_rss_fallback_kb()
+    print(json.dumps({
+        'items': count,
+        'seconds': elapsed,
+        'peak_rss_kb': peak_rss_kb,
+        'parse_rss_kb': peak_rss_kb - baseline_rss_kb,
+    }))
+
+
+def scale_in_child(ledger_index, target_rows, out_dir):
+    """확장 파일을 별도 프로세스에서 생성 (경로 반환)"""
+    output = subprocess.run(
+        [sys.executable, __file__, '--scale', str(ledger_index), str(target_rows), out_dir],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return output.strip().splitlines()[-1]
+
+
+def measure(mode, ledger_index, file_path):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', mode, str(ledger_index), file_path],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='엑셀 원장 읽기 벤치마크')
+    parser.add_argument('--rows', type=int, default=50000, help='확장할 데이터 행 수')
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    parser.add_argument('--scale', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scale:
+        ledger_index, target_rows, out_dir = args.scale
+        print(scale_ledger(LEDGERS[int(ledger_index)], int(target_rows), out_dir))
+        return
+
+    if args.child:
+        mode, ledger_index, file_path = args.child
+        run_child(mode, int(ledger_index), file_path)
+        return
+
+    print('\n' + '=' * 80)
+    print(f'📊 엑셀 원장 읽기 벤치마크 ({args.rows:,}행)')
+    print('=' * 80)
+    print(f"{'원장':<40} {'모드':<10} {'항목':>8} {'시간(s)':>9} {'최대RSS(MB)':>12} {'파싱증가(MB)':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index, ledger in enumerate(LEDGERS):
+            file_path = scale_in_child(index, args.rows, tmp_dir)
+            for mode in ('full', 'streaming'):
+                result = measure(mode, index, file_path)
+                print(
+                    f"{ledger['file_path']:<40} {mode:<10} {result['items']:>8} "
+                    f"{result['seconds']:>9.2f} {result['peak_rss_kb'] / 1024:>12.1f} "
+                    f"{result['parse_rss_kb'] / 1024:>12.1f}"
+                )
+
+    print('=' * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+동시 출고 테스트
+같은 품목에 출고 요청을 병렬로 보내 재고가 음수가 되지 않는지 확인
+
+- 재고 N개 품목에 1개씩 출고 요청 M건(기본 50건)을 스레드로 동시에 실행
+- 성공 건수 == min(N, M), 최종 재고 >= 0, 거래 기록 수 == 성공 건수,
+  거래 후 수량이 모두 다른지(같은 재고를 두 번 차감하지 않았는지) 검증
+- 테스트 품목/거래는 끝나면 삭제
+
+사용법: python scripts/test_concurrent_stock_out.py [--requests 50] [--stock 20]
+(PostgreSQL 권장 - SQLite는 쓰기가 직렬화되어 잠금 대기가 발생할 수 있음)
+"""
+import argparse
+import os
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import django
+
+# Django 설정
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import connection, OperationalError
+from apps.inventory.models import InventoryItem, StockTransaction
+from apps.inventory.services import StockService
+
+
+def stock_out(item_id, user, barrier):
+    """출고 1건 (모든 스레드가 준비된 뒤 동시에 시작)"""
+    try:
+        barrier.wait()
+        item = InventoryItem.objects.get(id=item_id)  # 스레드마다 같은(오래된) 재고 값을 가진 인스턴스
+        StockService().process_transaction(item, 'out', Decimal('1'), user, remarks='동시 출고 테스트')
+        return 'ok'
+    except ValueError:
+        return 'insufficient'
+    except OperationalError as e:
+        return f'db_error: {e}'
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='동시 출고 테스트')
+    parser.add_argument('--requests', type=int, default=50, help='동시 출고 요청 수')
+    parser.add_argument('--stock', type=int, default=20, help='초기 재고')
+    args = parser.parse_args()
+
+    user = get_user_model().objects.filter(is_superuser=True).first() or get_user_model().objects.first()
+    if user is None:
+        print('❌ 사용자가 없습니다. 먼저 init_data.py를 실행하세요.')
+        return 1
+
+    code = f'TEST-CONCURRENT-{uuid.uuid4().hex[:8].upper()}'
+    item = InventoryItem.objects.create(
+        item_code=code, barcode=code, name='동시 출고 테스트 품목',
+        current_quantity=args.stock, received_quantity=args.stock,
+    )
+
+    try:
+        barrier = threading.Barrier(args.requests)
+        with ThreadPoolExecutor(max_workers=args.requests) as executor:
+            results = list(executor.map(
+                lambda _: stock_out(item.id, user, barrier), range(args.requests)
+            ))
+
+        item.refresh_from_db()
+        transactions = StockTransaction.objects.filter(item=item)
+        succeeded = results.count('ok')
+        after_values = list(transactions.values_list('after_quantity', flat=True))
+        expected = min(args.stock, args.requests)
+
+        print(f'요청 {args.requests}건 / 초기 재고 {args.stock}')
+        print(f'  성공 {succeeded}건, 재고 부족 {results.count("insufficient")}건, '
+              f'DB 오류 {sum(1 for r in results if r.startswith("db_error"))}건')
+        print(f'  최종 재고 {item.current_quantity}, 출고 누계 {item.issued_quantity}, 거래 기록 {len(after_values)}건')
+
+        checks = {
+            '재고가 음수가 아님': item.current_quantity >= 0,
+            '최종 재고 = 초기 재고 - 성공 건수': item.current_quantity == args.stock - succeeded,
+            '출고 누계 = 성공 건수': item.issued_quantity == succeeded,
+            '거래 기록 수 = 성공 건수': len(after_values) == succeeded,
+            '거래 후 수량 중복 없음': len(set(after_values)) == len(after_values),
+            f'DB 오류가 없으면 성공 {expected}건': (
+                succeeded == expected or any(r.startswith('db_error') for r in results)
+            ),
+        }
+        for name, passed in checks.items():
+            print(f"  {'✅' if passed else '❌'} {name}")
+        return 0 if all(checks.values()) else 1
+    finally:
+        StockTransaction.objects.filter(item=item).delete()
+        item.alerts.all().delete()
+        item.delete()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+라벨 프린터 출력 대기열 테스트 (로컬 소켓 프린터 대용)
+RAW 9100 프린터 대신 로컬 TCP 서버를 띄워 ZPL 작업 전송을 확인
+
+- 품목 N개(기본 200개) 라벨 작업을 대기열에 등록하고 전송 → 받은 데이터가 작업 ZPL과 같은지,
+  라벨 수(^XA 개수)가 맞는지 확인
+- 프린터를 끈 상태에서 전송 → 실패 기록/백오프, 뒤 작업은 순서 유지를 위해 보류되는지 확인
+- 프린터를 다시 켜고 백오프 시각 이후 전송 → 두 작업이 등록 순서대로 전송되는지 확인
+- 테스트 작업은 끝나면 삭제
+
+사용법:
+  python scripts/test_label_printer.py [--items 200]
+  python scripts/test_label_printer.py --serve [--port 9100] [--out /tmp/zpl]  # 프린터 대용 서버만 실행
+"""
+import argparse
+import os
+import socketserver
+import sys
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+
+# Django 설정
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.development')
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.inventory.models import InventoryItem, LabelPrintJob
+from apps.inventory.printing import enqueue_print_job, process_print_queue
+from apps.inventory.services import BarcodeService
+
+
+class PrinterStandIn(socketserver.ThreadingTCPServer):
+    """RAW 9100 프린터 대용 (연결마다 받은 데이터를 작업 1건으로 기록)"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, port=0, out_dir=None):
+        self.jobs = []
+        self.out_dir = Path(out_dir) if out_dir else None
+        super().__init__(('127.0.0.1', port), PrinterHandler)
+
+    def record(self, data):
+        self.jobs.append(data)
+        if self.out_dir:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.out_dir / f'job-{len(self.jobs):04d}.zpl'
+            path.write_bytes(data)
+        print(f'  🖨  작업 수신: {len(data):,} bytes, 라벨 {data.count(b"^XA")}장')
+
+
+class PrinterHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        chunks = []
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        self.server.record(b''.join(chunks))
+
+
+def start_printer(port=0):
+    server = PrinterStandIn(port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='라벨 프린터 출력 대기열 테스트')
+    parser.add_argument('--items', type=int, default=200, help='라벨 출력 품목 수')
+    parser.add_argument('--serve', action='store_true', help='프린터 대용 서버만 실행')
+    parser.add_argument('--port', type=int, default=9100, help='--serve 포트')
+    parser.add_argument('--out', help='--serve 수신 작업 저장 디렉터리')
+    args = parser.parse_args()
+
+    if args.serve:
+        server = PrinterStandIn(args.port, args.out)
+        print(f'프린터 대용 서버: 127.0.0.1:{args.port} (Ctrl+C로 종료)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    items = list(InventoryItem.objects.filter(is_active=True).order_by('item_code')[:args.items])
+    if not items:
+        print('❌ 품목이 없습니다. 먼저 품목을 등록하세요.')
+        return 1
+    user = get_user_model().objects.filter(is_superuser=True).first()
+
+    printer = start_printer()
+    port = printer.server_address[1]
+    settings.LABEL_PRINTERS = {'test': {'host': '127.0.0.1', 'port': port, 'dpi': 203}}
+    service = BarcodeService()
+    jobs = []
+
+    try:
+        # 1. 정상 전송
+        started = time.monotonic()
+        payload = service.generate_zpl(items, label_type='both')
+        job = enqueue_print_job('test', payload, len(items), user)
+        jobs.append(job)
+        process_print_queue('test')  # CELERY_TASK_ALWAYS_EAGER면 등록 시 이미 전송됨
+        elapsed = round((time.monotonic() - started) * 1000, 1)
+        job.refresh_from_db()
+        print(f'라벨 {len(items)}장: ZPL {len(payload.encode()):,} bytes '
+              f'(장당 {len(payload.encode()) // len(items)} bytes), {elapsed}ms')
+
+        checks = {
+            '작업 전송 완료': job.status == LabelPrintJob.Status.SENT,
+            '수신 데이터 = 작업 ZPL': bool(printer.jobs) and printer.jobs[-1] == payload.encode('utf-8'),
+            '라벨 수 = 품목 수': bool(printer.jobs) and printer.jobs[-1].count(b'^XA') == len(items),
+        }
+
+        # 2. 프린터 꺼짐 → 실패 기록, 뒤 작업 보류
+        printer.shutdown()
+        printer.server_close()
+        first = enqueue_print_job('test', service.generate_zpl(items[:1]), 1, user)
+        second = enqueue_print_job('test', service.generate_zpl(items[1:2] or items[:1]), 1, user)
+        jobs.extend([first, second])
+        process_print_queue('test')
+        first.refresh_from_db()
+        second.refresh_from_db()
+        checks.update({
+            '꺼진 프린터: 실패 기록 + 백오프': (
+                first.status == LabelPrintJob.Status.PENDING and first.attempts == 1
+                and first.next_attempt_at is not None and bool(first.last_error)
+            ),
+            '꺼진 프린터: 뒤 작업 보류': second.status == LabelPrintJob.Status.PENDING and second.attempts == 0,
+        })
+
+        # 3. 프린터 복구 → 백오프 이후 순서대로 전송
+        printer = start_printer(port)
+        received = len(printer.jobs)
+        result = process_print_queue('test', now=timezone.now() + timedelta(hours=1))
+        first.refresh_from_db()
+        second.refresh_from_db()
+        checks.update({
+            '복구 후 두 작업 전송': result['sent'] == 2 and first.status == second.status == LabelPrintJob.Status.SENT,
+            '등록 순서대로 전송': printer.jobs[received:] == [
+                first.payload.encode('utf-8'), second.payload.encode('utf-8')
+            ],
+        })
+
+        for name, passed in checks.items():
+            print(f"  {'✅' if passed else '❌'} {name}")
+        return 0 if all(checks.values()) else 1
+    finally:
+        printer.shutdown()
+        printer.server_close()
+        LabelPrintJob.objects.filter(id__in=[job.id for job in jobs]).delete()
+
+
+if __name__ == '__main__':
+    sys.exit(main())